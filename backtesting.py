@@ -0,0 +1,218 @@
+import typing
+
+import numpy as np
+import pandas as pd
+
+from candle_buffer import CandleBuffer
+from candle_file import CandleFile
+from indicators import macd_series, rsi_series
+from models import Candle
+from strategies import breakout_signal, technical_signal, tp_sl_prices
+
+CANDLE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def candle_arrays(candles) -> typing.Dict[str, np.ndarray]:
+
+    # Accepts a list of Candle objects (like _historical_data() returns), a CandleBuffer, a CandleFile, a DataFrame
+    # or a dictionary of arrays and returns one array per column.
+
+    if isinstance(candles, CandleBuffer):
+        return {"timestamp": candles.timestamps, "open": candles.opens, "high": candles.highs, "low": candles.lows,
+                "close": candles.closes, "volume": candles.volumes}
+
+    if isinstance(candles, CandleFile):
+        return dict(candles.columns)  # Views of the memory-mapped file
+
+    if isinstance(candles, list) and (len(candles) == 0 or isinstance(candles[0], Candle)):
+        return {"timestamp": np.array([c.timestamp for c in candles], dtype=np.int64),
+                "open": np.array([c.open for c in candles], dtype=np.float64),
+                "high": np.array([c.high for c in candles], dtype=np.float64),
+                "low": np.array([c.low for c in candles], dtype=np.float64),
+                "close": np.array([c.close for c in candles], dtype=np.float64),
+                "volume": np.array([c.volume for c in candles], dtype=np.float64)}
+
+    return {"timestamp": np.asarray(candles["timestamp"], dtype=np.int64),
+            **{col: np.asarray(candles[col], dtype=np.float64) for col in CANDLE_COLUMNS[1:]}}
+
+
+def compute_signals(strategy_type: str, data: typing.Dict[str, np.ndarray], other_params: typing.Dict) -> np.ndarray:
+
+    # Signal of every candle with the same definitions as the live strategies (see strategies.py).
+    # signals[i] is the signal obtained once candle i is known.
+
+    if strategy_type == "Technical":
+        closes = pd.Series(data["close"])
+
+        macd_line, macd_signal = macd_series(closes, other_params['ema_fast'], other_params['ema_slow'],
+                                             other_params['ema_signal'])
+        rsi = rsi_series(closes, other_params['rsi_length'])
+
+        return technical_signal(rsi.to_numpy(), macd_line.to_numpy(), macd_signal.to_numpy()).astype(np.int8)
+
+    elif strategy_type == "Breakout":
+        signals = np.zeros(len(data["close"]), dtype=np.int8)
+        signals[1:] = breakout_signal(data["close"][1:], data["high"][:-1], data["low"][:-1], data["volume"][1:],
+                                      other_params['min_volume'])
+        return signals
+
+    else:
+        raise ValueError(f"Unknown strategy type: {strategy_type}")
+
+
+class BacktestResult:
+    def __init__(self, trades: pd.DataFrame, equity: np.ndarray, timestamps: np.ndarray, initial_balance: float):
+        self.trades = trades
+        self.equity = equity  # Balance + unrealized PNL at the close of each candle
+        self.timestamps = timestamps
+        self.initial_balance = initial_balance
+
+    def stats(self) -> typing.Dict[str, float]:
+
+        pnl = self.trades["profitloss"].to_numpy() if len(self.trades) > 0 else np.zeros(0)
+
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+
+        if len(self.equity) > 0:
+            peaks = np.maximum.accumulate(self.equity)
+            max_drawdown = float(((peaks - self.equity) / peaks).max() * 100)
+            final_equity = float(self.equity[-1])
+        else:
+            max_drawdown = 0.0
+            final_equity = self.initial_balance
+
+        return {"trades": int(len(pnl)),
+                "win_rate": float((pnl > 0).mean() * 100) if len(pnl) > 0 else 0.0,
+                "profitloss": float(pnl.sum()),
+                "return_pct": (final_equity / self.initial_balance - 1) * 100,
+                "max_drawdown_pct": max_drawdown,
+                "profit_factor": float(gains / losses) if losses > 0 else (float("inf") if gains > 0 else 0.0)}
+
+
+def _first_exit(data: typing.Dict[str, np.ndarray], start: int, upper: float, lower: float) -> int:
+
+    # Index of the first candle from start whose range reaches one of the exit prices, -1 if none does.
+    # Searches forward in growing chunks so that short trades do not scan the whole series.
+
+    highs, lows = data["high"], data["low"]
+    n = len(highs)
+    chunk = 256
+
+    while start < n:
+        end = min(n, start + chunk)
+        hits = (highs[start:end] >= upper) | (lows[start:end] <= lower)
+        if hits.any():
+            return start + int(hits.argmax())
+        start = end
+        chunk *= 2
+
+    return -1
+
+
+def run_backtest(strategy_type: str, candles, take_profit: typing.Optional[float], stop_loss: typing.Optional[float],
+                 other_params: typing.Dict, balance_pct: float = 100.0, initial_balance: float = 1000.0,
+                 fee_pct: float = 0.0) -> BacktestResult:
+
+    # Replays the strategy rules over a whole candle series:
+    # - Technical: the signal is computed when a candle closes, the position opens at the next candle open.
+    # - Breakout: candles only give the final close/volume, so the signal is checked at the close of each candle
+    #   and the position opens at that close (the live strategy checks it on every trade).
+    # Only one position is open at a time, like Strategy.ongoing_position.
+    # The take profit / stop loss are the tp_sl_prices() of the live strategies (see their TriggerBook). A candle that
+    # reaches both is counted as a stop loss, and a candle that opens past an exit price exits at its open.
+
+    data = candle_arrays(candles)
+    n = len(data["close"])
+
+    signals = compute_signals(strategy_type, data, other_params)
+    signal_indices = np.flatnonzero(signals)
+
+    next_candle_entry = strategy_type == "Technical"
+
+    realized = np.zeros(n)  # PNL realized at each candle
+    position_qty = np.zeros(n)  # Signed quantity held at the close of each candle
+    position_entry = np.zeros(n)
+
+    trades = []
+    balance = initial_balance
+    search_from = 0
+
+    while True:
+        k = np.searchsorted(signal_indices, search_from)
+        if k >= len(signal_indices):
+            break
+
+        signal_index = int(signal_indices[k])
+        direction = int(signals[signal_index])
+        side = "long" if direction == 1 else "short"
+
+        if next_candle_entry:
+            entry_index = signal_index + 1
+            if entry_index >= n:
+                break
+            entry_price = float(data["open"][entry_index])
+            check_from = entry_index
+        else:
+            entry_index = signal_index
+            entry_price = float(data["close"][entry_index])
+            check_from = entry_index + 1
+
+        quantity = (balance * balance_pct / 100) / entry_price
+
+        take_profit_price, stop_loss_price = tp_sl_prices(entry_price, side, take_profit, stop_loss)
+
+        if side == "long":
+            upper = take_profit_price if take_profit_price is not None else np.inf
+            lower = stop_loss_price if stop_loss_price is not None else -np.inf
+        else:
+            upper = stop_loss_price if stop_loss_price is not None else np.inf
+            lower = take_profit_price if take_profit_price is not None else -np.inf
+
+        exit_index = _first_exit(data, check_from, upper, lower)
+
+        if exit_index == -1:
+            exit_index = n - 1
+            exit_price = float(data["close"][exit_index])
+            exit_reason = "end"
+            status = "open"
+        else:
+            open_price = float(data["open"][exit_index])
+            hit_upper = data["high"][exit_index] >= upper
+            hit_lower = data["low"][exit_index] <= lower
+
+            if side == "long":
+                stop_loss_hit = bool(hit_lower)
+                exit_price = min(open_price, lower) if stop_loss_hit else max(open_price, upper)
+            else:
+                stop_loss_hit = bool(hit_upper)
+                exit_price = max(open_price, upper) if stop_loss_hit else min(open_price, lower)
+
+            exit_reason = "stop_loss" if stop_loss_hit else "take_profit"
+            status = "closed"
+
+        fees = (entry_price + exit_price) * quantity * fee_pct / 100
+        profitloss = (exit_price - entry_price) * quantity * direction - fees
+
+        position_qty[entry_index:exit_index] = quantity * direction
+        position_entry[entry_index:exit_index] = entry_price
+        realized[exit_index] += profitloss
+        balance += profitloss
+
+        trades.append({"entry_time": int(data["timestamp"][entry_index]),
+                       "exit_time": int(data["timestamp"][exit_index]), "side": side, "entry_price": entry_price,
+                       "exit_price": exit_price, "quantity": quantity, "profitloss": profitloss,
+                       "exit_reason": exit_reason, "status": status})
+
+        if status == "open":
+            break
+
+        # The position is closed during the exit candle, the signal of that candle can open the next one
+        search_from = exit_index
+
+    equity = initial_balance + np.cumsum(realized) + position_qty * (data["close"] - position_entry)
+
+    trades = pd.DataFrame(trades, columns=["entry_time", "exit_time", "side", "entry_price", "exit_price",
+                                           "quantity", "profitloss", "exit_reason", "status"])
+
+    return BacktestResult(trades, equity, data["timestamp"], initial_balance)
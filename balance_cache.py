@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+import typing
+
+from models import Balance
+
+logger = logging.getLogger()
+
+# Age in seconds after which get() requests the balances again before answering
+BALANCE_TTL = 60.0
+
+
+class BalanceCache:
+    def __init__(self, fetch: typing.Callable[[], typing.Dict[str, Balance]], ttl: float = BALANCE_TTL,
+                 refresh_interval: typing.Optional[float] = None):
+
+        # Balances of an account kept in memory, so that sizing an order does not wait for a signed REST request.
+        # They are requested again in the background every refresh_interval (ttl / 2 by default),
+        # and updated in between by the account events of the websockets (update() / set()).
+        # fetch: the user_balance() method of the client
+
+        self._fetch = fetch
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval if refresh_interval is not None else ttl / 2
+
+        # Replaced and never modified in place, the GUI and the websocket threads can loop over it
+        self._balances: typing.Dict[str, Balance] = dict()
+        self._updated_at: typing.Dict[str, float] = dict()  # time.time() of the last update of each asset
+
+        self.last_refresh: typing.Optional[float] = None
+        self.last_source: typing.Optional[str] = None  # "rest" or "push"
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self.refresh()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def balances(self) -> typing.Dict[str, Balance]:
+        return self._balances
+
+    def refresh(self) -> bool:
+
+        # Request all the balances now, returns False (and keeps the previous ones) if the request failed
+
+        balances = self._fetch()
+
+        if balances is None or len(balances) == 0:
+            logger.warning("Balances could not be refreshed, last refresh %s seconds ago",
+                           None if self.last_refresh is None else round(time.time() - self.last_refresh, 1))
+            return False
+
+        now = time.time()
+
+        with self._lock:
+            self._balances = dict(balances)
+            self._updated_at = {asset: now for asset in balances}
+            self.last_refresh = now
+            self.last_source = "rest"
+
+        return True
+
+    def update(self, asset: str, **attributes) -> bool:
+
+        # Account event: change some attributes of a known balance, returns False if the asset is unknown
+
+        with self._lock:
+            balance = self._balances.get(asset)
+            if balance is None:
+                return False
+
+            for attribute, value in attributes.items():
+                setattr(balance, attribute, value)
+
+            self._updated_at[asset] = time.time()
+            self.last_source = "push"
+
+        return True
+
+    def set(self, asset: str, balance: Balance):
+        with self._lock:
+            self._balances = {**self._balances, asset: balance}
+            self._updated_at = {**self._updated_at, asset: time.time()}
+            self.last_source = "push"
+
+    def age(self, asset: typing.Optional[str] = None) -> float:
+
+        # Seconds since the balance of the asset (or the oldest one) was updated, inf if it never was
+
+        updated_at = self._updated_at
+
+        if asset is not None:
+            timestamp = updated_at.get(asset)
+        else:
+            timestamp = min(updated_at.values()) if len(updated_at) > 0 else None
+
+        return time.time() - timestamp if timestamp is not None else float("inf")
+
+    def is_stale(self, asset: typing.Optional[str] = None, max_age: typing.Optional[float] = None) -> bool:
+        return self.age(asset) > (max_age if max_age is not None else self.ttl)
+
+    def get(self, asset: str, max_age: typing.Optional[float] = None) -> typing.Optional[Balance]:
+
+        # Cached balance of the asset, requested again first only if it is older than max_age (ttl by default)
+
+        if self.is_stale(asset, max_age):
+            logger.info("%s balance is stale (%s seconds), refreshing it", asset, round(self.age(asset), 1))
+            self.refresh()
+
+        return self._balances.get(asset)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Error while refreshing the balances: %s", e)
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import dateutil.parser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoding import BinanceDecoder, BitmexDecoder, orjson
+
+# Websocket messages decoded per second: the previous handlers (json.loads, float() of the dictionary values,
+# dateutil for the Bitmex timestamps) against the decoders of decoding.py, with the json module and with orjson.
+# Usage: python benchmarks/bench_decoding.py --messages 200000
+
+AGG_TRADE = ('{"e":"aggTrade","E":1651400096789,"s":"BTCUSDT","a":1234567890,"p":"38123.40","q":"0.012",'
+             '"f":2345678901,"l":2345678905,"T":1651400096787,"m":true}')
+BOOK_TICKER = ('{"e":"bookTicker","u":1234567890123,"s":"BTCUSDT","b":"38123.30","B":"2.512","a":"38123.40",'
+               '"A":"0.845","T":1651400096787,"E":1651400096789}')
+BITMEX_TRADE = ('{"table":"trade","action":"insert","data":[{"timestamp":"2022-05-01T10:14:56.787Z",'
+                '"symbol":"XBTUSD","side":"Buy","size":1200,"price":38121.5,"tickDirection":"PlusTick",'
+                '"trdMatchID":"5f0d5e3b-1b5e-4e44-9f2d-3b6b5f0e7a11","grossValue":3147840,"homeNotional":0.0314784,'
+                '"foreignNotional":1200}]}')
+
+
+def _previous_binance(message: str):
+    message_data = json.loads(message)
+    if message_data['e'] == "aggTrade":
+        return float(message_data['p']), float(message_data['q']), message_data['T']
+    return float(message_data['b']), float(message_data['a'])
+
+
+def _previous_bitmex(message: str):
+    omd = json.loads(message)
+    return [(float(d['price']), float(d['size']), int(dateutil.parser.isoparse(d['timestamp']).timestamp() * 1000))
+            for d in omd['data']]
+
+
+def _rate(decode, messages, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        decode(messages[i % len(messages)])
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    binance_messages = [AGG_TRADE, BOOK_TICKER]
+    bitmex_messages = [BITMEX_TRADE]
+
+    cases = {"binance previous": (_previous_binance, binance_messages),
+             "binance json": (BinanceDecoder(json.loads).decode, binance_messages),
+             "bitmex previous": (_previous_bitmex, bitmex_messages),
+             "bitmex json": (BitmexDecoder(json.loads).decode, bitmex_messages)}
+
+    if orjson is not None:
+        cases["binance orjson"] = (BinanceDecoder(orjson.loads).decode, binance_messages)
+        cases["bitmex orjson"] = (BitmexDecoder(orjson.loads).decode, bitmex_messages)
+    else:
+        print("orjson is not installed, only the json module is measured")
+
+    rates = {name: _rate(decode, messages, args.messages) for name, (decode, messages) in cases.items()}
+
+    print("%-18s %14s %10s" % ("", "messages/s", "speedup"))
+    for name, rate in sorted(rates.items()):
+        previous = rates[name.split(" ")[0] + " previous"]
+        print("%-18s %14.0f %9.2fx" % (name, rate, rate / previous))
+
+
+if __name__ == "__main__":
+    main()
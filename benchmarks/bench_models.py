@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Candle, ExchangeContract, candle_factory, contract_factory
+
+# Memory footprint and construction rate of the models: the previous classes (per-instance __dict__, exchange strings
+# compared in every constructor) against the slotted classes of models.py, built by their constructor and by the
+# per-exchange factories used by the clients.
+# Usage: python benchmarks/bench_models.py --candles 1000000 --contracts 2000
+
+
+class _PreviousCandle:
+    def __init__(self, candle_info, timeframe, exchange):
+        if exchange in ["binance_futures", "binance_spot"]:
+            self.timestamp = candle_info[0]
+            self.open = float(candle_info[1])
+            self.high = float(candle_info[2])
+            self.low = float(candle_info[3])
+            self.close = float(candle_info[4])
+            self.volume = float(candle_info[5])
+        elif exchange == "bitmex":
+            raise NotImplementedError
+        elif exchange == "parse_trade":
+            raise NotImplementedError
+
+
+class _PreviousContract:
+    def __init__(self, contract_info, exchange):
+        if exchange == "binance_futures":
+            self.symbol = contract_info['symbol']
+            self.base_asset = contract_info['baseAsset']
+            self.quote_currency = contract_info['quoteAsset']
+            self.price_decimals = contract_info['pricePrecision']
+            self.quantity_decimals = contract_info['quantityPrecision']
+            self.tick_size = 1 / pow(10, contract_info['pricePrecision'])
+            self.lot_size = 1 / pow(10, contract_info['quantityPrecision'])
+        elif exchange == "bitmex":
+            raise NotImplementedError
+
+        self.exchange = exchange
+
+
+def _klines(count: int):
+    # Kline lists as returned by /fapi/v1/klines
+    return [[1651363200000 + i * 60000, "38123.40", "38150.10", "38100.00", "38140.20", "152.312", 0, "0", 0, "0",
+             "0", "0"] for i in range(count)]
+
+
+def _contracts_info(count: int):
+    # Symbols as returned by /fapi/v1/exchangeInfo (about 200 on Binance Futures, 2000 on Binance spot)
+    return [{'symbol': "SYM%dUSDT" % i, 'baseAsset': "SYM%d" % i, 'quoteAsset': "USDT", 'pricePrecision': i % 8,
+             'quantityPrecision': 3} for i in range(count)]
+
+
+def _measure(build, infos):
+    # The rate is measured without tracemalloc, which slows down the allocations
+    start = time.perf_counter()
+    objects = [build(info) for info in infos]
+    elapsed = time.perf_counter() - start
+    del objects
+
+    tracemalloc.start()
+    objects = [build(info) for info in infos]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    return len(infos) / elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candles", type=int, default=1000000)
+    parser.add_argument("--contracts", type=int, default=2000)
+    args = parser.parse_args()
+
+    klines = _klines(args.candles)
+    contracts_info = _contracts_info(args.contracts)
+
+    build_candle = candle_factory("binance_futures")
+    build_contract = contract_factory("binance_futures")
+
+    cases = {"candles previous": (lambda c: _PreviousCandle(c, "1m", "binance_futures"), klines),
+             "candles slots": (lambda c: Candle(c, "1m", "binance_futures"), klines),
+             "candles factory": (lambda c: build_candle(c, "1m"), klines),
+             "contracts previous": (lambda c: _PreviousContract(c, "binance_futures"), contracts_info),
+             "contracts slots": (lambda c: ExchangeContract(c, "binance_futures"), contracts_info),
+             "contracts factory": (build_contract, contracts_info)}
+
+    results = {name: _measure(build, infos) for name, (build, infos) in cases.items()}
+
+    print("%-20s %14s %10s %12s %10s" % ("", "objects/s", "speedup", "memory MB", "ratio"))
+    for name, (rate, memory) in results.items():
+        previous_rate, previous_memory = results[name.split(" ")[0] + " previous"]
+        print("%-20s %14.0f %9.2fx %12.1f %9.2fx" % (name, rate, rate / previous_rate, memory / 1e6,
+                                                     memory / previous_memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transport import Transport
+
+# Latency of REST requests sent with a new connection each time (requests.get) and through the keep-alive
+# connection pool of transport.py, against a local HTTP stand-in of an exchange.
+# The stand-in is plain HTTP on localhost: on the real exchanges the TLS handshake saved by the pool is
+# several network round trips, so the gain is much larger than measured here.
+# Usage: python benchmarks/bench_transport.py --requests 2000
+
+
+class _OrderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True  # The headers and the body are separate writes
+
+    def do_GET(self):
+        body = b'{"orderId": 1, "status": "NEW", "avgPrice": "0", "executedQty": "0"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _measure(send, count: int) -> np.ndarray:
+    latencies = np.zeros(count)
+    for i in range(count):
+        start = time.perf_counter()
+        send()
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OrderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://127.0.0.1:%s" % server.server_address[1]
+
+    params = {'symbol': "BTCUSDT", 'orderId': 1}
+
+    transport = Transport(base_url)
+    transport.request("GET", "/fapi/v1/order", params)  # Opens the connection
+
+    results = {"requests.get": _measure(lambda: requests.get(base_url + "/fapi/v1/order", params=params).json(),
+                                        args.requests),
+               "Transport": _measure(lambda: transport.request("GET", "/fapi/v1/order", params).json(),
+                                     args.requests)}
+
+    print("%-14s %10s %10s %10s" % ("", "mean ms", "p50 ms", "p95 ms"))
+    for name, latencies in results.items():
+        print("%-14s %10.3f %10.3f %10.3f" % (name, latencies.mean(), np.percentile(latencies, 50),
+                                              np.percentile(latencies, 95)))
+
+    print("Speedup (mean): %.2fx" % (results["requests.get"].mean() / results["Transport"].mean()))
+
+    transport.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import typing
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_feed import CandleFeed
+from models import Candle, ExchangeContract, Trade, candle_factory, contract_factory
+from replay import ReplayBinanceClient, ReplayBitmexClient
+from strategies import BreakoutStrategy, TechnicalStrategy
+
+# Benchmark suite: microbenchmarks of the hot paths (trade parsing, websocket messages, indicators, models) and
+# macrobenchmarks of a whole update (client dispatch down to the strategies, GUI refresh), with fixed inputs and
+# seeds so two runs on the same machine measure the same work.
+# Each benchmark returns metrics {name: {"value", "unit", "higher_is_better"}}, the best of --repeat runs is kept.
+# Usage:
+#   python benchmarks/suite.py run --output results.json [--quick] [--only parse_trades on_response]
+#   python benchmarks/suite.py compare baseline.json results.json [--threshold 10]
+
+RESULTS_VERSION = 1
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 10.0  # Percent
+
+START_TIME = 1651363200000  # Candle and trade timestamps, a minute boundary
+
+_trade_candle = candle_factory("parse_trade")
+
+
+def _metric(value: float, unit: str, higher_is_better: bool) -> typing.Dict:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _binance_contracts() -> typing.Dict[str, ExchangeContract]:
+    build = contract_factory("binance_futures")
+    return {s: build({'symbol': s, 'baseAsset': s[:-4], 'quoteAsset': "USDT", 'pricePrecision': 2,
+                      'quantityPrecision': 3}) for s in ("BTCUSDT", "ETHUSDT")}
+
+
+def _bitmex_contracts() -> typing.Dict[str, ExchangeContract]:
+    build = contract_factory("bitmex")
+    return {"XBTUSD": build({'symbol': "XBTUSD", 'rootSymbol': "XBT", 'quoteCurrency': "USD", 'tickSize': 0.5,
+                             'lotSize': 100, 'isQuanto': False, 'isInverse': True, 'multiplier': -100000000})}
+
+
+def _history(count: int, end_time: int = START_TIME, seed: int = 1) -> typing.List[Candle]:
+
+    # Random walk 1m candles ending before end_time
+
+    rng = random.Random(seed)
+    candles = []
+    close = 30000.0
+
+    for i in range(count):
+        open_price = close
+        close = round(open_price * (1 + rng.gauss(0, 0.002)), 2)
+        candles.append(_trade_candle({'ts': end_time - (count - i) * 60000, 'open': open_price,
+                                      'high': max(open_price, close) + 5, 'low': min(open_price, close) - 5,
+                                      'close': close, 'volume': rng.random() * 50}, "1m"))
+
+    return candles
+
+
+def _trades(count: int, per_minute: int = 1000, seed: int = 2) -> typing.Tuple[list, list, list]:
+
+    # (prices, sizes, timestamps) of a random walk, per_minute trades in each 1m candle
+
+    rng = random.Random(seed)
+    prices, sizes = [], []
+    price = 30000.0
+
+    for _ in range(count):
+        price = round(price * (1 + rng.gauss(0, 0.0001)), 2)
+        prices.append(price)
+        sizes.append(round(rng.random(), 3))
+
+    step = 60000 // per_minute
+    return prices, sizes, [START_TIME + i * step for i in range(count)]
+
+
+def bench_parse_trades(quick: bool) -> typing.Dict:
+
+    # Strategy.parse_trades(): candle update and Take profit / Stop loss check of each trade
+
+    prices, sizes, timestamps = _trades(100000 if quick else 1000000)
+    contract = _binance_contracts()["BTCUSDT"]
+
+    strategy = BreakoutStrategy(None, contract, "Binance", "1m", 10, 2, 2, {'min_volume': 1e12})
+    now = [START_TIME]
+    feed = CandleFeed("Binance", contract, "1m", clock=lambda: now[0] / 1000)
+    feed.candles.extend(_history(1000))
+    strategy.attach_feed(feed)
+
+    parse_trades = strategy.parse_trades
+
+    start = time.perf_counter()
+    for price, size, timestamp in zip(prices, sizes, timestamps):
+        now[0] = timestamp
+        parse_trades(price, size, timestamp)
+    elapsed = time.perf_counter() - start
+
+    return {"trades_per_second": _metric(len(prices) / elapsed, "trades/s", True)}
+
+
+def bench_on_response(quick: bool) -> typing.Dict:
+
+    # BinanceClient._on_reponse() with a strategy running on the symbol: decoding, prices, candles, strategy
+
+    count = 50000 if quick else 500000
+    prices, sizes, timestamps = _trades(count)
+
+    client = ReplayBinanceClient(_binance_contracts(), lambda contract, timeframe, end_time: _history(1000))
+    client.replay_time = START_TIME / 1000  # The trades are later than the clock, no lag warning
+
+    try:
+        client.start_strategy(0, "Breakout", "BTCUSDT", "1m", 10, 2, 2, {'min_volume': 1e12})
+
+        frames = {
+            "book_ticker": ['{"e":"bookTicker","u":%d,"s":"BTCUSDT","b":"%.2f","B":"1.000","a":"%.2f","A":"1.000",'
+                            '"T":%d,"E":%d}' % (i, p - 0.01, p + 0.01, t, t)
+                            for i, (p, t) in enumerate(zip(prices, timestamps))],
+            "agg_trade": ['{"e":"aggTrade","E":%d,"a":%d,"s":"BTCUSDT","p":"%.2f","q":"%.3f","f":%d,"l":%d,"T":%d,'
+                          '"m":true}' % (t, i, p, s, i, i, t)
+                          for i, (p, s, t) in enumerate(zip(prices, sizes, timestamps))]}
+
+        results = dict()
+        for name, messages in frames.items():
+            on_response = client._on_reponse
+
+            start = time.perf_counter()
+            for message in messages:
+                on_response(None, message)
+            elapsed = time.perf_counter() - start
+
+            results[name + "_messages_per_second"] = _metric(count / elapsed, "messages/s", True)
+    finally:
+        client.close()
+
+    return results
+
+
+def bench_check_signal(quick: bool) -> typing.Dict:
+
+    # TechnicalStrategy._check_signal() with 1k, 10k and 100k candles in the buffer: the first call (indicators
+    # computed over the whole history) and the median call after each new candle
+
+    calls = 200 if quick else 2000
+    params = {'ema_fast': 12, 'ema_slow': 26, 'ema_signal': 9, 'rsi_length': 14}
+    contract = _binance_contracts()["BTCUSDT"]
+    results = dict()
+
+    for size in (1000, 10000, 100000):
+        strategy = TechnicalStrategy(None, contract, "Binance", "1m", 10, 2, 2, params)
+        feed = CandleFeed("Binance", contract, "1m", capacity=size)
+        feed.candles.extend(_history(size))
+        strategy.attach_feed(feed)
+
+        start = time.perf_counter()
+        strategy._check_signal()
+        first = time.perf_counter() - start
+
+        candles = feed.candles
+        latencies = np.zeros(calls)
+
+        for i in range(calls):
+            close = float(candles.closes[-1])
+            candles.append(int(candles.last_timestamp) + 60000, close, close + 5, close - 5, close + 1, 10)
+
+            start = time.perf_counter()
+            strategy._check_signal()
+            latencies[i] = time.perf_counter() - start
+
+        label = "%dk" % (size // 1000)
+        results["first_call_ms_" + label] = _metric(first * 1000, "ms", False)
+        results["p50_us_" + label] = _metric(float(np.percentile(latencies, 50)) * 1e6, "us", False)
+        results["p99_us_" + label] = _metric(float(np.percentile(latencies, 99)) * 1e6, "us", False)
+
+    return results
+
+
+def bench_models(quick: bool) -> typing.Dict:
+
+    # Candle and ExchangeContract construction with the factories used by the clients
+
+    count = 100000 if quick else 1000000
+
+    klines = [[START_TIME + i * 60000, "38123.40", "38150.10", "38100.00", "38140.20", "152.312", 0, "0", 0, "0",
+               "0", "0"] for i in range(count)]
+    contracts_info = [{'symbol': "SYM%dUSDT" % i, 'baseAsset': "SYM%d" % i, 'quoteAsset': "USDT",
+                       'pricePrecision': i % 8, 'quantityPrecision': 3} for i in range(count // 10)]
+
+    build_candle = candle_factory("binance_futures")
+    build_contract = contract_factory("binance_futures")
+
+    start = time.perf_counter()
+    for kline in klines:
+        build_candle(kline, "1m")
+    candle_rate = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for info in contracts_info:
+        build_contract(info)
+    contract_rate = len(contracts_info) / (time.perf_counter() - start)
+
+    return {"candles_per_second": _metric(candle_rate, "objects/s", True),
+            "contracts_per_second": _metric(contract_rate, "objects/s", True)}
+
+
+def _gui_clients(strategies: int, trades: int):
+
+    # Network-free clients with running strategies and their trades, for TradeKingRoot.gui_update()
+
+    binance = ReplayBinanceClient(_binance_contracts())
+    bitmex = ReplayBitmexClient(_bitmex_contracts())
+
+    for i in range(strategies):
+        client, symbol = (binance, "BTCUSDT") if i % 2 == 0 else (bitmex, "XBTUSD")
+        contract = client.contracts[symbol]
+        strategy = BreakoutStrategy(client, contract, client.platform, "1m", 10, 2, 2, {'min_volume': 10})
+
+        for j in range(trades):
+            strategy.trades.append(Trade({"time": START_TIME + (i * trades + j) * 1000, "entry_price": 30000.0,
+                                          "contract": contract, "strategy": "Breakout", "side": "long",
+                                          "status": "open", "profitloss": 0.0, "quantity": 0.01,
+                                          "entry_id": i * trades + j}))
+            strategy.add_log("Trade %s" % j)
+
+        client.strategies[i] = strategy
+
+    return binance, bitmex
+
+
+def bench_gui_update(quick: bool) -> typing.Dict:
+
+    # TradeKingRoot.gui_update() with N strategies and their trades: the first call creates the rows of the
+    # trades table, the next ones only update their variables. Needs Tk and a display, skipped otherwise.
+
+    try:
+        import tkinter as tk
+        import types
+
+        from main import TradeKingRoot
+        from gui.process_log import ProcessLog
+        from gui.user_trades import UserTrades
+
+        tk_root = tk.Tk()
+    except Exception as e:
+        return {"skipped": "%s: %s" % (type(e).__name__, e)}
+
+    results = dict()
+    calls = 5 if quick else 20
+
+    try:
+        tk_root.withdraw()
+
+        for strategies, trades in ((10, 10), (100, 10)):
+            binance, bitmex = _gui_clients(strategies, trades)
+
+            # Only the components gui_update() uses, the watchlist is empty
+            root = types.SimpleNamespace(binance=binance, bitmex=bitmex, _process_log=ProcessLog(tk_root),
+                                         _user_trades=UserTrades(tk_root),
+                                         _crypto_live=types.SimpleNamespace(body_widgets={'symbol': dict()}),
+                                         gui_update_seconds=0.0, gui_update_total_seconds=0.0, gui_updates=0,
+                                         after=lambda *args: None)
+
+            start = time.perf_counter()
+            TradeKingRoot.gui_update(root)
+            tk_root.update()
+            first = time.perf_counter() - start
+
+            latencies = np.zeros(calls)
+            for i in range(calls):
+                start = time.perf_counter()
+                TradeKingRoot.gui_update(root)
+                tk_root.update()
+                latencies[i] = time.perf_counter() - start
+
+            binance.close()
+            bitmex.close()
+
+            label = "%d_strategies_%d_trades" % (strategies, trades)
+            results["first_ms_" + label] = _metric(first * 1000, "ms", False)
+            results["p50_ms_" + label] = _metric(float(np.percentile(latencies, 50)) * 1000, "ms", False)
+    finally:
+        tk_root.destroy()
+
+    return results
+
+
+BENCHMARKS = {"parse_trades": bench_parse_trades, "on_response": bench_on_response,
+              "check_signal": bench_check_signal, "models": bench_models, "gui_update": bench_gui_update}
+
+
+def _best(runs: typing.List[typing.Dict]) -> typing.Dict:
+
+    # Best value of each metric over the runs: the runs slowed down by the rest of the machine are discarded
+
+    best = dict(runs[0])
+
+    for run in runs[1:]:
+        for name, metric in run.items():
+            if name == "skipped":
+                continue
+            previous = best[name]["value"]
+            better = metric["value"] > previous if metric["higher_is_better"] else metric["value"] < previous
+            if better:
+                best[name] = metric
+
+    return best
+
+
+def _git_commit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: typing.List[str], quick: bool = False, repeat: int = DEFAULT_REPEAT) -> typing.Dict:
+    benchmarks = dict()
+
+    for name in names:
+        runs = []
+        for _ in range(repeat):
+            runs.append(BENCHMARKS[name](quick))
+            if "skipped" in runs[-1]:
+                break
+
+        benchmarks[name] = _best(runs)
+        print_results({name: benchmarks[name]})
+
+    return {"version": RESULTS_VERSION, "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": _git_commit(), "python": platform.python_version(), "machine": platform.machine(),
+            "platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count(),
+            "quick": quick, "repeat": repeat, "benchmarks": benchmarks}
+
+
+def print_results(benchmarks: typing.Dict):
+    for name, metrics in benchmarks.items():
+        if "skipped" in metrics:
+            print("%-14s skipped (%s)" % (name, metrics["skipped"]))
+            continue
+
+        for metric_name, metric in metrics.items():
+            print("%-14s %-40s %16.2f %s" % (name, metric_name, metric["value"], metric["unit"]))
+
+
+def compare(baseline: typing.Dict, results: typing.Dict,
+            threshold: float = DEFAULT_THRESHOLD) -> typing.List[typing.Tuple[str, str, float]]:
+
+    # Metrics worse than the baseline by more than threshold percent, as (benchmark, metric, change in percent).
+    # A change is positive when the metric got better.
+
+    regressions = []
+
+    if baseline.get("quick") != results.get("quick"):
+        print("Warning: comparing a --quick run with a full run")
+
+    print("%-14s %-40s %14s %14s %9s" % ("", "", "baseline", "new", "change"))
+
+    for name, metrics in results["benchmarks"].items():
+        base_metrics = baseline["benchmarks"].get(name)
+
+        if base_metrics is None or "skipped" in metrics or "skipped" in base_metrics:
+            continue
+
+        for metric_name, metric in metrics.items():
+            base = base_metrics.get(metric_name)
+            if base is None or base["value"] == 0:
+                continue
+
+            change = (metric["value"] - base["value"]) / base["value"] * 100
+            if not metric["higher_is_better"]:
+                change = -change
+
+            status = "REGRESSION" if change < -threshold else ""
+            if status:
+                regressions.append((name, metric_name, change))
+
+            print("%-14s %-40s %14.2f %14.2f %+8.1f%% %s" % (name, metric_name, base["value"], metric["value"],
+                                                            change, status))
+
+    return regressions
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Trade King benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and save the results")
+    run_parser.add_argument("--output", help="JSON file of the results")
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument("--quick", action="store_true", help="Smaller inputs, for a quick check")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+
+    compare_parser = commands.add_parser("compare", help="Compare results with a baseline, exit code 1 on a "
+                                                         "regression")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Percent a metric may get worse before it is a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.only, args.quick, args.repeat)
+
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=1)
+
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        results = json.load(f)
+
+    regressions = compare(baseline, results, args.threshold)
+
+    if len(regressions) > 0:
+        print("%s regression(s) above %s%%" % (len(regressions), args.threshold))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
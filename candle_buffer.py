@@ -0,0 +1,130 @@
+import typing
+
+import numpy as np
+
+from models import Candle, candle_factory
+
+# Number of candles kept per strategy, older candles are overwritten
+DEFAULT_CANDLE_CAPACITY = 5000
+
+_trade_candle = candle_factory("parse_trade")
+
+
+class CandleBuffer:
+    def __init__(self, capacity: int = DEFAULT_CANDLE_CAPACITY):
+
+        # Fixed size ring of candles stored column by column in preallocated arrays.
+        # Every value is written twice (at i and i + capacity) so that the candles held, oldest to newest,
+        # are always one contiguous slice: the column properties are views and never copy the data.
+
+        self.capacity = capacity
+
+        self._timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self._open = np.zeros(2 * capacity, dtype=np.float64)
+        self._high = np.zeros(2 * capacity, dtype=np.float64)
+        self._low = np.zeros(2 * capacity, dtype=np.float64)
+        self._close = np.zeros(2 * capacity, dtype=np.float64)
+        self._volume = np.zeros(2 * capacity, dtype=np.float64)
+
+        self._count = 0  # Candles currently held
+        self.total = 0  # Candles appended since the creation of the buffer, used as an absolute candle index
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _window(self) -> slice:
+        start = (self.total - self._count) % self.capacity
+        return slice(start, start + self._count)
+
+    def _write(self, pos: int, timestamp: int, open_price: float, high: float, low: float, close: float,
+               volume: float):
+        for p in (pos, pos + self.capacity):
+            self._timestamp[p] = timestamp
+            self._open[p] = open_price
+            self._high[p] = high
+            self._low[p] = low
+            self._close[p] = close
+            self._volume[p] = volume
+
+    def append(self, timestamp: int, open_price: float, high: float, low: float, close: float, volume: float):
+
+        self._write(self.total % self.capacity, timestamp, open_price, high, low, close, volume)
+
+        self.total += 1
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, candles: typing.Iterable[Candle]):
+        for candle in candles:
+            self.append(candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume)
+
+    def update_last(self, price: float, size: float):
+
+        # Update the current candle in place with a new trade
+
+        pos = (self.total - 1) % self.capacity
+
+        for p in (pos, pos + self.capacity):
+            self._close[p] = price
+            self._volume[p] += size
+
+            if price > self._high[p]:
+                self._high[p] = price
+            elif price < self._low[p]:
+                self._low[p] = price
+
+    def clear(self):
+        self._count = 0
+        self.total = 0
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self._timestamp[(self.total - 1) % self.capacity])
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamp[self._window()]
+
+    @property
+    def opens(self) -> np.ndarray:
+        return self._open[self._window()]
+
+    @property
+    def highs(self) -> np.ndarray:
+        return self._high[self._window()]
+
+    @property
+    def lows(self) -> np.ndarray:
+        return self._low[self._window()]
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self._close[self._window()]
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self._volume[self._window()]
+
+    def __getitem__(self, index):
+
+        # Returns a Candle object (a copy, changing it does not change the buffer) or a list of them for a slice
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("candle index out of range")
+
+        pos = self._window().start + index
+
+        candle_info = {'ts': int(self._timestamp[pos]), 'open': float(self._open[pos]), 'high': float(self._high[pos]),
+                       'low': float(self._low[pos]), 'close': float(self._close[pos]),
+                       'volume': float(self._volume[pos])}
+
+        return _trade_candle(candle_info, None)
+
+    def __iter__(self) -> typing.Iterator[Candle]:
+        for i in range(self._count):
+            yield self[i]
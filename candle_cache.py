@@ -0,0 +1,163 @@
+import logging
+import sqlite3
+import threading
+import time
+import typing
+
+from candle_buffer import DEFAULT_CANDLE_CAPACITY
+from candle_feed import TFRAME_EQUIV
+from models import Candle, ExchangeContract, candle_factory
+
+logger = logging.getLogger()
+
+CANDLE_CACHE_PATH = "candles.db"
+
+# Candles returned by history(), enough to fill the buffer of a feed
+HISTORY_CANDLES = DEFAULT_CANDLE_CAPACITY
+
+_trade_candle = candle_factory("parse_trade")
+
+# fetch(contract, timeframe, start_time, end_time): the _historical_data() method of a client, it returns the
+# candles opened from start_time to end_time (milliseconds), oldest first, as many as one request gives
+HistoryFetcher = typing.Callable[[ExchangeContract, str, int, int], typing.List[Candle]]
+
+
+class CandleCache:
+    def __init__(self, path: str = CANDLE_CACHE_PATH):
+
+        # Candles of all the exchanges, symbols and timeframes in a SQLite database, so the history of a feed is
+        # requested once: afterwards only the candles missing before or after the cached ones are requested.
+        # The coverage table keeps, for each symbol and timeframe, the range already requested. The candles the
+        # exchange does not have (no trades, maintenance) are holes inside it and are not requested again.
+        # The cache can be shared by several clients and threads.
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.cursor = self.connection.cursor()
+        self._lock = threading.Lock()
+
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS candles (exchange TEXT, symbol TEXT, timeframe TEXT, "
+                            "timestamp INTEGER, open REAL, high REAL, low REAL, close REAL, volume REAL, "
+                            "PRIMARY KEY (exchange, symbol, timeframe, timestamp)) WITHOUT ROWID")
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS coverage (exchange TEXT, symbol TEXT, timeframe TEXT, "
+                            "first INTEGER, last INTEGER, PRIMARY KEY (exchange, symbol, timeframe))")
+
+        self.connection.commit()
+
+    def get(self, exchange: str, symbol: str, timeframe: str, start_time: int, end_time: int) -> typing.List[Candle]:
+
+        # Cached candles opened from start_time to end_time, oldest first
+
+        with self._lock:
+            self.cursor.execute("SELECT timestamp, open, high, low, close, volume FROM candles WHERE exchange = ? "
+                                "AND symbol = ? AND timeframe = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                                (exchange, symbol, timeframe, start_time, end_time))
+            rows = self.cursor.fetchall()
+
+        return [_trade_candle({'ts': r[0], 'open': r[1], 'high': r[2], 'low': r[3], 'close': r[4], 'volume': r[5]},
+                              timeframe) for r in rows]
+
+    def store(self, exchange: str, symbol: str, timeframe: str, candles: typing.List[Candle]):
+
+        # The candles already cached are replaced: the last one may have been stored before it was closed
+
+        with self._lock:
+            self.cursor.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    [(exchange, symbol, timeframe, c.timestamp, c.open, c.high, c.low, c.close,
+                                      c.volume) for c in candles])
+            self.connection.commit()
+
+    def coverage(self, exchange: str, symbol: str, timeframe: str) -> typing.Optional[typing.Tuple[int, int]]:
+
+        # (first, last) open timestamps of the range already requested, None if nothing is cached
+
+        with self._lock:
+            self.cursor.execute("SELECT first, last FROM coverage WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+                                (exchange, symbol, timeframe))
+            row = self.cursor.fetchone()
+
+        return (row[0], row[1]) if row is not None else None
+
+    def _set_coverage(self, exchange: str, symbol: str, timeframe: str, first: int, last: int):
+        with self._lock:
+            self.cursor.execute("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?)",
+                                (exchange, symbol, timeframe, first, last))
+            self.connection.commit()
+
+    def _fetch(self, exchange: str, contract: ExchangeContract, timeframe: str, fetch: HistoryFetcher,
+               start_time: int, end_time: int) -> typing.Optional[typing.Tuple[int, int]]:
+
+        # Requests the candles from start_time to end_time page by page and stores them.
+        # Returns the (first, last) timestamps of the candles stored, None if there was none. The clients return no
+        # candle on a request error, so the range stored may stop before end_time.
+
+        interval = TFRAME_EQUIV[timeframe] * 1000
+        first = None
+        last = None
+
+        while start_time <= end_time:
+            candles = fetch(contract, timeframe, start_time, end_time)
+
+            if len(candles) == 0 or candles[-1].timestamp < start_time:
+                break
+
+            self.store(exchange, contract.symbol, timeframe, candles)
+
+            if first is None:
+                first = candles[0].timestamp
+            last = candles[-1].timestamp
+            start_time = last + interval
+
+        return (first, last) if first is not None else None
+
+    def history(self, exchange: str, contract: ExchangeContract, timeframe: str, fetch: HistoryFetcher,
+                count: int = HISTORY_CANDLES, end_time: typing.Optional[int] = None) -> typing.List[Candle]:
+
+        # The last count candles up to end_time (now by default), the current candle included.
+        # Only the candles older than the cached range and the ones since its last candle are requested.
+        # exchange: key of the exchange in the cache, the same symbol may have other prices on another exchange
+
+        interval = TFRAME_EQUIV[timeframe] * 1000
+
+        if end_time is None:
+            end_time = int(time.time() * 1000)
+
+        end_time -= end_time % interval
+        start_time = end_time - (count - 1) * interval
+
+        symbol = contract.symbol
+        covered = self.coverage(exchange, symbol, timeframe)
+
+        if covered is not None and covered[1] >= start_time and covered[0] <= end_time:
+            first, last = covered
+
+            # The range covered is only widened to the candles actually stored: after a failed request, the
+            # missing candles are requested again by the next call
+            if start_time < first:
+                stored = self._fetch(exchange, contract, timeframe, fetch, start_time, first - interval)
+                if stored is not None and stored[1] >= first - interval:
+                    first = stored[0]
+
+            # From the last cached candle, it may have been stored before it was closed
+            if last <= end_time:
+                stored = self._fetch(exchange, contract, timeframe, fetch, last, end_time)
+                if stored is not None:
+                    last = stored[1]
+
+            self._set_coverage(exchange, symbol, timeframe, first, last)
+
+        else:
+            # Nothing cached, or too old to be continued: the whole range is requested
+            stored = self._fetch(exchange, contract, timeframe, fetch, start_time, end_time)
+
+            if stored is not None:
+                self._set_coverage(exchange, symbol, timeframe, *stored)
+
+        candles = self.get(exchange, symbol, timeframe, start_time, end_time)
+
+        logger.info("%s %s %s: %s candles from the cache", exchange, symbol, timeframe, len(candles))
+
+        return candles
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
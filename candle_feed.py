@@ -0,0 +1,326 @@
+import logging
+import threading
+import time
+import typing
+
+import numpy as np
+
+from candle_buffer import CandleBuffer, DEFAULT_CANDLE_CAPACITY
+from models import Candle, ExchangeContract
+
+if typing.TYPE_CHECKING:
+    from strategies import Strategy
+
+logger = logging.getLogger()
+
+# TFRAME_EQUIV is used in parse_trades() to compare the last candle timestamp to the new trade timestamp
+TFRAME_EQUIV = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "4h": 14400}
+
+# The higher timeframes are built from the 1m candles
+BASE_TIMEFRAME = "1m"
+
+# Below this number of candles, the history of a higher timeframe is requested from the exchange instead of
+# being resampled from the 1m history (1000 1m candles from Binance only make 16 1h candles)
+MIN_RESAMPLED_CANDLES = 100
+
+
+def resample_candles(timestamps: np.ndarray, opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                     closes: np.ndarray, volumes: np.ndarray, timeframe: str) -> typing.Dict[str, np.ndarray]:
+
+    # Aggregate candles into a higher timeframe, without any Python loop.
+    # The first candle is dropped when the history starts in the middle of it (its open would be wrong),
+    # the last one can be incomplete: it is the candle in progress.
+
+    timeframe_equiv = TFRAME_EQUIV[timeframe] * 1000
+
+    buckets = timestamps - timestamps % timeframe_equiv
+
+    if len(buckets) > 0 and timestamps[0] != buckets[0]:
+        keep = buckets != buckets[0]
+        timestamps, opens, highs, lows, closes, volumes, buckets = (a[keep] for a in (timestamps, opens, highs, lows,
+                                                                                     closes, volumes, buckets))
+
+    if len(buckets) == 0:
+        return {"timestamp": np.zeros(0, dtype=np.int64), "open": np.zeros(0), "high": np.zeros(0),
+                "low": np.zeros(0), "close": np.zeros(0), "volume": np.zeros(0)}
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+
+    return {"timestamp": buckets[starts], "open": opens[starts], "high": np.maximum.reduceat(highs, starts),
+            "low": np.minimum.reduceat(lows, starts), "close": closes[ends], "volume": np.add.reduceat(volumes, starts)}
+
+
+class CandleFeed:
+    def __init__(self, exchange: str, contract: ExchangeContract, timeframe: str,
+                 capacity: int = DEFAULT_CANDLE_CAPACITY, clock: typing.Callable[[], float] = time.time,
+                 lock: typing.Optional[threading.Lock] = None):
+
+        # Candles of one symbol and timeframe built from the trades of the websocket.
+        # The clients keep one feed per symbol/timeframe shared by all the strategies subscribed to it,
+        # so the trades are aggregated once and the candles are stored once.
+        # clock: current time in seconds, the time of the recorded frames during a replay (see replay.py)
+        # lock: held by on_trade() while the candles are written, shared by the feeds of a MultiTimeframeFeed.
+        # The strategies of the asyncio clients read the candles from another thread with it held (see StrategyTask).
+
+        self.exchange = exchange
+        self.contract = contract
+        self.timeframe = timeframe
+        self.timeframe_equiv = TFRAME_EQUIV[timeframe] * 1000
+
+        self.candles = CandleBuffer(capacity)
+        self.clock = clock
+        self.lock = lock if lock is not None else threading.Lock()
+
+        # Replaced and never modified in place, like the strategies index of the clients
+        self.subscribers: typing.Tuple["Strategy", ...] = ()
+
+    def subscribe(self, strategy: "Strategy"):
+        self.subscribers = self.subscribers + (strategy,)
+
+    def unsubscribe(self, strategy: "Strategy"):
+        self.subscribers = tuple(s for s in self.subscribers if s is not strategy)
+
+    def on_trade(self, price: float, size: float, timestamp: int):
+
+        # Update the candles once, then let every subscribed strategy react to the update
+
+        with self.lock:
+            tick_type = self.parse_trades(price, size, timestamp)
+
+        self.notify(tick_type)
+
+    def notify(self, tick_type: str):
+        for strategy in self.subscribers:
+            strategy.on_feed_update(tick_type)
+
+    def roll_up(self, base_tick_type: str, price: float, size: float, base_timestamp: int) -> str:
+
+        # Update a higher timeframe with a trade already parsed by the 1m feed, see MultiTimeframeFeed.
+        # base_tick_type: result of parse_trades() on the 1m feed
+        # base_timestamp: open timestamp of the last 1m candle, the one holding the trade
+
+        if base_tick_type == "same_candle":
+            self.candles.update_last(price, size)
+            return "same_candle"
+
+        previous_timestamp = self.candles.last_timestamp
+        timestamp = base_timestamp - base_timestamp % self.timeframe_equiv
+
+        # The new 1m candle is still in the last candle of this timeframe
+
+        if timestamp <= previous_timestamp:
+            self.candles.update_last(price, size)
+            return "same_candle"
+
+        # Missing Candle(s), then the New candle
+
+        previous_close = float(self.candles.closes[-1])
+
+        while previous_timestamp + self.timeframe_equiv < timestamp:
+            previous_timestamp += self.timeframe_equiv
+            self.candles.append(previous_timestamp, previous_close, previous_close, previous_close, previous_close, 0)
+
+        self.candles.append(timestamp, price, price, price, price, size)
+
+        return "new_candle"
+
+    def parse_trades(self, price: float, size: float, timestamp: int) -> str:
+
+        # Parse new trades coming in from the websocket and update the Candles based on the timestamp.
+        # price: The trade price
+        # size: The trade size
+        # timestamp: Unix timestamp in milliseconds
+
+        timestamp_diff = int(self.clock() * 1000) - timestamp  # multiply by 1000 to get miliseconds
+        if timestamp_diff >= 2000:
+            logger.warning("%s %s: %s milliseconds of difference between the current time and the trade time",
+                           self.exchange, self.contract.symbol, timestamp_diff)
+
+        previous_timestamp = self.candles.last_timestamp
+
+        # Same Candle
+
+        if timestamp < previous_timestamp + self.timeframe_equiv:
+
+            self.candles.update_last(price, size)
+
+            return "same_candle"
+
+        # Missing Candle(s)
+
+        elif timestamp >= previous_timestamp + 2 * self.timeframe_equiv:
+
+            missing_candles = int((timestamp - previous_timestamp) / self.timeframe_equiv) - 1
+
+            logger.info("%s missing %s candles for %s %s (%s %s)", self.exchange, missing_candles, self.contract.symbol,
+                        self.timeframe, timestamp, previous_timestamp)
+
+            previous_close = float(self.candles.closes[-1])
+
+            for missing in range(missing_candles):
+                previous_timestamp += self.timeframe_equiv
+                self.candles.append(previous_timestamp, previous_close, previous_close, previous_close,
+                                    previous_close, 0)
+
+            self.candles.append(previous_timestamp + self.timeframe_equiv, price, price, price, price, size)
+
+            return "new_candle"
+
+        # New Candle
+
+        else:
+            self.candles.append(previous_timestamp + self.timeframe_equiv, price, price, price, price, size)
+
+            logger.info("%s New candle for %s %s", self.exchange, self.contract.symbol, self.timeframe)
+
+            return "new_candle"
+
+
+class MultiTimeframeFeed:
+    def __init__(self, exchange: str, contract: ExchangeContract,
+                 history: typing.Callable[[ExchangeContract, str], typing.List[Candle]],
+                 native_timeframes: typing.Optional[typing.Iterable[str]] = None,
+                 min_resampled_candles: int = MIN_RESAMPLED_CANDLES, history_candles: typing.Optional[int] = None,
+                 clock: typing.Callable[[], float] = time.time):
+
+        # All the candle feeds of one symbol, updated in the same pass for each trade of the websocket.
+        # The 1m history is requested first when it can give min_resampled_candles of the timeframe: the history of
+        # the higher timeframes is resampled from it, so starting another timeframe on this symbol usually needs no
+        # request at all. Otherwise the timeframe is requested from the exchange alone, the 1m feed is added later.
+        # Only the 1m feed parses the trades, the higher timeframes are rolled up from its last candle: an extra
+        # timeframe costs one in-place update of its last candle per trade.
+        # history: the _historical_data() method of the client
+        # native_timeframes: timeframes the exchange can return history for (all of them by default)
+        # history_candles: 1m candles returned by a history request, None when unknown (read from a candle cache)
+        # clock: given to the feeds, see CandleFeed
+
+        self.exchange = exchange
+        self.contract = contract
+
+        self._history = history
+        self._native_timeframes = set(native_timeframes) if native_timeframes is not None else set(TFRAME_EQUIV)
+        self._min_resampled_candles = min_resampled_candles
+        self._history_candles = history_candles
+        self._clock = clock
+        self.lock = threading.Lock()  # Of all the feeds, a trade updates them together
+
+        self.feeds: typing.Dict[str, CandleFeed] = dict()
+
+        # Replaced and never modified in place, see _index()
+        self._feeds: typing.Tuple[CandleFeed, ...] = ()
+        self._base: typing.Optional[CandleFeed] = None
+        self._higher: typing.Tuple[CandleFeed, ...] = ()
+
+    def on_trade(self, price: float, size: float, timestamp: int):
+        base = self._base
+
+        if base is None:  # No 1m history, the higher timeframes were requested from the exchange
+            for feed in self._feeds:
+                feed.on_trade(price, size, timestamp)
+            return
+
+        # Every timeframe is updated before the strategies are
+        with self.lock:
+            res = base.parse_trades(price, size, timestamp)
+            base_timestamp = base.candles.last_timestamp
+
+            tick_types = [feed.roll_up(res, price, size, base_timestamp) for feed in self._higher]
+
+        base.notify(res)
+        for feed, tick_type in zip(self._higher, tick_types):
+            feed.notify(tick_type)
+
+    def _index(self):
+        feeds = tuple(sorted(self.feeds.values(), key=lambda f: f.timeframe_equiv))
+        base = self.feeds.get(BASE_TIMEFRAME)
+
+        self._feeds = feeds
+        self._higher = tuple(f for f in feeds if f is not base) if base is not None else ()
+        self._base = base
+
+    def _add(self, feed: CandleFeed):
+        self.feeds[feed.timeframe] = feed
+        self._index()
+
+    def _resamples(self, timeframe: str) -> bool:
+
+        # Whether the 1m history is expected to give enough candles of a timeframe, before it is requested
+
+        if timeframe not in self._native_timeframes or self._history_candles is None:
+            return True
+
+        resampled = self._history_candles * TFRAME_EQUIV[BASE_TIMEFRAME] / TFRAME_EQUIV[timeframe]
+        return resampled >= self._min_resampled_candles
+
+    def get_feed(self, timeframe: str) -> typing.Optional[CandleFeed]:
+
+        # Returns None if no historical data could be retrieved
+
+        if timeframe in self.feeds:
+            return self.feeds[timeframe]
+
+        base = self.feeds.get(BASE_TIMEFRAME)
+
+        if base is None and (timeframe == BASE_TIMEFRAME or self._resamples(timeframe)):
+            candles = self._history(self.contract, BASE_TIMEFRAME)
+
+            if len(candles) > 0:
+                base = CandleFeed(self.exchange, self.contract, BASE_TIMEFRAME, clock=self._clock, lock=self.lock)
+                base.candles.extend(candles)
+                self._add(base)
+            elif timeframe == BASE_TIMEFRAME:
+                return None
+
+        if timeframe == BASE_TIMEFRAME:
+            return base
+
+        feed = CandleFeed(self.exchange, self.contract, timeframe, clock=self._clock, lock=self.lock)
+
+        resampled = None
+        if base is not None:
+            with self.lock:  # The 1m candles may be updated by another thread, see CandleFeed
+                c = base.candles
+                resampled = resample_candles(c.timestamps, c.opens, c.highs, c.lows, c.closes, c.volumes, timeframe)
+
+        if resampled is not None and (len(resampled["close"]) >= self._min_resampled_candles
+                                      or timeframe not in self._native_timeframes):
+            for row in zip(*(resampled[col].tolist() for col in ["timestamp", "open", "high", "low", "close",
+                                                                 "volume"])):
+                feed.candles.append(*row)
+
+            logger.info("%s %s %s: %s candles resampled from the 1m history", self.exchange, self.contract.symbol,
+                        timeframe, len(feed.candles))
+
+        elif timeframe in self._native_timeframes:
+            feed.candles.extend(self._history(self.contract, timeframe))
+
+        if len(feed.candles) == 0:
+            return None
+
+        self._add(feed)
+
+        return feed
+
+    def remove_feed(self, timeframe: str):
+
+        # The 1m feed stays as long as other timeframes are built next to it
+
+        feed = self.feeds.get(timeframe)
+
+        if feed is None or len(feed.subscribers) > 0:
+            return
+
+        if timeframe == BASE_TIMEFRAME and len(self.feeds) > 1:
+            return
+
+        del self.feeds[timeframe]
+
+        base = self.feeds.get(BASE_TIMEFRAME)
+        if len(self.feeds) == 1 and base is not None and len(base.subscribers) == 0:
+            del self.feeds[BASE_TIMEFRAME]
+
+        self._index()
+
+    def in_use(self) -> bool:
+        return any(len(feed.subscribers) > 0 for feed in self.feeds.values())
@@ -0,0 +1,262 @@
+import logging
+import os
+import typing
+
+import numpy as np
+
+if typing.TYPE_CHECKING:
+    from candle_feed import CandleFeed
+
+logger = logging.getLogger()
+
+# File layout: a 128 bytes header, then the 6 columns one after the other, each with room for `capacity` values.
+# timestamp is int64 (Unix milliseconds, candle open), the prices and the volume are float64, all little-endian.
+CANDLE_FILE_MAGIC = b"TKCANDLE"
+CANDLE_FILE_VERSION = 1
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("reserved", "<u4"), ("count", "<i8"),
+                         ("capacity", "<i8"), ("exchange", "S16"), ("symbol", "S24"), ("timeframe", "S8")])
+
+COLUMN_DTYPES = {"timestamp": np.dtype("<i8"), "open": np.dtype("<f8"), "high": np.dtype("<f8"),
+                 "low": np.dtype("<f8"), "close": np.dtype("<f8"), "volume": np.dtype("<f8")}
+
+# Candles a new file has room for, the capacity doubles when it is full (about a month and a half of 1m candles)
+DEFAULT_FILE_CAPACITY = 1 << 16
+
+
+def _map(path: str, mode: str) -> typing.Tuple[np.memmap, np.ndarray]:
+    mm = np.memmap(path, dtype=np.uint8, mode=mode)
+    header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=mm, offset=0)
+
+    if header["magic"][0] != CANDLE_FILE_MAGIC:
+        raise ValueError("%s is not a candle file" % path)
+    if header["version"][0] != CANDLE_FILE_VERSION:
+        raise ValueError("%s: unsupported candle file version %s" % (path, header["version"][0]))
+
+    return mm, header
+
+
+def _columns(mm: np.memmap, capacity: int, length: int) -> typing.Dict[str, np.ndarray]:
+
+    # Arrays over the memory map, nothing is copied
+
+    return {col: np.ndarray((length,), dtype=dtype, buffer=mm, offset=HEADER_SIZE + i * capacity * 8)
+            for i, (col, dtype) in enumerate(COLUMN_DTYPES.items())}
+
+
+def _create(path: str, capacity: int, exchange: str, symbol: str, timeframe: str):
+    with open(path, "wb") as f:
+        f.truncate(HEADER_SIZE + capacity * 8 * len(COLUMN_DTYPES))
+
+    mm = np.memmap(path, dtype=np.uint8, mode="r+")
+    header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=mm, offset=0)
+    header[0] = (CANDLE_FILE_MAGIC, CANDLE_FILE_VERSION, 0, 0, capacity, exchange.encode(), symbol.encode(),
+                 timeframe.encode())
+    mm.flush()
+    del header, mm
+
+
+class CandleFile:
+    def __init__(self, path: str, start_time: typing.Optional[int] = None, end_time: typing.Optional[int] = None):
+
+        # Read-only view of a candle file, mapped with numpy.memmap: the columns are read from the page cache,
+        # several processes opening the same file share the same memory and nothing is copied.
+        # start_time, end_time: only the candles opened in this range (binary search on the timestamps)
+        # The candles appended after the file was opened are not seen, see refresh().
+        # On Windows an open CandleFile keeps the writer from growing the file, see CandleFileWriter._grow().
+
+        self.path = path
+        self.start_time = start_time
+        self.end_time = end_time
+
+        self._mm, header = _map(path, "r")
+
+        self.exchange = header["exchange"][0].decode()
+        self.symbol = header["symbol"][0].decode()
+        self.timeframe = header["timeframe"][0].decode()
+
+        self._all = _columns(self._mm, int(header["capacity"][0]), int(header["count"][0]))
+
+        timestamps = self._all["timestamp"]
+        self.start = int(np.searchsorted(timestamps, start_time, side="left")) if start_time is not None else 0
+        self.stop = int(np.searchsorted(timestamps, end_time, side="right")) if end_time is not None \
+            else len(timestamps)
+
+        self.columns = {col: values[self.start:self.stop] for col, values in self._all.items()}
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def range(self, start_time: typing.Optional[int] = None,
+              end_time: typing.Optional[int] = None) -> typing.Dict[str, np.ndarray]:
+
+        # Columns of the candles opened from start_time to end_time (both included), views of the file
+
+        timestamps = self.columns["timestamp"]
+        start = np.searchsorted(timestamps, start_time, side="left") if start_time is not None else 0
+        stop = np.searchsorted(timestamps, end_time, side="right") if end_time is not None else len(timestamps)
+
+        return {col: values[start:stop] for col, values in self.columns.items()}
+
+    def refresh(self) -> "CandleFile":
+
+        # Same view reopened, with the candles appended since (the writer may also have moved the file)
+
+        return CandleFile(self.path, self.start_time, self.end_time)
+
+
+class CandleFileWriter:
+    def __init__(self, path: str, exchange: str = "", symbol: str = "", timeframe: str = "1m",
+                 capacity: int = DEFAULT_FILE_CAPACITY):
+
+        # Appends candles to a candle file, created if it does not exist. The candles are only added at the end:
+        # a candle with the timestamp of the last one replaces it (the candle in progress of a live feed),
+        # an older candle is rejected. The count in the header is updated after the values, so a reader opening
+        # the file meanwhile never sees a partly written candle.
+
+        self.path = path
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            _create(path, capacity, exchange, symbol, timeframe)
+
+        self._open()
+
+    def _open(self):
+        self._mm, self._header = _map(self.path, "r+")
+        self.capacity = int(self._header["capacity"][0])
+        self._columns = _columns(self._mm, self.capacity, self.capacity)
+
+    def __len__(self) -> int:
+        return int(self._header["count"][0])
+
+    @property
+    def last_timestamp(self) -> typing.Optional[int]:
+        count = len(self)
+        return int(self._columns["timestamp"][count - 1]) if count > 0 else None
+
+    def _grow(self, min_capacity: int):
+
+        # The columns are copied into a new file with twice the capacity, which then replaces the old one.
+        # On POSIX systems the readers that mapped the old file keep reading it (refresh() maps the new one).
+        # Windows does not replace a file that is mapped: the growth then needs no CandleFile open on the file
+        # (parameter sweep workers included), else it raises an OSError and the old file is kept as it was.
+        # Give the writer the capacity of the whole download to never grow a file that is being read.
+
+        capacity = self.capacity
+        while capacity < min_capacity:
+            capacity *= 2
+
+        count = len(self)
+        h = self._header[0]
+        tmp_path = self.path + ".tmp"
+
+        _create(tmp_path, capacity, h["exchange"].decode(), h["symbol"].decode(), h["timeframe"].decode())
+        tmp_mm, tmp_header = _map(tmp_path, "r+")
+
+        for col, values in _columns(tmp_mm, capacity, count).items():
+            values[:] = self._columns[col][:count]
+
+        tmp_header["count"] = count
+        tmp_mm.flush()
+        del tmp_mm, tmp_header
+
+        self.close()
+
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            os.remove(tmp_path)
+            self._open()
+            raise OSError("%s: candle file full (%s candles) and it could not be grown, is it open by a reader? %s"
+                          % (self.path, count, e)) from e
+
+        self._open()
+
+        logger.info("%s: candle file capacity increased to %s candles", self.path, capacity)
+
+    def append(self, timestamp: int, open_price: float, high: float, low: float, close: float, volume: float):
+        count = len(self)
+        last = self.last_timestamp
+
+        if last is not None and timestamp < last:
+            raise ValueError("%s: candle %s is older than the last candle %s" % (self.path, timestamp, last))
+
+        pos = count - 1 if timestamp == last else count
+
+        if pos >= self.capacity:
+            self._grow(pos + 1)
+
+        for col, value in zip(COLUMN_DTYPES, (timestamp, open_price, high, low, close, volume)):
+            self._columns[col][pos] = value
+
+        self._header["count"] = pos + 1
+
+    def extend(self, columns: typing.Dict[str, typing.Sequence]):
+
+        # Appends many candles at once: columns maps each column name to its values, the timestamps increasing
+
+        timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+        if len(timestamps) == 0:
+            return
+
+        if np.any(np.diff(timestamps) <= 0):
+            raise ValueError("%s: the timestamps must be increasing" % self.path)
+
+        count = len(self)
+        last = self.last_timestamp
+
+        if last is not None and timestamps[0] < last:
+            raise ValueError("%s: candle %s is older than the last candle %s" % (self.path, timestamps[0], last))
+
+        start = count - 1 if timestamps[0] == last else count
+        stop = start + len(timestamps)
+
+        if stop > self.capacity:
+            self._grow(stop)
+
+        for col, dtype in COLUMN_DTYPES.items():
+            self._columns[col][start:stop] = np.asarray(columns[col], dtype=dtype)
+
+        self._header["count"] = stop
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        self._mm.flush()
+        del self._columns, self._header, self._mm
+
+
+class CandleFeedWriter:
+    def __init__(self, feed: "CandleFeed", writer: CandleFileWriter):
+
+        # Records a live feed: subscribed to the feed like a strategy, it appends the candles to the file as they
+        # are closed (the candle in progress is written when the next one starts).
+
+        self.feed = feed
+        self.writer = writer
+
+        feed.subscribe(self)
+
+    def on_feed_update(self, tick_type: str):
+        if tick_type != "new_candle":
+            return
+
+        candles = self.feed.candles
+        timestamps = candles.timestamps
+
+        last = self.writer.last_timestamp
+        start = int(np.searchsorted(timestamps, last, side="right")) if last is not None else 0
+        stop = len(timestamps) - 1  # The last candle has just started
+
+        if stop > start:
+            self.writer.extend({"timestamp": timestamps[start:stop], "open": candles.opens[start:stop],
+                                "high": candles.highs[start:stop], "low": candles.lows[start:stop],
+                                "close": candles.closes[start:stop], "volume": candles.volumes[start:stop]})
+
+    def stop(self):
+        self.feed.unsubscribe(self)
+        self.writer.flush()
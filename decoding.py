@@ -0,0 +1,104 @@
+import datetime
+import functools
+import json
+import typing
+
+import dateutil.parser
+
+try:
+    import orjson  # Optional, several times faster than the json module
+except ImportError:
+    orjson = None
+
+# Default JSON parser of the decoders: orjson when it is installed, the json module otherwise
+default_loads = orjson.loads if orjson is not None else json.loads
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+class AggTrade(typing.NamedTuple):
+    symbol: str
+    price: float
+    quantity: float
+    timestamp: int  # Unix timestamp in milliseconds
+
+
+class BookTicker(typing.NamedTuple):
+    symbol: str
+    bid: float
+    ask: float
+
+
+class BitmexTrade(typing.NamedTuple):
+    symbol: str
+    price: float
+    size: float
+    timestamp: int  # Unix timestamp in milliseconds
+
+
+@functools.lru_cache(maxsize=16)
+def _day_milliseconds(date: str) -> int:
+    return (datetime.date(int(date[0:4]), int(date[5:7]), int(date[8:10])).toordinal() - _EPOCH_ORDINAL) * 86400000
+
+
+def parse_bitmex_timestamp(timestamp: str) -> int:
+
+    # Unix timestamp in milliseconds of a Bitmex timestamp like "2022-05-01T12:34:56.789Z".
+    # The format is fixed, so the fields are read at their position (the date part is cached),
+    # other formats go through dateutil.
+
+    if len(timestamp) == 24 and timestamp[10] == "T" and timestamp[19] == "." and timestamp[23] == "Z":
+        return (_day_milliseconds(timestamp[:10]) + int(timestamp[11:13]) * 3600000 + int(timestamp[14:16]) * 60000
+                + int(timestamp[17:19]) * 1000 + int(timestamp[20:23]))
+
+    return int(dateutil.parser.isoparse(timestamp).timestamp() * 1000)
+
+
+def format_bitmex_timestamp(timestamp: int) -> str:
+
+    # Bitmex timestamp like "2022-05-01T12:34:56.789Z" of a Unix timestamp in milliseconds, for the REST filters
+
+    dt = datetime.datetime.fromtimestamp(timestamp // 1000, datetime.timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + "%03dZ" % (timestamp % 1000)
+
+
+class BinanceDecoder:
+    def __init__(self, loads: typing.Optional[typing.Callable] = None):
+
+        # Decodes the websocket messages of Binance: aggTrade and bookTicker messages become AggTrade / BookTicker
+        # records with the numbers already converted, any other message is returned as a dictionary.
+        # loads: JSON parser, default_loads by default
+
+        self.loads = loads if loads is not None else default_loads
+
+    def decode(self, message: typing.Union[str, bytes]):
+        data = self.loads(message)
+
+        event = data.get('e')
+
+        if event == "aggTrade":
+            return AggTrade(data['s'], float(data['p']), float(data['q']), data['T'])
+
+        if event == "bookTicker" or ("u" in data and "A" in data):  # The spot bookTicker has no event type
+            return BookTicker(data['s'], float(data['b']), float(data['a']))
+
+        return data
+
+
+class BitmexDecoder:
+    def __init__(self, loads: typing.Optional[typing.Callable] = None):
+
+        # Decodes the websocket messages of Bitmex into dictionaries, the rows of the trade table become
+        # BitmexTrade records with the timestamp already parsed.
+        # loads: JSON parser, default_loads by default
+
+        self.loads = loads if loads is not None else default_loads
+
+    def decode(self, message: typing.Union[str, bytes]) -> typing.Dict:
+        data = self.loads(message)
+
+        if data.get('table') == "trade":
+            data['data'] = [BitmexTrade(d['symbol'], float(d['price']), float(d['size']),
+                                        parse_bitmex_timestamp(d['timestamp'])) for d in data['data']]
+
+        return data
@@ -0,0 +1,350 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_feed import TFRAME_EQUIV
+from candle_file import DEFAULT_FILE_CAPACITY, CandleFileWriter
+from exchanges.binance import BinanceClient
+from exchanges.bitmex import BitmexClient
+from models import BITMEX_TF_MINUTES, Candle, ExchangeContract, candle_factory, contract_factory
+from transport import Transport
+
+logger = logging.getLogger()
+
+# Request weight allowed per minute and weight of one request of each exchange. Binance counts 2400 per minute
+# and 5 per /fapi/v1/klines request of 1000 candles, Bitmex 30 requests per minute without an API key.
+# Only RATE_LIMIT_USAGE of it is used, the GUI or a running bot may share the same IP address.
+RATE_LIMITS = {"binance": (2400, 5), "bitmex": (30, 1)}
+RATE_LIMIT_USAGE = 0.8
+
+DEFAULT_WORKERS = 4
+
+# A failed request is sent again up to DOWNLOAD_RETRIES times, after RETRY_DELAY seconds doubled at every attempt
+DOWNLOAD_RETRIES = 5
+RETRY_DELAY = 1.0
+
+
+class HistoryRequestError(Exception):
+    pass
+
+
+class RateLimiter:
+    def __init__(self, weight_per_minute: float):
+
+        # Token bucket shared by the download threads of an exchange: acquire() waits until the weight of the next
+        # request is available
+
+        self.capacity = weight_per_minute
+        self._rate = weight_per_minute / 60
+        self._tokens = weight_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: float = 1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+
+                wait = (weight - self._tokens) / self._rate
+
+            time.sleep(wait)
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+
+        # Next candle to request for each download, saved to a JSON file after every page so an interrupted
+        # download resumes where it stopped
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self._positions: typing.Dict[str, int] = json.load(f)
+        else:
+            self._positions = dict()
+
+    def get(self, key: str) -> typing.Optional[int]:
+        with self._lock:
+            return self._positions.get(key)
+
+    def set(self, key: str, next_time: int):
+        with self._lock:
+            self._positions[key] = next_time
+
+            # Written to another file first, an interruption never leaves a truncated checkpoint
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._positions, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class _RaisingRequests:
+
+    # The clients log the errors of _send_trade_request() and return None, which _historical_data() turns into
+    # an empty list like the end of the history. The download clients raise instead, see Downloader._request().
+
+    def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict):
+        response = super()._send_trade_request(request_type, endpoint, data)
+
+        if response is None:
+            raise HistoryRequestError("%s request to %s failed" % (request_type, endpoint))
+
+        return response
+
+
+class BinanceHistory(_RaisingRequests, BinanceClient):
+    def __init__(self, testnet: bool = False, base_url: typing.Optional[str] = None):
+
+        # BinanceClient with only what get_cryptos() and _historical_data() need: no API keys, no websocket,
+        # no account requests
+
+        self.platform = "binance_futures"
+        self.testnet = testnet
+        self.futures_client = True
+
+        if base_url is None:
+            base_url = "https://testnet.binancefuture.com" if testnet else "https://fapi.binance.com"
+
+        self._base_url = base_url
+        self.transport = Transport(base_url, pool_size=DEFAULT_WORKERS * 2)
+
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+
+
+class BitmexHistory(_RaisingRequests, BitmexClient):
+    def __init__(self, testnet: bool = False, base_url: typing.Optional[str] = None):
+
+        # Same for BitmexClient, without API keys its requests are sent unsigned
+
+        self.platform = "bitmex"
+        self.testnet = testnet
+        self.futures = True
+
+        if base_url is None:
+            base_url = "https://testnet.bitmex.com" if testnet else "https://www.bitmex.com"
+
+        self._base_url = base_url
+        self.transport = Transport(base_url, pool_size=DEFAULT_WORKERS * 2)
+
+        self.public_key_bitmex = ""
+        self.secret_key_bitmex = ""
+
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+
+
+HISTORY_CLIENTS = {"binance": BinanceHistory, "bitmex": BitmexHistory}
+
+
+class Downloader:
+    def __init__(self, exchange: str, output_dir: str, checkpoint_path: typing.Optional[str] = None,
+                 testnet: bool = False, base_url: typing.Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                 rate_limit_usage: float = RATE_LIMIT_USAGE, retries: int = DOWNLOAD_RETRIES,
+                 retry_delay: float = RETRY_DELAY):
+
+        # Downloads the candles of several symbols and timeframes into candle files (see candle_file.py), one file
+        # per symbol and timeframe, with the _historical_data() method of the exchange client.
+        # Each symbol/timeframe is paginated in order by its own thread, all the threads share the rate limit.
+
+        self.exchange = exchange
+        self.output_dir = output_dir
+        self.workers = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.client: typing.Union[BinanceHistory, BitmexHistory] = HISTORY_CLIENTS[exchange](testnet, base_url)
+
+        weight_per_minute, self._request_weight = RATE_LIMITS[exchange]
+        self.limiter = RateLimiter(weight_per_minute * rate_limit_usage)
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.checkpoint = Checkpoint(checkpoint_path or os.path.join(output_dir, "checkpoint.json"))
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.output_dir, "%s_%s_%s.candles" % (self.client.platform, symbol, timeframe))
+
+    def _request(self, function: typing.Callable, *args):
+
+        # Calls a request method of the client, again with an exponential backoff when it raises
+        # HistoryRequestError, the last error is raised once the retries are exhausted
+
+        delay = self.retry_delay
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(self._request_weight)
+
+            try:
+                return function(*args)
+            except HistoryRequestError as e:
+                if attempt == self.retries:
+                    raise
+
+                logger.warning("%s, retrying in %ss", e, delay)
+                time.sleep(delay)
+                delay *= 2
+
+    def _fetch(self, contract: ExchangeContract, timeframe: str, start_time: int, end_time: int) -> typing.List[Candle]:
+        return self._request(self.client._historical_data, contract, timeframe, start_time, end_time)
+
+    def download(self, contract: ExchangeContract, timeframe: str, start_time: int, end_time: int) -> int:
+
+        # Candles opened from start_time to end_time, from the checkpoint if this download was interrupted.
+        # Returns the number of candles written, raises HistoryRequestError when a request keeps failing: the
+        # checkpoint holds the candles written so far and the next download resumes from there.
+
+        key = "%s %s %s" % (self.client.platform, contract.symbol, timeframe)
+        interval = TFRAME_EQUIV[timeframe] * 1000
+
+        # A new file has room for the whole range, it is not grown while a backtest may be reading it
+        capacity = max(DEFAULT_FILE_CAPACITY, (end_time - start_time) // interval + 1)
+        writer = CandleFileWriter(self.path(contract.symbol, timeframe), self.client.platform, contract.symbol,
+                                  timeframe, capacity)
+
+        # The files are append-only: a download never goes back before the candles already written
+        next_time = max(start_time, self.checkpoint.get(key) or start_time, writer.last_timestamp or start_time)
+        written = 0
+
+        if next_time > start_time:
+            logger.info("%s: resuming from %s", key, next_time)
+
+        try:
+            while next_time <= end_time:
+                candles = self._fetch(contract, timeframe, next_time, end_time)
+
+                if len(candles) == 0:
+                    break
+
+                last = writer.last_timestamp
+                candles = [c for c in candles if last is None or c.timestamp >= last]
+
+                if len(candles) > 0:
+                    writer.extend({"timestamp": [c.timestamp for c in candles], "open": [c.open for c in candles],
+                                   "high": [c.high for c in candles], "low": [c.low for c in candles],
+                                   "close": [c.close for c in candles], "volume": [c.volume for c in candles]})
+                    writer.flush()
+                    written += len(candles)
+
+                    next_time = max(next_time, candles[-1].timestamp + interval)
+                else:
+                    next_time += interval
+
+                # The candle in progress is requested again by the next download
+                if next_time > time.time() * 1000:
+                    self.checkpoint.set(key, next_time - interval)
+                else:
+                    self.checkpoint.set(key, next_time)
+        except HistoryRequestError:
+            logger.error("%s: download failed after %s candles written", key, written)
+            raise
+        finally:
+            total = len(writer)
+            writer.close()
+
+        logger.info("%s: %s candles written, %s in the file", key, written, total)
+
+        return written
+
+    def run(self, symbols: typing.List[str], timeframes: typing.List[str], start_time: int,
+            end_time: int) -> typing.Dict[typing.Tuple[str, str], typing.Optional[int]]:
+
+        # All the symbols and timeframes concurrently, returns the candles written for each of them, None for the
+        # downloads that failed (see download())
+
+        contracts = self._request(self.client.get_cryptos)
+
+        for symbol in symbols:
+            if symbol not in contracts:
+                logger.error("%s: unknown symbol %s", self.exchange, symbol)
+
+        if self.exchange == "bitmex":
+            for timeframe in timeframes:
+                if timeframe not in BITMEX_TF_MINUTES:
+                    logger.error("Bitmex has no %s candles", timeframe)
+
+        jobs = [(contracts[s], tf) for s in symbols for tf in timeframes
+                if s in contracts and tf in TFRAME_EQUIV and (self.exchange != "bitmex" or tf in BITMEX_TF_MINUTES)]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="download") as executor:
+            futures = {(contract.symbol, timeframe): executor.submit(self.download, contract, timeframe, start_time,
+                                                                     end_time)
+                       for contract, timeframe in jobs}
+
+        results = dict()
+
+        for job, future in futures.items():
+            try:
+                results[job] = future.result()
+            except HistoryRequestError:
+                results[job] = None
+
+        return results
+
+
+def _timestamp(date: str) -> int:
+
+    # "2022-01-31" or "2022-01-31T12:00" (UTC) to Unix milliseconds
+
+    dt = datetime.datetime.fromisoformat(date)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+
+    # Exit status 1 when a download failed or the symbols could not be requested
+
+    parser = argparse.ArgumentParser(description="Download the candle history of symbols into candle files")
+    parser.add_argument("--exchange", choices=sorted(HISTORY_CLIENTS), default="binance")
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--timeframes", nargs="+", default=["1m"], choices=list(TFRAME_EQUIV))
+    parser.add_argument("--start", required=True, help="UTC date, 2022-01-31 or 2022-01-31T12:00")
+    parser.add_argument("--end", help="UTC date, now by default")
+    parser.add_argument("--output-dir", default="candles")
+    parser.add_argument("--checkpoint", help="JSON file, <output-dir>/checkpoint.json by default")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--testnet", action="store_true")
+    parser.add_argument("--base-url", help="Other REST server, a local stub for example")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s :: %(message)s")
+
+    end_time = _timestamp(args.end) if args.end is not None else int(time.time() * 1000)
+
+    downloader = Downloader(args.exchange, args.output_dir, args.checkpoint, args.testnet, args.base_url,
+                            args.workers)
+
+    try:
+        results = downloader.run(args.symbols, args.timeframes, _timestamp(args.start), end_time)
+    except HistoryRequestError as e:
+        logger.error("%s: %s", args.exchange, e)
+        return 1
+
+    for (symbol, timeframe), written in sorted(results.items()):
+        if written is None:
+            print("%s %s: failed" % (symbol, timeframe))
+        else:
+            print("%s %s: %s candles" % (symbol, timeframe, written))
+
+    return 1 if None in results.values() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
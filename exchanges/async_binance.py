@@ -0,0 +1,267 @@
+import asyncio
+import collections
+import hashlib
+import hmac
+import logging
+import time
+import typing
+
+from urllib.parse import urlencode
+
+from models import *
+from decoding import AggTrade, BinanceDecoder, BookTicker
+from candle_cache import CandleCache
+from exchanges.async_client import AsyncExchangeClient
+
+logger = logging.getLogger()
+
+
+class AsyncBinanceClient(AsyncExchangeClient):
+    def __init__(self, public_key: str, secret_key: str, testnet: bool, futures: bool,
+                 base_url: typing.Optional[str] = None, wss_url: typing.Optional[str] = None,
+                 strategy_workers: typing.Optional[int] = None, candle_cache: typing.Optional[CandleCache] = None):
+
+        # asyncio version of BinanceClient (exchanges/binance.py), same methods as coroutines.
+        # Use SyncClient(AsyncBinanceClient(...)) for the blocking API.
+
+        if testnet:
+            default_base_url = "https://testnet.binancefuture.com"
+            default_wss_url = "wss://stream.binancefuture.com/web_s"
+        else:
+            default_base_url = "https://fapi.binance.com"
+            default_wss_url = "wss://fstream.binance.com/web_s"
+
+        super().__init__("Binance", base_url or default_base_url, wss_url or default_wss_url, strategy_workers,
+                         candle_cache)
+
+        self.futures_client = futures
+        self.testnet = testnet
+        self.platform = "binance_futures"
+
+        self.public_key_binance = public_key
+        self.secret_key_binance = secret_key
+        self._headers = {'X-MBX-APIKEY': self.public_key_binance}
+
+        self.crypto_prices = dict()
+        self._decoder = BinanceDecoder()
+
+        # Model constructors of the exchange, chosen once (see models.py)
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+        self._order_status = order_status_factory(self.platform)
+        self._balance = balance_factory(self.platform)
+
+        self._websocket_id = 1
+        self.ws_subscriptions = {"bookTicker": [], "aggTrade": []}
+
+    def _generate_signature(self, data: typing.Dict) -> str:
+        return hmac.new(self.secret_key_binance.encode(), urlencode(data).encode(), hashlib.sha256).hexdigest()
+
+    async def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict, headers=None):
+        return await super()._send_trade_request(request_type, endpoint, data, self._headers)
+
+    async def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
+        exchange_info = await self._send_trade_request("GET", "/fapi/v1/exchangeInfo", dict())
+
+        contracts = dict()
+
+        if exchange_info is not None:
+            for contract_data in exchange_info['symbols']:
+                contracts[contract_data['symbol']] = self._contract(contract_data)
+
+        return collections.OrderedDict(sorted(contracts.items()))
+
+    async def bid_ask_price(self, contract: ExchangeContract) -> typing.Dict[str, float]:
+        obd = await self._send_trade_request("GET", "/fapi/v1/ticker/bookTicker", {'symbol': contract.symbol})
+
+        if obd is not None:
+            self.crypto_prices[contract.symbol] = {'bid': float(obd['bidPrice']), 'ask': float(obd['askPrice'])}
+
+            return self.crypto_prices[contract.symbol]
+
+    async def _historical_data(self, contract: ExchangeContract, interval: str,
+                               start_time: typing.Optional[int] = None,
+                               end_time: typing.Optional[int] = None) -> typing.List[Candle]:
+        ghcd = {'symbol': contract.symbol, 'interval': interval, 'limit': HISTORY_CANDLES[self.platform]}
+
+        if start_time is not None:
+            ghcd['startTime'] = start_time
+        if end_time is not None:
+            ghcd['endTime'] = end_time
+
+        raw_candles = await self._send_trade_request("GET", "/fapi/v1/klines", ghcd)
+
+        crypto_candles = []
+
+        if raw_candles is not None:
+            for c in raw_candles:
+                crypto_candles.append(self._candle(c, interval))
+
+        return crypto_candles
+
+    async def user_balance(self) -> typing.Dict[str, Balance]:
+        gbd = dict()
+        gbd['timestamp'] = int(time.time() * 1000)
+        gbd['signature'] = self._generate_signature(gbd)
+
+        balances = dict()
+
+        account_data = await self._send_trade_request("GET", "/fapi/v1/account", gbd)
+
+        if account_data is not None:
+            for a in account_data['assets' if self.futures_client else 'balances']:
+                balances[a['asset']] = self._balance(a)
+
+        return balances
+
+    async def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: float,
+                                        side: str, price=None, tif=None) -> OrderStatus:
+        ctd = dict()
+        ctd['symbol'] = contract.symbol
+        ctd['side'] = side.upper()
+        ctd['quantity'] = round(int(quantity / contract.lot_size) * contract.lot_size, 8)
+        ctd['type'] = order_type.upper()
+
+        if price is not None:
+            ctd['price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
+            ctd['price'] = '%.*f' % (contract.price_decimals, ctd['price'])
+
+        if tif is not None:
+            ctd['timeInForce'] = tif
+
+        ctd['timestamp'] = int(time.time() * 1000)
+        ctd['signature'] = self._generate_signature(ctd)
+
+        trade_order_status = await self._send_trade_request("POST", "/fapi/v1/order", ctd)
+
+        if trade_order_status is not None:
+            trade_order_status = self._order_status(trade_order_status)
+
+        return trade_order_status
+
+    async def cancel_order(self, contract: ExchangeContract, order_id: int) -> OrderStatus:
+        cod = dict()
+        cod['orderId'] = order_id
+        cod['symbol'] = contract.symbol
+        cod['timestamp'] = int(time.time() * 1000)
+        cod['signature'] = self._generate_signature(cod)
+
+        trade_state = await self._send_trade_request("DELETE", "/fapi/v1/order", cod)
+
+        if trade_state is not None:
+            trade_state = self._order_status(trade_state)
+
+        return trade_state
+
+    async def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
+
+        # The cache may request the balances if they are stale, so it is read from the helper executor
+
+        balance = await self.loop.run_in_executor(self.helper_executor, self.balance_cache.get, contract.quote_currency)
+
+        if balance is None:
+            return None
+
+        trade_size = (balance.wallet_balance * balance_pct / 100) / price
+
+        trade_size = round(round(trade_size / contract.lot_size) * contract.lot_size, 8)
+
+        logger.info("Binance current %s balance = %s, trade size = %s", contract.quote_currency,
+                    balance.wallet_balance, trade_size)
+
+        return trade_size
+
+    async def get_order_status(self, contract: ExchangeContract, order_id: int) -> OrderStatus:
+        trade_d = dict()
+        trade_d['timestamp'] = int(time.time() * 1000)
+        trade_d['symbol'] = contract.symbol
+        trade_d['orderId'] = order_id
+        trade_d['signature'] = self._generate_signature(trade_d)
+
+        trade_order = await self._send_trade_request("GET", "/fapi/v1/order", trade_d)
+
+        if trade_order is not None:
+            trade_order = self._order_status(trade_order)
+
+        return trade_order
+
+    async def get_orders_status(self, contract: ExchangeContract,
+                                order_ids: typing.List[int]) -> typing.Optional[typing.Dict[int, OrderStatus]]:
+
+        # Same as BinanceClient.get_orders_status(), the finished orders are requested concurrently
+
+        ood = dict()
+        ood['timestamp'] = int(time.time() * 1000)
+        ood['symbol'] = contract.symbol
+        ood['signature'] = self._generate_signature(ood)
+
+        open_orders = await self._send_trade_request("GET", "/fapi/v1/openOrders", ood)
+
+        if open_orders is None:
+            return None
+
+        orders_status = {order['orderId']: self._order_status(order) for order in open_orders
+                         if order['orderId'] in order_ids}
+
+        missing = [order_id for order_id in order_ids if order_id not in orders_status]
+        results = await asyncio.gather(*(self.get_order_status(contract, order_id) for order_id in missing))
+
+        for order_id, trade_order in zip(missing, results):
+            if trade_order is not None:
+                orders_status[order_id] = trade_order
+
+        return orders_status
+
+    async def _on_open(self):
+        for channel in ["bookTicker", "aggTrade"]:
+            symbols = self.ws_subscriptions[channel]
+            if len(symbols) > 0:
+                await self.subscribe_channel([self.contracts[s] for s in symbols], channel, reconnection=True)
+
+        if "BTCUSDT" in self.contracts and "BTCUSDT" not in self.ws_subscriptions["bookTicker"]:
+            await self.subscribe_channel([self.contracts["BTCUSDT"]], "bookTicker")
+
+    def _on_message(self, message_data: typing.Union[AggTrade, BookTicker, typing.Dict]):
+
+        # Runs on the event loop: only updates prices and candles, the strategies run in their own tasks
+
+        if type(message_data) is BookTicker:
+            crypto = message_data.symbol
+
+            self.crypto_prices[crypto] = {'bid': message_data.bid, 'ask': message_data.ask}
+
+            for strat in self._strategies_by_symbol.get(crypto, ()):
+                for trade in strat.trigger_book.trades:
+                    if trade.side == "long":
+                        trade.profitloss = (message_data.bid - trade.entry_price) * trade.quantity
+                    elif trade.side == "short":
+                        trade.profitloss = (trade.entry_price - message_data.ask) * trade.quantity
+
+        elif type(message_data) is AggTrade:
+            symbol_feeds = self._symbol_feeds.get(message_data.symbol)
+
+            if symbol_feeds is not None:
+                symbol_feeds.on_trade(message_data.price, message_data.quantity, message_data.timestamp)
+
+    async def subscribe_channel(self, contracts: typing.List[ExchangeContract], channel: str, reconnection=False):
+
+        # A single message subscribes all the symbols, hundreds of them are read by the same event loop
+
+        csd = dict()
+        csd['method'] = "SUBSCRIBE"
+        csd['params'] = []
+
+        for contract in contracts:
+            if contract.symbol not in self.ws_subscriptions[channel] or reconnection:
+                csd['params'].append(contract.symbol.lower() + "@" + channel)
+                if contract.symbol not in self.ws_subscriptions[channel]:
+                    self.ws_subscriptions[channel].append(contract.symbol)
+
+        if len(csd['params']) == 0 or not self.websocket_connection:
+            return
+
+        csd['id'] = self._websocket_id
+        self._websocket_id += 1
+
+        await self._send_ws(csd)
+        logger.info("Binance: subscribing to: %s", ','.join(csd['params']))
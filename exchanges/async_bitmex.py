@@ -0,0 +1,235 @@
+import collections
+import hashlib
+import hmac
+import json
+import logging
+import time
+import typing
+
+from urllib.parse import urlencode
+
+from models import *
+from candle_cache import CandleCache
+from decoding import BitmexDecoder, format_bitmex_timestamp
+from exchanges.async_client import AsyncExchangeClient
+
+logger = logging.getLogger()
+
+
+class AsyncBitmexClient(AsyncExchangeClient):
+    def __init__(self, public_key: str, secret_key: str, testnet: bool, base_url: typing.Optional[str] = None,
+                 wss_url: typing.Optional[str] = None, strategy_workers: typing.Optional[int] = None,
+                 candle_cache: typing.Optional[CandleCache] = None):
+
+        # asyncio version of BitmexClient (exchanges/bitmex.py), same methods as coroutines.
+        # Use SyncClient(AsyncBitmexClient(...)) for the blocking API.
+
+        if testnet:
+            default_base_url = "https://testnet.bitmex.com"
+            default_wss_url = "wss://testnet.bitmex.com/realtime"
+        else:
+            default_base_url = "https://www.bitmex.com"
+            default_wss_url = "wss://www.bitmex.com/realtime"
+
+        super().__init__("Bitmex", base_url or default_base_url, wss_url or default_wss_url, strategy_workers,
+                         candle_cache)
+
+        self.futures = True
+        self.testnet = testnet
+        self.platform = "bitmex"
+
+        self.public_key_bitmex = public_key
+        self.secret_key_bitmex = secret_key
+
+        self.prices = dict()
+        self._decoder = BitmexDecoder()
+
+        # Model constructors of the exchange, chosen once (see models.py)
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+        self._order_status = order_status_factory(self.platform)
+        self._balance = balance_factory(self.platform)
+
+    def _feed_arguments(self) -> typing.Dict:
+        return {**super()._feed_arguments(), "native_timeframes": BITMEX_TF_MINUTES.keys()}
+
+    def _generate_signature(self, method: str, endpoint: str, expires: str, data: typing.Dict) -> str:
+        message = method + endpoint + "?" + urlencode(data) + expires if len(data) > 0 else method + endpoint + expires
+        return hmac.new(self.secret_key_bitmex.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    async def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict, headers=None):
+        # Unsigned without API keys, like BitmexClient
+        headers = dict()
+        if self.public_key_bitmex:
+            expires = str(int(time.time()) + 5)
+            headers['api-key'] = self.public_key_bitmex
+            headers['api-expires'] = expires
+            headers['api-signature'] = self._generate_signature(request_type, endpoint, expires, data)
+
+        return await super()._send_trade_request(request_type, endpoint, data, headers)
+
+    async def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
+        instruments = await self._send_trade_request("GET", "/api/v1/instrument/active", dict())
+
+        contracts = dict()
+
+        if instruments is not None:
+            for s in instruments:
+                contracts[s['symbol']] = self._contract(s)
+
+        return collections.OrderedDict(sorted(contracts.items()))
+
+    async def user_balance(self) -> typing.Dict[str, Balance]:
+        balances = dict()
+
+        margin_data = await self._send_trade_request("GET", "/api/v1/user/margin", {'currency': "all"})
+
+        if margin_data is not None:
+            for a in margin_data:
+                balances[a['currency']] = self._balance(a)
+
+        return balances
+
+    async def _historical_data(self, contract: ExchangeContract, timeframe: str,
+                               start_time: typing.Optional[int] = None,
+                               end_time: typing.Optional[int] = None) -> typing.List[Candle]:
+        ghcd = dict()
+        ghcd['symbol'] = contract.symbol
+        ghcd['partial'] = True
+        ghcd['binSize'] = timeframe
+        ghcd['count'] = HISTORY_CANDLES[self.platform]
+        ghcd['reverse'] = start_time is None
+
+        # The bucket timestamps are the end of the candles
+        if start_time is not None:
+            ghcd['startTime'] = format_bitmex_timestamp(start_time + BITMEX_TF_MINUTES[timeframe] * 60000)
+        if end_time is not None:
+            ghcd['endTime'] = format_bitmex_timestamp(end_time + BITMEX_TF_MINUTES[timeframe] * 60000)
+
+        raw_candles = await self._send_trade_request("GET", "/api/v1/trade/bucketed", ghcd)
+
+        candles = []
+
+        if raw_candles is not None:
+            for c in (raw_candles if start_time is not None else reversed(raw_candles)):
+                if c['open'] is None or c['close'] is None:  # Some candles returned by Bitmex miss data
+                    continue
+                candles.append(self._candle(c, timeframe))
+
+        return candles
+
+    async def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: int, side: str,
+                                        price=None, tif=None) -> OrderStatus:
+        pod = dict()
+        pod['symbol'] = contract.symbol
+        pod['side'] = side.capitalize()
+        pod['orderQty'] = round(quantity / contract.lot_size) * contract.lot_size
+        pod['ordType'] = order_type.capitalize()
+
+        if price is not None:
+            pod['price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
+
+        if tif is not None:
+            pod['timeInForce'] = tif
+
+        order_status = await self._send_trade_request("POST", "/api/v1/order", pod)
+
+        if order_status is not None:
+            order_status = self._order_status(order_status)
+
+        return order_status
+
+    async def cancel_order(self, order_id: str) -> OrderStatus:
+        order_status = await self._send_trade_request("DELETE", "/api/v1/order", {'orderID': order_id})
+
+        if order_status is not None:
+            order_status = self._order_status(order_status[0])
+
+        return order_status
+
+    async def get_orders_status(self, contract: ExchangeContract,
+                                order_ids: typing.List[str]) -> typing.Optional[typing.Dict[str, OrderStatus]]:
+        gosd = dict()
+        gosd['symbol'] = contract.symbol
+        gosd['filter'] = json.dumps({"orderID": list(order_ids)})
+        gosd['count'] = len(order_ids)
+
+        orders = await self._send_trade_request("GET", "/api/v1/order", gosd)
+
+        if orders is None:
+            return None
+
+        return {order['orderID']: self._order_status(order) for order in orders}
+
+    async def get_order_status(self, contract: ExchangeContract, order_id: str) -> OrderStatus:
+        orders_status = await self.get_orders_status(contract, [order_id])
+
+        if orders_status is not None:
+            return orders_status.get(order_id)
+
+    async def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
+
+        # The cache may request the balances if they are stale, so it is read from the helper executor
+
+        balance = await self.loop.run_in_executor(self.helper_executor, self.balance_cache.get, 'XBt')
+
+        if balance is None:
+            return None
+
+        xbt_size = balance.wallet_balance * balance_pct / 100
+
+        if contract.inverse:
+            contracts_number = xbt_size / (contract.multiplier / price)
+        else:
+            contracts_number = xbt_size / (contract.multiplier * price)
+
+        logger.info("Bitmex current XBT balance = %s, contracts number = %s", balance.wallet_balance,
+                    contracts_number)
+
+        return int(contracts_number)
+
+    async def _on_open(self):
+        await self.subscribe_channel("instrument")
+        await self.subscribe_channel("trade")
+
+    def _on_message(self, omd: typing.Dict):
+
+        # Runs on the event loop: only updates prices and candles, the strategies run in their own tasks
+
+        if "table" not in omd:
+            return
+
+        if omd['table'] == "instrument":
+            for d in omd['data']:
+                bx_symbol = d['symbol']
+
+                if bx_symbol not in self.prices:
+                    self.prices[bx_symbol] = {'bid': None, 'ask': None}
+
+                if 'bidPrice' in d:
+                    self.prices[bx_symbol]['bid'] = d['bidPrice']
+                if 'askPrice' in d:
+                    self.prices[bx_symbol]['ask'] = d['askPrice']
+
+                for bx_strategy in self._strategies_by_symbol.get(bx_symbol, ()):
+                    for trade in bx_strategy.trigger_book.trades:
+                        price = self.prices[bx_symbol]['bid' if trade.side == "long" else 'ask']
+                        if price is None:
+                            continue
+
+                        size = trade.contract.multiplier * trade.quantity * (1 if trade.side == "long" else -1)
+
+                        if trade.contract.inverse:
+                            trade.profitloss = (1 / trade.entry_price - 1 / price) * size
+                        else:
+                            trade.profitloss = (price - trade.entry_price) * size
+
+        elif omd['table'] == "trade":
+            for d in omd['data']:  # BitmexTrade records
+                symbol_feeds = self._symbol_feeds.get(d.symbol)
+
+                if symbol_feeds is not None:
+                    symbol_feeds.on_trade(d.price, d.size, d.timestamp)
+
+    async def subscribe_channel(self, topic: str):
+        await self._send_ws({"op": "subscribe", "args": [topic]})
@@ -0,0 +1,368 @@
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import types
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import aiohttp
+import yarl
+
+from models import *
+from balance_cache import BalanceCache
+from candle_cache import CandleCache
+from candle_feed import CandleFeed, MultiTimeframeFeed
+from order_tracker import OrderTracker
+
+if typing.TYPE_CHECKING:
+    from strategies import Strategy
+
+logger = logging.getLogger()
+
+# Connections kept open to the REST API of an exchange
+ASYNC_POOL_SIZE = 20
+
+
+class StrategyTask:
+    def __init__(self, strategy: "Strategy", executor: ThreadPoolExecutor):
+
+        # Runs a strategy as an asyncio task: the websocket reader is never blocked by an order request.
+        # The Take profit / Stop loss of the open trades are checked on the event loop at every trade, like the
+        # threaded clients do, only their exit orders are placed from the executor.
+        # The signals are computed in the executor with the feed lock held, the loop does not write the candles
+        # while they are read, and the entry orders are placed once the lock is released.
+        # Updates received while the strategy is busy are merged, a new candle is never lost.
+
+        self.strategy = strategy
+        self._executor = executor
+
+        self._new_candle = False
+        self._exits: typing.List[typing.Tuple[Trade, bool, float]] = []
+        self._event = asyncio.Event()
+
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def on_feed_update(self, tick_type: str):
+
+        # Called by the feed on the event loop, after every trade
+
+        if tick_type == "new_candle":
+            self._new_candle = True
+        else:
+            price = float(self.strategy.candles.closes[-1])
+
+            # Removed from the trigger book until the exit order is placed, so a trade is only closed once
+            for trade, trigger in self.strategy.trigger_book.check(price):
+                self.strategy.trigger_book.remove(trade)
+                self._exits.append((trade, trigger == "stop_loss", price))
+
+        self._event.set()
+
+    def _update(self, tick_type: str, exits: typing.List[typing.Tuple[Trade, bool, float]]):
+
+        # Runs in the executor
+
+        strategy = self.strategy
+
+        for trade, stop_loss_triggered, price in exits:
+            try:
+                strategy._close_trade(trade, stop_loss_triggered, price)
+            finally:
+                if trade.status != "closed":  # The exit order failed, the triggers are checked again
+                    strategy._register_trade(trade)
+
+        with strategy.feed.lock:
+            signal_result = strategy._signal(tick_type)
+            price = float(strategy.candles.closes[-1])
+
+        if signal_result in [1, -1]:
+            strategy._open_position(signal_result, price)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await self._event.wait()
+            self._event.clear()
+
+            tick_type = "new_candle" if self._new_candle else "same_candle"
+            self._new_candle = False
+
+            exits = self._exits
+            self._exits = []
+
+            try:
+                await loop.run_in_executor(self._executor, self._update, tick_type, exits)
+            except Exception as e:
+                logger.error("Error in the %s strategy on %s: %s", self.strategy.strategy_name,
+                             self.strategy.contract.symbol, e)
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class AsyncExchangeClient:
+    def __init__(self, exchange: str, base_url: str, wss_url: str, strategy_workers: typing.Optional[int] = None,
+                 candle_cache: typing.Optional[CandleCache] = None):
+
+        # Base of the asyncio clients: one event loop reads the websocket and sends the REST requests of any number
+        # of symbols, the strategies run as tasks (see StrategyTask).
+        # Subclasses implement the REST methods of the threaded clients as coroutines, _on_open() and _on_message().
+
+        self.exchange = exchange
+        self._base_url = base_url
+        self._wss_url = wss_url
+
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self.session: typing.Optional[aiohttp.ClientSession] = None
+        self.executor = ThreadPoolExecutor(max_workers=strategy_workers, thread_name_prefix="strategy")
+        # Blocking helpers called by the coroutines (balance cache, feed history). Never the strategy executor:
+        # a strategy waiting on a coroutine holds a strategy thread, the helper would wait for it forever.
+        self.helper_executor = ThreadPoolExecutor(thread_name_prefix="helper")
+
+        self.contracts: typing.Dict[str, ExchangeContract] = dict()
+        self.strategies: typing.Dict[int, "Strategy"] = dict()
+        self._strategies_by_symbol: typing.Dict[str, typing.Tuple["Strategy", ...]] = dict()
+        self._strategy_tasks: typing.Dict[int, StrategyTask] = dict()
+        self._symbol_feeds: typing.Dict[str, MultiTimeframeFeed] = dict()
+        self.candle_cache = candle_cache
+
+        self.balance_cache: typing.Optional[BalanceCache] = None
+        self.order_tracker: typing.Optional[OrderTracker] = None
+
+        self.logs = []
+
+        self.reconnect = True
+        self.reconnect_delay = 2
+        self.websocket_connection = False
+        self._ws: typing.Optional[aiohttp.ClientWebSocketResponse] = None
+        self._ws_task: typing.Optional[asyncio.Task] = None
+        self._decoder = None  # Set by the subclasses, see decoding.py
+
+    @property
+    def balances(self) -> typing.Dict[str, Balance]:
+        return self.balance_cache.balances
+
+    def _add_log(self, msg: str):
+        logger.info("%s", msg)
+        self.logs.append({"log": msg, "displayed": False})
+
+    def _blocking(self, coroutine_function: typing.Callable) -> typing.Callable:
+
+        # Blocking version of a coroutine method, for the threads (strategies, order tracker, balance cache).
+        # Never call it from the event loop.
+
+        def call(*args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(coroutine_function(*args, **kwargs), self.loop).result()
+
+        return call
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=ASYNC_POOL_SIZE))
+
+        self.contracts = await self.get_cryptos()
+
+        # Same helpers as the threaded clients, their threads call the coroutines of this client
+        self.balance_cache = await self.loop.run_in_executor(self.helper_executor, BalanceCache,
+                                                             self._blocking(self.user_balance))
+        self.order_tracker = OrderTracker(types.SimpleNamespace(
+            get_orders_status=self._blocking(self.get_orders_status)))
+
+        self._ws_task = self.loop.create_task(self._ws_run())
+
+        logger.info("%s asyncio client successfully initialized", self.exchange)
+
+    async def close(self):
+        self.reconnect = False
+
+        for strategy_task in self._strategy_tasks.values():
+            strategy_task.cancel()
+
+        if self._ws is not None:
+            await self._ws.close()
+        if self._ws_task is not None:
+            self._ws_task.cancel()
+
+        if self.order_tracker is not None:
+            self.order_tracker.stop()
+        if self.balance_cache is not None:
+            self.balance_cache.stop()
+
+        await self.session.close()
+        self.executor.shutdown(wait=False)
+        self.helper_executor.shutdown(wait=False)
+
+    async def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict,
+                                  headers: typing.Optional[typing.Dict[str, str]] = None):
+
+        # The query string is encoded here, like the signature message, so it is sent exactly as signed
+
+        if request_type not in ("GET", "POST", "DELETE", "PUT"):
+            raise ValueError()
+
+        url = self._base_url + endpoint + ("?" + urlencode(data) if len(data) > 0 else "")
+
+        try:
+            async with self.session.request(request_type, yarl.URL(url, encoded=True), headers=headers) as response:
+                response_data = await response.json(content_type=None)
+                status = response.status
+        except Exception as e:
+            logger.error("Error while making %s request to %s: %s", request_type, endpoint, e)
+            return None
+
+        if status == 200:
+            return response_data
+        else:
+            logger.error("Error while making %s request to %s: %s (error code %s)",
+                         request_type, endpoint, response_data, status)
+            return None
+
+    async def _ws_run(self):
+
+        # Reopens the websocket connection until close() is called
+
+        while self.reconnect:
+            try:
+                async with self.session.ws_connect(self._wss_url, heartbeat=30) as ws:
+                    self._ws = ws
+                    self.websocket_connection = True
+                    logger.info("%s websocket connection opened", self.exchange)
+
+                    await self._on_open()
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            try:
+                                self._on_message(self._decoder.decode(msg.data))
+                            except Exception as e:
+                                logger.error("%s error while handling a websocket message: %s", self.exchange, e)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("%s websocket error: %s", self.exchange, e)
+
+            self.websocket_connection = False
+            logger.warning("%s websocket connection closed", self.exchange)
+
+            if self.reconnect:
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _send_ws(self, data: typing.Dict):
+        try:
+            await self._ws.send_str(json.dumps(data))
+        except Exception as e:
+            logger.error("%s error while sending %s: %s", self.exchange, data, e)
+
+    async def _on_open(self):
+        raise NotImplementedError
+
+    def _on_message(self, data):
+        raise NotImplementedError
+
+    def _feed_arguments(self) -> typing.Dict:
+
+        # Arguments of the MultiTimeframeFeed of a symbol, like the threaded clients
+
+        return {"history_candles": HISTORY_CANDLES[self.platform] if self.candle_cache is None else None}
+
+    def _history(self, contract: ExchangeContract, timeframe: str) -> typing.List[Candle]:
+
+        # History of the feeds, from the helper executor: read from the candle cache when there is one
+
+        fetch = self._blocking(self._historical_data)
+
+        if self.candle_cache is None:
+            return fetch(contract, timeframe)
+
+        cache_key = self.platform + ("_testnet" if self.testnet else "")
+        return self.candle_cache.history(cache_key, contract, timeframe, fetch)
+
+    async def get_candle_feed(self, contract: ExchangeContract, timeframe: str) -> typing.Optional[CandleFeed]:
+
+        # Same as the threaded clients, the history is requested from the helper executor
+
+        symbol_feeds = self._symbol_feeds.get(contract.symbol)
+
+        if symbol_feeds is None:
+            symbol_feeds = MultiTimeframeFeed(self.exchange, contract, self._history,
+                                              **self._feed_arguments())
+
+        feed = await self.loop.run_in_executor(self.helper_executor, symbol_feeds.get_feed, timeframe)
+
+        if feed is not None or symbol_feeds.in_use():
+            self._symbol_feeds[contract.symbol] = symbol_feeds
+
+        return feed
+
+    async def add_strategy(self, b_index: int, strategy: "Strategy"):
+        self.strategies[b_index] = strategy
+
+        symbol = strategy.contract.symbol
+        self._strategies_by_symbol[symbol] = self._strategies_by_symbol.get(symbol, ()) + (strategy,)
+
+        # The feed updates the task, which runs the strategy
+        strategy_task = StrategyTask(strategy, self.executor)
+        self._strategy_tasks[b_index] = strategy_task
+        strategy.feed.subscribe(strategy_task)
+
+    async def remove_strategy(self, b_index: int):
+        strategy = self.strategies.pop(b_index)
+        strategy_task = self._strategy_tasks.pop(b_index)
+        strategy_task.cancel()
+
+        symbol = strategy.contract.symbol
+        remaining = tuple(s for s in self._strategies_by_symbol.get(symbol, ()) if s is not strategy)
+
+        if len(remaining) > 0:
+            self._strategies_by_symbol[symbol] = remaining
+        else:
+            self._strategies_by_symbol.pop(symbol, None)
+
+        feed = strategy.feed
+        feed.unsubscribe(strategy_task)
+
+        symbol_feeds = self._symbol_feeds.get(symbol)
+
+        if symbol_feeds is not None and len(feed.subscribers) == 0:
+            symbol_feeds.remove_feed(feed.timeframe)
+
+            if not symbol_feeds.in_use():
+                del self._symbol_feeds[symbol]
+
+
+class SyncClient:
+    def __init__(self, async_client: AsyncExchangeClient):
+
+        # Synchronous API of an asyncio client: the event loop runs in a background thread and the coroutine methods
+        # become blocking methods, like the methods of BinanceClient / BitmexClient.
+        # The strategies are given this object as client, they call it from the executor threads.
+
+        self._client = async_client
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+        self._call(async_client.start())
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+
+        if inspect.iscoroutinefunction(attribute):
+            return lambda *args, **kwargs: self._call(attribute(*args, **kwargs))
+
+        return attribute
+
+    def close(self):
+        self._call(self._client.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,382 +1,614 @@
-import logging
-import requests
-import json
-import time
-import hmac
-import typing
-import hashlib
-import websocket
-import collections
-import threading
-
-from urllib.parse import urlencode
-from models import *
-from strategies import TechnicalStrategy, BreakoutStrategy
-
-logger = logging.getLogger()
-
-class BinanceClient:
-    def __init__(self, public_key: str, secret_key: str, testnet: bool, futures: bool):
-        # All code below was followed according to doc specifications
-        # Any altercations caused failed connections when performing actions
-        # https://binance-docs.github.io/apidocs/futures/en
-
-        self.futures_client = futures
-        self.testnet = testnet
-
-            #Using the API keys to connect to the Binance Futures
-        self.platform = "binance_futures"
-        if testnet:
-            self._base_url = "https://testnet.binancefuture.com"
-            self._wss_url = "wss://stream.binancefuture.com/web_s"
-        else:
-            self._base_url = "https://fapi.binance.com"
-            self._wss_url = "wss://fstream.binance.com/web_s"
-
-        #assign the public key
-        self.public_key_binance = public_key
-        #assign the secret key
-        self.secret_key_binance = secret_key
-        #Needed or will get "Invalid API key Error"
-        self._headers = {'X-MBX-APIKEY': self.public_key_binance}
-
-        self.contracts = self.get_cryptos()
-        self.balances = self.user_balance()
-
-        self.crypto_prices = dict() #Using Union To pass through both strategies
-        self.strategies: typing.Dict[int, typing.Union[TechnicalStrategy, BreakoutStrategy]] = dict()
-
-        self._websocket_id = 1
-
-        self.logs = []
-
-        self.reconnect = True
-        self.web_s: websocket.WebSocketApp
-        self.ws_subscriptions = {"bookTicker": [], "aggTrade": []}
-        self.websocket_connection = False
-
-
-        t = threading.Thread(target=self._web_s_open)
-        t.start()
-        #Add A log when Web Connection is sucessfull
-        logger.info("Successfully initialized: Starting TradeKing")
-    #Add log to component
-    def _add_log(self, response: str):
-        logger.info("%s", response)
-        self.logs.append({"log": response, "displayed": False})
-    #Create an encrypted HMAC signature
-    def _generate_signature(self, data: typing.Dict) -> str:
-        # Use the HMAC-256 algorithm to create a signature
-        return hmac.new(self.secret_key_binance.encode(), urlencode(data).encode(), hashlib.sha256).hexdigest()
-    # Request to open a trade
-    def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict):
-        # create a wrapper that handels the REST AAPI and error handling requests
-        if request_type == "POST":
-            try:
-                response = requests.post(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:
-                logger.error("Error while making %s request to %s: %s", request_type, endpoint, e)
-                return None
-
-        elif request_type == "GET":
-            try:
-                response = requests.get(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:  #This could be ude to any type of error
-                logger.error("Error making %s request to %s: %s", request_type, endpoint, e)
-                return None
-
-        elif request_type == "DELETE":
-            try:
-                response = requests.delete(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:
-                logger.error("Error making %s request to %s: %s", request_type, endpoint, e)
-                return None
-
-        else:
-            raise ValueError()
-        # success
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error("Error while making %s request to %s: %s (error code %s)",
-                         request_type, endpoint, response.json(), response.status_code)
-            return None
-    #Get the cryptos
-    def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
-
-        # Gather all the cryptos that are offered on the futures
-        exchange_info = self._send_trade_request("GET", "/fapi/v1/exchangeInfo", dict())
-
-        contracts = dict()
-
-        if exchange_info is not None:
-            #loop through all the cryptos for the exchange
-            for contract_data in exchange_info['symbols']:
-                contracts[contract_data['symbol']] = ExchangeContract(contract_data, self.platform)
-
-        return collections.OrderedDict(sorted(contracts.items()))  # Sort keys of the dictionary alphabetically
-    # get the bid and ask price for a crypto
-    def bid_ask_price(self, contract: ExchangeContract) -> typing.Dict[str, float]:
-
-        gbad = dict() #Get bid ask data
-        gbad['symbol'] = contract.symbol
-        #Get the order book Data
-        obd = self._send_trade_request("GET", "/fapi/v1/ticker/bookTicker", gbad)
-
-        if obd is not None:
-            if contract.symbol not in self.crypto_prices:  # Add the symbol to the dictionary if needed
-                self.crypto_prices[contract.symbol] = {'bid': float(obd['bidPrice']), 'ask': float(obd['askPrice'])}
-            else:
-                self.crypto_prices[contract.symbol]['bid'] = float(obd['bidPrice'])
-                self.crypto_prices[contract.symbol]['ask'] = float(obd['askPrice'])
-
-            return self.crypto_prices[contract.symbol]
-    # Get crypto Historical data
-    def _historical_data(self, contract: ExchangeContract, interval: str) -> typing.List[Candle]:
-
-        ghcd = dict()
-        ghcd['symbol'] = contract.symbol
-        ghcd['interval'] = interval
-        ghcd['limit'] = 1000  # Tlook back candles max out at 1000
-
-
-        #Binance FUtures
-        raw_candles = self._send_trade_request("GET", "/fapi/v1/klines", ghcd)
-
-        crypto_candles = []
-
-        if raw_candles is not None:
-            for c in raw_candles:
-                crypto_candles.append(Candle(c, interval, self.platform))
-
-        return crypto_candles
-    # get the account balances
-    def user_balance(self) -> typing.Dict[str, Balance]:
-
-        gbd = dict() #Get Balances Data
-        gbd['timestamp'] = int(time.time() * 1000)
-        gbd['signature'] = self._generate_signature(gbd)
-
-        balances = dict()
-
-        #For binance Futures
-        account_data = self._send_trade_request("GET", "/fapi/v1/account", gbd)
-
-        if account_data is not None:
-            if self.futures_client:
-                for a in account_data['assets']:
-                    balances[a['asset']] = Balance(a, self.platform)
-            else:
-                for a in account_data['balances']:
-                    balances[a['asset']] = Balance(a, self.platform)
-
-        return balances
-    # Response for when starting strategy
-    def _on_reponse(self, ws, response: str):
-
-        message_data = json.loads(response) # Create a channel Update
-
-        if "u" in message_data and "A" in message_data:
-            message_data[
-                'e'] = "bookTicker"  #data sturucture should be like that of binance futures
-
-        if "e" in message_data:
-            if message_data['e'] == "bookTicker": #Use binance bookTicker
-
-                crypto = message_data['s']
-
-                if crypto not in self.crypto_prices:
-                    self.crypto_prices[crypto] = {'bid': float(message_data['b']), 'ask': float(message_data['a'])}
-                else:
-                    self.crypto_prices[crypto]['ask'] = float(message_data['a'])
-                    self.crypto_prices[crypto]['bid'] = float(message_data['b'])
-                # Profit and losses
-                try:
-                    for b_index, strat in self.strategies.items(): #For the body index in strategies items
-                        if strat.contract.symbol == crypto:
-                            for trade in strat.trades:
-                                if trade.status == "open" and trade.entry_price is not None:
-                                    if trade.side == "long":
-                                        trade.profitloss = (self.crypto_prices[crypto]['bid'] - trade.entry_price) * trade.quantity
-                                    elif trade.side == "short":
-                                        trade.profitloss = (trade.entry_price - self.crypto_prices[crypto]['ask']) * trade.quantity
-                except RuntimeError as e:  # Loop through a modified Dictionary
-                    logger.error("Error occured with Strategies: %s", e)
-
-            if message_data['e'] == "aggTrade": #Trade Data
-
-                crypto = message_data['s']
-
-                for key, strat in self.strategies.items():
-                    if strat.contract.symbol == crypto:
-                        res = strat.parse_trades(float(message_data['p']), float(message_data['q']),
-                                                 message_data['T'])  # Updates candlesticks
-                        strat.check_trade(res)
-    # Create an order
-    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: float, side: str, price=None, tif=None) -> OrderStatus:
-
-        #TIF is not needed
-        # Place order.
-
-        ctd = dict() #create crypto_trade_data
-        ctd['symbol'] = contract.symbol
-        ctd['side'] = side.upper()
-        ctd['quantity'] = round(int(quantity / contract.lot_size) * contract.lot_size, 8)
-        ctd['type'] = order_type.upper()  # MChange to upper case
-
-        if price is not None:
-            ctd['price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
-            #Removing the scientific notation
-            ctd['price'] = '%.*f' % (contract.price_decimals, ctd['price'])
-
-        if tif is not None:
-            ctd['timeInForce'] = tif
-
-        ctd['timestamp'] = int(time.time() * 1000)
-        ctd['signature'] = self._generate_signature(ctd)
-
-        trade_order_status = self._send_trade_request("POST", "/fapi/v1/order", ctd)
-
-        if trade_order_status is not None:
-
-
-            trade_order_status = OrderStatus(trade_order_status, self.platform)
-
-        return trade_order_status
-    # Cancel an order
-    def cancel_order(self, contract: ExchangeContract, order_id: int) -> OrderStatus:
-
-        cod = dict() #cancel order data
-        cod['orderId'] = order_id
-        cod['symbol'] = contract.symbol
-
-        cod['timestamp'] = int(time.time() * 1000)
-        cod['signature'] = self._generate_signature(cod)
-
-        trade_state = self._send_trade_request("DELETE", "/fapi/v1/order", cod)
-
-        if trade_state is not None:
-            trade_state = OrderStatus(trade_state, self.platform)
-
-        return trade_state
-    # Calculate the trade size
-    def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
-        # logg new_log
-        logger.info("Your trade size is...")
-
-        account_amount = self.user_balance()
-
-        if account_amount is not None:
-            if contract.quote_currency in account_amount:
-                account_amount = account_amount[contract.quote_currency].wallet_balance
-            else:
-                return None
-        else:
-            return None
-        # calculate the trade Size
-        trade_size = (account_amount * balance_pct / 100) / price
-
-        trade_size = round(round(trade_size / contract.lot_size) * contract.lot_size, 8)  # Removes unwanted decimals
-        # log the trade size
-        logger.info("Binance current %s account_amount = %s, trade size = %s", contract.quote_currency, account_amount,
-                    trade_size)
-
-        return trade_size
-    # Get the status of an ongoing order
-    def get_order_status(self, contract: ExchangeContract, order_id: int) -> OrderStatus:  # Must be same order as in bitmex connector
-
-        trade_d = dict()
-        trade_d['timestamp'] = int(time.time() * 1000)
-        trade_d['symbol'] = contract.symbol
-        trade_d['orderId'] = order_id
-        trade_d['signature'] = self._generate_signature(trade_d)
-
-        trade_order = self._send_trade_request("GET", "/fapi/v1/order", trade_d)
-
-        if trade_order is not None:
-            if not self.futures_client:
-                if trade_order['status'] == "FILLED":
-                    # based on previous trades this is getting the average execution prices
-                    trade_order['avgPrice'] = self._get_execution_price(contract, order_id)
-                else:
-                    trade_order['avgPrice'] = 0
-
-            trade_order = OrderStatus(trade_order, self.platform)
-
-        return trade_order
-    # Open the wesicket connection
-    def _web_s_open(self): #Begin the websocket Connection
-
-        # Infinite loop which will reopens the websocket connection
-        # Using the WebSocketApp from _app.py
-        self.web_s = websocket.WebSocketApp(self._wss_url, on_open=self._open_confirm, on_close=self._close_confirm,
-                                            on_error=self._ws_connection_failure, on_message=self._on_reponse)
-
-        while True:
-            try:
-                if self.reconnect:  # Reconnect unless the gui is closed by the user
-                    self.web_s.run_forever()  # BLock request_type if connection is dropped
-                else:
-                    break
-            except Exception as e:
-                logger.error("Binance error in the run_forever() request_type: %s", e)
-            time.sleep(20)
-    # Notify that the connection was successfully opened
-    def _open_confirm(self, ws):
-        logger.info("Established Connection")
-
-        self.websocket_connection = True
-
-        # aggTrade is used for trade data
-
-        for channel in ["bookTicker", "aggTrade"]:
-            for symbol in self.ws_subscriptions[channel]:
-                self.subscribe_channel([self.contracts[symbol]], channel, reconnection=True)
-
-        if "BTCUSDT" not in self.ws_subscriptions["bookTicker"]:
-            self.subscribe_channel([self.contracts["BTCUSDT"]], "bookTicker")
-    # Notify the websocket has closed correctly
-    def _close_confirm(self, ws, *args, **kwargs):
-
-        # when connection closes: trigger this request_type
-
-        logger.warning("Disconnected from Websocket")
-        self.websocket_connection = False
-    # Notify that there was a connection failure during the closing of the websocket
-    def _ws_connection_failure(self, ws, response: str): #When there is a problem this function is triggered
-
-        logger.error("Error while connecting: %s", response)
-    # Subscribe to a channel
-    def subscribe_channel(self, contracts: typing.List[ExchangeContract], channel: str, reconnection=False):
-
-        if len(contracts) > 200: #Fail if there is more than 200 subscriptions
-            logger.warning("You can only have 200 subscriptions")
-
-        csd = dict()
-        csd['request_type'] = "SUBSCRIBE"
-        csd['params'] = []
-
-        if len(contracts) == 0:
-            csd['params'].append(channel)
-        else:
-            for contract in contracts:
-                if contract.symbol not in self.ws_subscriptions[channel] or reconnection:
-                    csd['params'].append(contract.symbol.lower() + "@" + channel)
-                    if contract.symbol not in self.ws_subscriptions[channel]:
-                        self.ws_subscriptions[channel].append(contract.symbol)
-
-            if len(csd['params']) == 0:
-                return
-
-        csd['id'] = self._websocket_id
-
-        try:
-            #The obejct has to be made into a string
-            self.web_s.send(json.dumps(csd))
-            logger.info("Binance: subscribing to: %s", ','.join(csd['params']))
-        except Exception as e:
-            logger.error("Error subscribing to @bookTicker and @aggTrade: %s", e)
-
-        self._websocket_id += 1
-
-
+import logging
+import json
+import time
+import hmac
+import typing
+import hashlib
+import websocket
+import collections
+import threading
+
+from urllib.parse import urlencode
+from models import *
+from strategies import TechnicalStrategy, BreakoutStrategy
+from candle_cache import CandleCache
+from recorder import TickRecorder
+from candle_feed import CandleFeed, MultiTimeframeFeed
+from order_tracker import OrderTracker
+from balance_cache import BalanceCache
+from transport import Transport
+from latency import LatencyTracker, mark_stage, ORDER_SENT, RESPONSE
+from decoding import AggTrade, BinanceDecoder, BookTicker
+
+logger = logging.getLogger()
+
+# A listen key expires 60 minutes after it was created or last kept alive
+LISTEN_KEY_KEEPALIVE = 30 * 60
+
+class BinanceClient:
+    # Current time of the candle feeds and the trades, the time of the recorded frames in a replay (see replay.py)
+    clock = staticmethod(time.time)
+
+    def __init__(self, public_key: str, secret_key: str, testnet: bool, futures: bool,
+                 base_url: typing.Optional[str] = None, wss_url: typing.Optional[str] = None,
+                 candle_cache: typing.Optional[CandleCache] = None,
+                 recorder: typing.Optional[TickRecorder] = None):
+        # All code below was followed according to doc specifications
+        # Any altercations caused failed connections when performing actions
+        # https://binance-docs.github.io/apidocs/futures/en
+
+        self.futures_client = futures
+        self.testnet = testnet
+
+            #Using the API keys to connect to the Binance Futures
+        self.platform = "binance_futures"
+        if testnet:
+            self._base_url = "https://testnet.binancefuture.com"
+            self._wss_url = "wss://stream.binancefuture.com/web_s"
+            self._wss_user_url = "wss://stream.binancefuture.com/ws/"
+        else:
+            self._base_url = "https://fapi.binance.com"
+            self._wss_url = "wss://fstream.binance.com/web_s"
+            self._wss_user_url = "wss://fstream.binance.com/ws/"
+
+        # base_url and wss_url point the client to other servers, a local fake exchange for example
+        if base_url is not None:
+            self._base_url = base_url
+        if wss_url is not None:
+            self._wss_url = wss_url
+            self._wss_user_url = wss_url.rstrip("/") + "/ws/"
+
+        #assign the public key
+        self.public_key_binance = public_key
+        #assign the secret key
+        self.secret_key_binance = secret_key
+        #Needed or will get "Invalid API key Error"
+        self._headers = {'X-MBX-APIKEY': self.public_key_binance}
+        # Keep-alive connections reused by all the REST requests
+        self.transport = Transport(self._base_url, headers=self._headers)
+
+        # Model constructors of the exchange, chosen once (see models.py)
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+        self._order_status = order_status_factory(self.platform)
+        self._balance = balance_factory(self.platform)
+
+        self.contracts = self.get_cryptos()
+        # Balances kept up to date in the background and by the user data stream, see balance_cache.py
+        self.balance_cache = BalanceCache(self.user_balance)
+
+        self.crypto_prices = dict() #Using Union To pass through both strategies
+        self.strategies: typing.Dict[int, typing.Union[TechnicalStrategy, BreakoutStrategy]] = dict()
+        # Strategies by symbol for the websocket handlers, see add_strategy()
+        self._strategies_by_symbol: typing.Dict[str, typing.Tuple[typing.Union[TechnicalStrategy, BreakoutStrategy], ...]] = dict()
+
+        # Candles shared by the strategies running on the same symbol, see get_candle_feed()
+        # With a candle cache, their history is read from it and only the missing candles are requested
+        self.candle_cache = candle_cache
+
+        # Raw market data frames archived by _on_reponse(), see recorder.py
+        self.recorder = recorder
+        self._symbol_feeds: typing.Dict[str, MultiTimeframeFeed] = dict()
+
+        # Follows the orders that are not filled when placed, see order_tracker.py
+        self.order_tracker = OrderTracker(self)
+
+        self._decoder = BinanceDecoder()  # Market data messages to typed records, see decoding.py
+
+        # Time from the exchange trade to the order it triggers, see latency.py
+        self.latency = LatencyTracker(self.platform, clock=self.clock)
+
+        self._websocket_id = 1
+
+        # Websocket messages received by channel and connections opened again, see metrics.py
+        self.message_counts: typing.Dict[str, int] = collections.Counter()
+        self.ws_reconnects = 0
+
+        self.logs = []
+
+        self.reconnect = True
+        self.web_s: websocket.WebSocketApp
+        self.ws_subscriptions = {"bookTicker": [], "aggTrade": []}
+        self.websocket_connection = False
+
+        # User data stream: order fills and balance changes are pushed instead of polled
+        self.user_ws: typing.Optional[websocket.WebSocketApp] = None
+        self.user_stream_connection = False
+        self._listen_key: typing.Optional[str] = None
+
+
+        t = threading.Thread(target=self._web_s_open)
+        t.start()
+
+        if self.futures_client:
+            threading.Thread(target=self._user_stream_open, daemon=True).start()
+            threading.Thread(target=self._user_stream_keepalive, daemon=True).start()
+        #Add A log when Web Connection is sucessfull
+        logger.info("Successfully initialized: Starting TradeKing")
+    # Cached balances of the account
+    @property
+    def balances(self) -> typing.Dict[str, Balance]:
+        return self.balance_cache.balances
+    # Start sending the market data of the strategy symbol to the strategy
+    def add_strategy(self, b_index: int, strategy: typing.Union[TechnicalStrategy, BreakoutStrategy]):
+        # The tuples of the symbol index are replaced and never modified in place,
+        # so the websocket thread can loop over them while the gui adds or removes strategies
+        self.strategies[b_index] = strategy
+
+        symbol = strategy.contract.symbol
+        self._strategies_by_symbol[symbol] = self._strategies_by_symbol.get(symbol, ()) + (strategy,)
+
+        strategy.feed.subscribe(strategy)
+    # Stop the strategy
+    def remove_strategy(self, b_index: int):
+        strategy = self.strategies.pop(b_index)
+
+        symbol = strategy.contract.symbol
+        remaining = tuple(s for s in self._strategies_by_symbol.get(symbol, ()) if s is not strategy)
+
+        if len(remaining) > 0:
+            self._strategies_by_symbol[symbol] = remaining
+        else:
+            self._strategies_by_symbol.pop(symbol, None)
+
+        feed = strategy.feed
+        feed.unsubscribe(strategy)
+
+        # The candles are not updated any more once the last strategy using them stops
+        symbol_feeds = self._symbol_feeds.get(symbol)
+
+        if symbol_feeds is not None and len(feed.subscribers) == 0:
+            symbol_feeds.remove_feed(feed.timeframe)
+
+            if not symbol_feeds.in_use():
+                del self._symbol_feeds[symbol]
+    # Get the candles of a symbol and timeframe shared by all the strategies using them
+    def get_candle_feed(self, contract: ExchangeContract, timeframe: str) -> typing.Optional[CandleFeed]:
+        # All the timeframes of a symbol are built from the same trades, and their history from the 1m history
+        # The historical data is only requested when the first strategy on this symbol starts
+        symbol_feeds = self._symbol_feeds.get(contract.symbol)
+
+        if symbol_feeds is None:
+            # The candle cache may hold more than one request of 1m candles
+            history_candles = HISTORY_CANDLES[self.platform] if self.candle_cache is None else None
+            symbol_feeds = MultiTimeframeFeed("Binance", contract, self._history, history_candles=history_candles,
+                                              clock=self.clock)
+
+        feed = symbol_feeds.get_feed(timeframe)
+
+        if feed is not None or symbol_feeds.in_use():
+            self._symbol_feeds[contract.symbol] = symbol_feeds
+
+        return feed
+
+    def _history(self, contract: ExchangeContract, timeframe: str) -> typing.List[Candle]:
+
+        # History of the feeds, read from the candle cache when there is one
+
+        if self.candle_cache is None:
+            return self._historical_data(contract, timeframe)
+
+        cache_key = self.platform + ("_testnet" if self.testnet else "")
+        return self.candle_cache.history(cache_key, contract, timeframe, self._historical_data)
+
+    #Add log to component
+    def _add_log(self, response: str):
+        logger.info("%s", response)
+        self.logs.append({"log": response, "displayed": False})
+    #Create an encrypted HMAC signature
+    def _generate_signature(self, data: typing.Dict) -> str:
+        # Use the HMAC-256 algorithm to create a signature
+        return hmac.new(self.secret_key_binance.encode(), urlencode(data).encode(), hashlib.sha256).hexdigest()
+    # Request to open a trade
+    def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict):
+        # create a wrapper that handels the REST AAPI and error handling requests
+        # The requests go through the connection pool of the client, see transport.py
+        if request_type not in ("GET", "POST", "DELETE", "PUT"):
+            raise ValueError()
+
+        try:
+            response = self.transport.request(request_type, endpoint, data)
+        except Exception as e:  #This could be ude to any type of error
+            logger.error("Error while making %s request to %s: %s", request_type, endpoint, e)
+            return None
+
+        # success
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error("Error while making %s request to %s: %s (error code %s)",
+                         request_type, endpoint, response.json(), response.status_code)
+            return None
+    #Get the cryptos
+    def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
+
+        # Gather all the cryptos that are offered on the futures
+        exchange_info = self._send_trade_request("GET", "/fapi/v1/exchangeInfo", dict())
+
+        contracts = dict()
+
+        if exchange_info is not None:
+            #loop through all the cryptos for the exchange
+            for contract_data in exchange_info['symbols']:
+                contracts[contract_data['symbol']] = self._contract(contract_data)
+
+        return collections.OrderedDict(sorted(contracts.items()))  # Sort keys of the dictionary alphabetically
+    # get the bid and ask price for a crypto
+    def bid_ask_price(self, contract: ExchangeContract) -> typing.Dict[str, float]:
+
+        gbad = dict() #Get bid ask data
+        gbad['symbol'] = contract.symbol
+        #Get the order book Data
+        obd = self._send_trade_request("GET", "/fapi/v1/ticker/bookTicker", gbad)
+
+        if obd is not None:
+            if contract.symbol not in self.crypto_prices:  # Add the symbol to the dictionary if needed
+                self.crypto_prices[contract.symbol] = {'bid': float(obd['bidPrice']), 'ask': float(obd['askPrice'])}
+            else:
+                self.crypto_prices[contract.symbol]['bid'] = float(obd['bidPrice'])
+                self.crypto_prices[contract.symbol]['ask'] = float(obd['askPrice'])
+
+            return self.crypto_prices[contract.symbol]
+    # Get crypto Historical data
+    def _historical_data(self, contract: ExchangeContract, interval: str, start_time: typing.Optional[int] = None,
+                         end_time: typing.Optional[int] = None) -> typing.List[Candle]:
+
+        # The last 1000 candles, or the first 1000 opened from start_time to end_time (milliseconds)
+
+        ghcd = dict()
+        ghcd['symbol'] = contract.symbol
+        ghcd['interval'] = interval
+        ghcd['limit'] = HISTORY_CANDLES[self.platform]  # Tlook back candles max out at 1000
+
+        if start_time is not None:
+            ghcd['startTime'] = start_time
+        if end_time is not None:
+            ghcd['endTime'] = end_time
+
+
+        #Binance FUtures
+        raw_candles = self._send_trade_request("GET", "/fapi/v1/klines", ghcd)
+
+        crypto_candles = []
+
+        if raw_candles is not None:
+            for c in raw_candles:
+                crypto_candles.append(self._candle(c, interval))
+
+        return crypto_candles
+    # get the account balances
+    def user_balance(self) -> typing.Dict[str, Balance]:
+
+        gbd = dict() #Get Balances Data
+        gbd['timestamp'] = int(time.time() * 1000)
+        gbd['signature'] = self._generate_signature(gbd)
+
+        balances = dict()
+
+        #For binance Futures
+        account_data = self._send_trade_request("GET", "/fapi/v1/account", gbd)
+
+        if account_data is not None:
+            if self.futures_client:
+                for a in account_data['assets']:
+                    balances[a['asset']] = self._balance(a)
+            else:
+                for a in account_data['balances']:
+                    balances[a['asset']] = self._balance(a)
+
+        return balances
+    # Response for when starting strategy
+    def _on_reponse(self, ws, response: str):
+
+        received = time.perf_counter_ns()
+
+        if self.recorder is not None:
+            self.recorder.record(response)
+
+        message_data = self._decoder.decode(response) # Create a channel Update (AggTrade, BookTicker or dict)
+
+        if type(message_data) is BookTicker: #Use binance bookTicker
+
+            self.message_counts["bookTicker"] += 1
+
+            crypto = message_data.symbol
+
+            if crypto not in self.crypto_prices:
+                self.crypto_prices[crypto] = {'bid': message_data.bid, 'ask': message_data.ask}
+            else:
+                self.crypto_prices[crypto]['ask'] = message_data.ask
+                self.crypto_prices[crypto]['bid'] = message_data.bid
+            # Profit and losses
+            for strat in self._strategies_by_symbol.get(crypto, ()):
+                for trade in strat.trigger_book.trades:  # Only the filled open trades
+                    if trade.side == "long":
+                        trade.profitloss = (message_data.bid - trade.entry_price) * trade.quantity
+                    elif trade.side == "short":
+                        trade.profitloss = (trade.entry_price - message_data.ask) * trade.quantity
+
+        elif type(message_data) is AggTrade: #Trade Data
+
+            self.message_counts["aggTrade"] += 1
+
+            symbol_feeds = self._symbol_feeds.get(message_data.symbol)
+
+            if symbol_feeds is not None:
+                self.latency.begin(message_data.symbol, message_data.timestamp, received)
+                symbol_feeds.on_trade(message_data.price, message_data.quantity,
+                                      message_data.timestamp)  # Updates candlesticks, then the strategies
+                self.latency.end()
+
+        else:
+            self.message_counts["other"] += 1  # Subscription responses
+    # Create an order
+    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: float, side: str, price=None, tif=None) -> OrderStatus:
+
+        #TIF is not needed
+        # Place order.
+
+        ctd = dict() #create crypto_trade_data
+        ctd['symbol'] = contract.symbol
+        ctd['side'] = side.upper()
+        ctd['quantity'] = round(int(quantity / contract.lot_size) * contract.lot_size, 8)
+        ctd['type'] = order_type.upper()  # MChange to upper case
+
+        if price is not None:
+            ctd['price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
+            #Removing the scientific notation
+            ctd['price'] = '%.*f' % (contract.price_decimals, ctd['price'])
+
+        if tif is not None:
+            ctd['timeInForce'] = tif
+
+        ctd['timestamp'] = int(time.time() * 1000)
+        ctd['signature'] = self._generate_signature(ctd)
+
+        mark_stage(ORDER_SENT)
+        trade_order_status = self._send_trade_request("POST", "/fapi/v1/order", ctd)
+        mark_stage(RESPONSE)
+
+        if trade_order_status is not None:
+
+
+            trade_order_status = self._order_status(trade_order_status)
+
+        return trade_order_status
+    # Cancel an order
+    def cancel_order(self, contract: ExchangeContract, order_id: int) -> OrderStatus:
+
+        cod = dict() #cancel order data
+        cod['orderId'] = order_id
+        cod['symbol'] = contract.symbol
+
+        cod['timestamp'] = int(time.time() * 1000)
+        cod['signature'] = self._generate_signature(cod)
+
+        trade_state = self._send_trade_request("DELETE", "/fapi/v1/order", cod)
+
+        if trade_state is not None:
+            trade_state = self._order_status(trade_state)
+
+        return trade_state
+    # Calculate the trade size
+    def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
+        # logg new_log
+        logger.info("Your trade size is...")
+
+        # No request unless the cached balance is stale
+        account_amount = self.balance_cache.get(contract.quote_currency)
+
+        if account_amount is not None:
+            account_amount = account_amount.wallet_balance
+        else:
+            return None
+        # calculate the trade Size
+        trade_size = (account_amount * balance_pct / 100) / price
+
+        trade_size = round(round(trade_size / contract.lot_size) * contract.lot_size, 8)  # Removes unwanted decimals
+        # log the trade size
+        logger.info("Binance current %s account_amount = %s, trade size = %s", contract.quote_currency, account_amount,
+                    trade_size)
+
+        return trade_size
+    # Get the status of an ongoing order
+    def get_order_status(self, contract: ExchangeContract, order_id: int) -> OrderStatus:  # Must be same order as in bitmex connector
+
+        trade_d = dict()
+        trade_d['timestamp'] = int(time.time() * 1000)
+        trade_d['symbol'] = contract.symbol
+        trade_d['orderId'] = order_id
+        trade_d['signature'] = self._generate_signature(trade_d)
+
+        trade_order = self._send_trade_request("GET", "/fapi/v1/order", trade_d)
+
+        if trade_order is not None:
+            if not self.futures_client:
+                if trade_order['status'] == "FILLED":
+                    # based on previous trades this is getting the average execution prices
+                    trade_order['avgPrice'] = self._get_execution_price(contract, order_id)
+                else:
+                    trade_order['avgPrice'] = 0
+
+            trade_order = self._order_status(trade_order)
+
+        return trade_order
+    # Get the status of several orders of a symbol, used by the order tracker
+    def get_orders_status(self, contract: ExchangeContract, order_ids: typing.List[int]) -> typing.Optional[typing.Dict[int, OrderStatus]]:
+        # One request for all the open orders of the symbol, the orders missing from it are filled or canceled
+        # and are requested one by one (only once, they are then removed from the tracker)
+        ood = dict() #open orders data
+        ood['timestamp'] = int(time.time() * 1000)
+        ood['symbol'] = contract.symbol
+        ood['signature'] = self._generate_signature(ood)
+
+        open_orders = self._send_trade_request("GET", "/fapi/v1/openOrders", ood)
+
+        if open_orders is None:
+            return None
+
+        orders_status = dict()
+
+        for order in open_orders:
+            if order['orderId'] in order_ids:
+                orders_status[order['orderId']] = self._order_status(order)
+
+        for order_id in order_ids:
+            if order_id not in orders_status:
+                trade_order = self.get_order_status(contract, order_id)
+                if trade_order is not None:
+                    orders_status[order_id] = trade_order
+
+        return orders_status
+    # Open the wesicket connection
+    def _web_s_open(self): #Begin the websocket Connection
+
+        # Infinite loop which will reopens the websocket connection
+        # Using the WebSocketApp from _app.py
+        self.web_s = websocket.WebSocketApp(self._wss_url, on_open=self._open_confirm, on_close=self._close_confirm,
+                                            on_error=self._ws_connection_failure, on_message=self._on_reponse)
+
+        while True:
+            try:
+                if self.reconnect:  # Reconnect unless the gui is closed by the user
+                    self.web_s.run_forever()  # BLock request_type if connection is dropped
+                else:
+                    break
+            except Exception as e:
+                logger.error("Binance error in the run_forever() request_type: %s", e)
+            if self.reconnect:
+                self.ws_reconnects += 1
+                time.sleep(20)
+    # Notify that the connection was successfully opened
+    def _open_confirm(self, ws):
+        logger.info("Established Connection")
+
+        self.websocket_connection = True
+
+        # aggTrade is used for trade data
+
+        for channel in ["bookTicker", "aggTrade"]:
+            for symbol in self.ws_subscriptions[channel]:
+                self.subscribe_channel([self.contracts[symbol]], channel, reconnection=True)
+
+        if "BTCUSDT" not in self.ws_subscriptions["bookTicker"]:
+            self.subscribe_channel([self.contracts["BTCUSDT"]], "bookTicker")
+    # Notify the websocket has closed correctly
+    def _close_confirm(self, ws, *args, **kwargs):
+
+        # when connection closes: trigger this request_type
+
+        logger.warning("Disconnected from Websocket")
+        self.websocket_connection = False
+    # Notify that there was a connection failure during the closing of the websocket
+    def _ws_connection_failure(self, ws, response: str): #When there is a problem this function is triggered
+
+        logger.error("Error while connecting: %s", response)
+    # Open the user data stream, with a new listen key at each connection
+    def _user_stream_open(self):
+
+        while self.reconnect:
+            listen_key_data = self._send_trade_request("POST", "/fapi/v1/listenKey", dict())
+
+            if listen_key_data is not None:
+                self._listen_key = listen_key_data['listenKey']
+
+                self.user_ws = websocket.WebSocketApp(self._wss_user_url + self._listen_key,
+                                                      on_open=self._user_stream_confirm,
+                                                      on_close=self._user_stream_closed,
+                                                      on_error=self._ws_connection_failure,
+                                                      on_message=self._on_user_data)
+                try:
+                    self.user_ws.run_forever()
+                except Exception as e:
+                    logger.error("Binance error in the user data stream: %s", e)
+
+            if self.reconnect:
+                time.sleep(5)
+    # Keep the listen key alive, a new one is created if it expired
+    def _user_stream_keepalive(self):
+
+        while self.reconnect:
+            time.sleep(LISTEN_KEY_KEEPALIVE)
+
+            if self._listen_key is None or self.user_ws is None:
+                continue
+
+            if self._send_trade_request("PUT", "/fapi/v1/listenKey", dict()) is None:
+                logger.warning("Binance listen key keepalive failed, reopening the user data stream")
+                self.user_ws.close()
+    # Notify that the user data stream is open
+    def _user_stream_confirm(self, ws):
+        logger.info("Binance user data stream opened")
+
+        self.user_stream_connection = True
+        self.order_tracker.set_push_updates(True)  # Polling is now only a fallback for missed updates
+    # Notify that the user data stream is closed
+    def _user_stream_closed(self, ws, *args, **kwargs):
+        logger.warning("Binance user data stream closed")
+
+        self.user_stream_connection = False
+        self.order_tracker.set_push_updates(False)
+    # Order and balance updates of the account
+    def _on_user_data(self, ws, response: str):
+
+        message_data = self._decoder.loads(response)
+
+        self.message_counts["userData"] += 1
+
+        if "e" not in message_data:
+            return
+
+        if message_data['e'] == "ORDER_TRADE_UPDATE":
+
+            order = message_data['o']
+
+            # The tracker calls the strategy that placed the order, which updates the trade entry price
+            order_status = OrderStatus({'orderId': order['i'], 'status': order['X'], 'avgPrice': order['ap'],
+                                        'executedQty': order['z']}, self.platform)
+            self.order_tracker.resolve(order_status)
+
+        elif message_data['e'] == "ACCOUNT_UPDATE":
+
+            for b in message_data['a']['B']:
+                if not self.balance_cache.update(b['a'], wallet_balance=float(b['wb'])):
+                    self.balance_cache.set(b['a'], self._balance({'initialMargin': 0, 'maintMargin': 0,
+                                                                  'marginBalance': b['wb'], 'walletBalance': b['wb'],
+                                                                  'unrealizedProfit': 0}))
+
+        elif message_data['e'] == "listenKeyExpired":
+            logger.warning("Binance listen key expired, reopening the user data stream")
+            ws.close()
+    # Subscribe to a channel
+    def subscribe_channel(self, contracts: typing.List[ExchangeContract], channel: str, reconnection=False):
+
+        if len(contracts) > 200: #Fail if there is more than 200 subscriptions
+            logger.warning("You can only have 200 subscriptions")
+
+        csd = dict()
+        csd['request_type'] = "SUBSCRIBE"
+        csd['params'] = []
+
+        if len(contracts) == 0:
+            csd['params'].append(channel)
+        else:
+            for contract in contracts:
+                if contract.symbol not in self.ws_subscriptions[channel] or reconnection:
+                    csd['params'].append(contract.symbol.lower() + "@" + channel)
+                    if contract.symbol not in self.ws_subscriptions[channel]:
+                        self.ws_subscriptions[channel].append(contract.symbol)
+
+            if len(csd['params']) == 0:
+                return
+
+        csd['id'] = self._websocket_id
+
+        try:
+            #The obejct has to be made into a string
+            self.web_s.send(json.dumps(csd))
+            logger.info("Binance: subscribing to: %s", ','.join(csd['params']))
+        except Exception as e:
+            logger.error("Error subscribing to @bookTicker and @aggTrade: %s", e)
+
+        self._websocket_id += 1
+
+
@@ -1,344 +1,560 @@
-import logging
-import requests
-import time
-import typing
-import collections
-
-from urllib.parse import urlencode
-
-import hmac
-import hashlib
-
-import websocket
-import json
-
-import dateutil.parser
-
-import threading
-
-from models import *
-
-from strategies import TechnicalStrategy, BreakoutStrategy
-
-
-logger = logging.getLogger()
-
-
-class BitmexClient:
-    def __init__(self, public_key: str, secret_key: str, testnet: bool):
-
-        # All code below was followed accroding to doc specifications
-        # Any altercations caused failed connections when Executing orders on the exchange
-        # https://www.bitmex.com
-
-        self.futures = True
-        self.testnet = testnet
-        self.platform = "bitmex"  # Just to have more homogeneous exchanges, even if self.platform is not used
-
-        if testnet:
-            self._base_url = "https://testnet.bitmex.com"
-            self._wss_url = "wss://testnet.bitmex.com/realtime"
-        else:
-            self._base_url = "https://www.bitmex.com"
-            self._wss_url = "wss://www.bitmex.com/realtime"
-
-        self.public_key_bitmex = public_key
-        self.secret_key_bitmex = secret_key
-
-        self.ws: websocket.WebSocketApp
-        self.reconnect = True
-
-        self.contracts = self.get_cryptos()
-        self.balances = self.user_balance()
-
-        self.prices = dict()
-        self.strategies: typing.Dict[int, typing.Union[TechnicalStrategy, BreakoutStrategy]] = dict()
-
-        self.logs = []
-
-        t = threading.Thread(target=self._web_s_open)
-        t.start()
-
-        logger.info("Bitmex Client successfully initialized")
-    # All code below was followed according to doc specifications
-    # Any altercations caused failed connections when performing actions
-
-    def _add_log(self, msg: str):
-        logger.info("%s", msg)
-        self.logs.append({"log": msg, "displayed": False})
-
-    def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict):
-
-        headers = dict()
-        expires = str(int(time.time()) + 5)
-        headers['api-key'] = self.public_key_bitmex
-        headers['api-expires'] = expires
-        headers['api-signature'] = self._generate_signature(request_type, endpoint, expires, data)
-
-        if request_type == "POST":
-            try:
-                response = requests.post(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:
-                logger.error("Error while making %s request to %s: %s", request_type, endpoint, e)
-                return None
-
-        elif request_type == "GET":
-            try:
-                response = requests.get(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:  # This could be ude to any type of error
-                logger.error("Error making %s request to %s: %s", request_type, endpoint, e)
-                return None
-
-        elif request_type == "DELETE":
-            try:
-                response = requests.delete(self._base_url + endpoint, params=data, headers=self._headers)
-            except Exception as e:
-                logger.error("Error making %s request to %s: %s", request_type, endpoint, e)
-                return None
-        else:
-            raise ValueError()
-
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error("Error while making %s request to %s: %s (error code %s)",
-                         request_type, endpoint, response.json(), response.status_code)
-            return None
-
-    def _generate_signature(self, method: str, endpoint: str, expires: str, data: typing.Dict) -> str:
-
-        message = method + endpoint + "?" + urlencode(data) + expires if len(data) > 0 else method + endpoint + expires
-        return hmac.new(self.secret_key_bitmex.encode(), message.encode(), hashlib.sha256).hexdigest()
-
-    def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
-
-        #Compute the trade size for the strategy module based on the percentage of the balance
-        #Used to convert the amount to invest into an amount to buy/sell
-
-
-        balance = self.user_balance()
-        if balance is not None:
-            if 'XBt' in balance:
-                balance = balance['XBt'].wallet_balance
-            else:
-                return None
-        else:
-            return None
-
-        xbt_size = balance * balance_pct / 100
-
-        # https://www.bitmex.com/app/perpetualContractsGuide
-
-        if contract.quanto:
-            contracts_number = xbt_size / (contract.multiplier * price)
-        elif contract.inverse:
-            contracts_number = xbt_size / (contract.multiplier / price)
-        else:
-            contracts_number = xbt_size / (contract.multiplier * price)
-
-        logger.info("Bitmex current XBT balance = %s, contracts number = %s", balance, contracts_number)
-
-        return int(contracts_number)
-
-    def user_balance(self) -> typing.Dict[str, Balance]:
-        dbd = dict() #Get balance Data
-        dbd['currency'] = "all"
-
-        balances = dict()
-
-        margin_data = self._send_trade_request("GET", "/api/v1/user/margin", dbd)
-
-        if margin_data is not None:
-            for a in margin_data:
-                balances[a['currency']] = Balance(a, "bitmex")
-
-        return balances
-
-    def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
-
-        instruments = self._send_trade_request("GET", "/api/v1/instrument/active", dict())
-
-        contracts = dict()
-
-        if instruments is not None:
-            for s in instruments:
-                contracts[s['symbol']] = ExchangeContract(s, "bitmex")
-
-        return collections.OrderedDict(sorted(contracts.items()))  # Sort keys of the dictionary alphabetically
-
-    def _historical_data(self, contract: ExchangeContract, timeframe: str) -> typing.List[Candle]:
-        ghcd = dict() #get historical candle data
-
-        ghcd['symbol'] = contract.symbol
-        ghcd['partial'] = True
-        ghcd['binSize'] = timeframe
-        ghcd['count'] = 500
-        ghcd['reverse'] = True
-
-        raw_candles = self._send_trade_request("GET", "/api/v1/trade/bucketed", ghcd)
-
-        candles = []
-
-        if raw_candles is not None:
-            for c in reversed(raw_candles):
-                if c['open'] is None or c['close'] is None:  # Some candles returned by Bitmex miss data
-                    continue
-                candles.append(Candle(c, timeframe, "bitmex"))
-
-        return candles
-
-    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: int, side: str, price=None, tif=None) -> OrderStatus:
-        pod = dict() # Place order data
-
-        pod['symbol'] = contract.symbol
-        pod['side'] = side.capitalize()
-        pod['orderQty'] = round(quantity / contract.lot_size) * contract.lot_size
-        pod['ordType'] = order_type.capitalize()
-
-        if price is not None:
-            pod['crypto_price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
-
-        if tif is not None:
-            pod['timeInForce'] = tif
-
-        order_status = self._send_trade_request("POST", "/api/v1/order", pod)
-
-        if order_status is not None:
-            order_status = OrderStatus(order_status, "bitmex")
-
-        return order_status
-
-    def get_order_status(self, contract: ExchangeContract, order_id: str) -> OrderStatus:  #Must be same order as in binance connector
-
-        gosd = dict()
-        gosd['symbol'] = contract.symbol
-        gosd['reverse'] = True
-
-        order_status = self._send_trade_request("GET", "/api/v1/order", gosd)
-
-        if order_status is not None:
-            for order in order_status:
-                if order['orderID'] == order_id:
-                    return OrderStatus(order, "bitmex")
-
-    def cancel_order(self, order_id: str) -> OrderStatus:
-        cod = dict() #cancel order data
-        cod['orderID'] = order_id
-
-        order_status = self._send_trade_request("DELETE", "/api/v1/order", cod)
-
-        if order_status is not None:
-            order_status = OrderStatus(order_status[0], "bitmex")
-
-        return order_status
-
-    def _web_s_open(self):
-        self.ws = websocket.WebSocketApp(self._wss_url, on_open=self._open_confirm, on_close=self._close_confirm,
-                                         on_error=self._ws_connection_failure, on_message=self._on_reponse)
-
-        while True:
-            try:
-                if self.reconnect:
-                    self.ws.run_forever()
-                else:
-                    break
-            except Exception as e:
-                logger.error("Error: request %s", e)
-            time.sleep(2)
-
-    def _open_confirm(self, ws):
-        logger.info("Bitmex connection opened")
-
-        self.subscribe_channel("instrument")
-
-        self.subscribe_channel("trade")
-
-    def _close_confirm(self, ws, *args, **kwargs):
-        logger.warning("Bitmex Websocket connection closed")
-
-    def _on_reponse(self, ws, msg: str):
-
-        omd = json.loads(msg)#On message Data
-
-        if "table" in omd:
-            if omd['table'] == "instrument":
-
-                for d in omd['data']:
-
-                    bx_symbol = d['symbol']
-
-                    if bx_symbol not in self.prices:
-                        self.prices[bx_symbol] = {'bid': None, 'ask': None}
-
-                    if 'bidPrice' in d:
-                        self.prices[bx_symbol]['bid'] = d['bidPrice']
-                    if 'askPrice' in d:
-                        self.prices[bx_symbol]['ask'] = d['askPrice']
-
-                    # PNL Calculation
-
-                    try:
-                        for b_index, bx_strategy in self.strategies.items():
-                            if bx_strategy.contract.symbol == bx_symbol:
-                                for trade in bx_strategy.trades:
-                                    if trade.status == "open" and trade.entry_price is not None:
-
-                                        if trade.side == "long":
-                                            price = self.prices[bx_symbol]['bid']
-                                        else:
-                                            price = self.prices[bx_symbol]['ask']
-                                        multiplier = trade.contract.multiplier
-
-                                        if trade.contract.inverse:
-                                            if trade.side == "long":
-                                                trade.profitloss = (1 / trade.entry_price - 1 / price) * multiplier * trade.quantity
-                                            elif trade.side == "short":
-                                                trade.profitloss = (1 / price - 1 / trade.entry_price) * multiplier * trade.quantity
-                                        else:
-                                            if trade.side == "long":
-                                                trade.profitloss = (price - trade.entry_price) * multiplier * trade.quantity
-                                            elif trade.side == "short":
-                                                trade.profitloss = (trade.entry_price - price) * multiplier * trade.quantity
-                    except RuntimeError as e:
-                        logger.error("Error with strategies: %s", e)
-
-            if omd['table'] == "trade":
-
-                for d in omd['data']:
-
-                    bx_symbol = d['symbol']
-
-                    ts = int(dateutil.parser.isoparse(d['timestamp']).timestamp() * 1000)
-
-                    for key, bx_strategy in self.strategies.items():
-                        if bx_strategy.contract.symbol == bx_symbol:
-                            res = bx_strategy.parse_trades(float(d['crypto_price']), float(d['size']), ts)
-                            bx_strategy.check_trade(res)
-
-    def _ws_connection_failure(self, ws, msg: str):
-        logger.error("Bitmex connection error: %s", msg)
-
-    def subscribe_channel(self, topic: str):
-        scd = dict() #subscribe channel data
-        scd['op'] = "subscribe"
-        scd['args'] = []
-        scd['args'].append(topic)
-
-        try:
-            self.ws.send(json.dumps(scd))
-        except Exception as e:
-            logger.error("Error subscribing to %s: %s", topic, e)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+import logging
+import time
+import typing
+import collections
+
+from urllib.parse import urlencode
+
+import hmac
+import hashlib
+
+import websocket
+import json
+
+import threading
+
+from models import *
+
+from strategies import TechnicalStrategy, BreakoutStrategy
+from candle_cache import CandleCache
+from recorder import TickRecorder
+from candle_feed import CandleFeed, MultiTimeframeFeed
+from order_tracker import OrderTracker
+from balance_cache import BalanceCache
+from transport import Transport
+from latency import LatencyTracker, mark_stage, ORDER_SENT, RESPONSE
+from decoding import BitmexDecoder, format_bitmex_timestamp
+
+
+logger = logging.getLogger()
+
+# Final values of ordStatus, the order tracker is then given the order
+BITMEX_FINAL_ORDER_STATUSES = {"Filled", "Canceled", "Rejected"}
+
+# Columns of the margin table and the Balance attributes they update
+BITMEX_MARGIN_FIELDS = {"initMargin": "initial_margin", "maintMargin": "maintenance_margin",
+                        "marginBalance": "margin_balance", "walletBalance": "wallet_balance",
+                        "unrealisedPnl": "unrealized_pnl"}
+
+
+class BitmexClient:
+    # Current time of the candle feeds and the trades, the time of the recorded frames in a replay (see replay.py)
+    clock = staticmethod(time.time)
+
+    def __init__(self, public_key: str, secret_key: str, testnet: bool, base_url: typing.Optional[str] = None,
+                 wss_url: typing.Optional[str] = None, candle_cache: typing.Optional[CandleCache] = None,
+                 recorder: typing.Optional[TickRecorder] = None):
+
+        # All code below was followed accroding to doc specifications
+        # Any altercations caused failed connections when Executing orders on the exchange
+        # https://www.bitmex.com
+
+        self.futures = True
+        self.testnet = testnet
+        self.platform = "bitmex"  # Just to have more homogeneous exchanges, even if self.platform is not used
+
+        if testnet:
+            self._base_url = "https://testnet.bitmex.com"
+            self._wss_url = "wss://testnet.bitmex.com/realtime"
+        else:
+            self._base_url = "https://www.bitmex.com"
+            self._wss_url = "wss://www.bitmex.com/realtime"
+
+        # base_url and wss_url point the client to other servers, a local fake exchange for example
+        if base_url is not None:
+            self._base_url = base_url
+        if wss_url is not None:
+            self._wss_url = wss_url
+
+        self.public_key_bitmex = public_key
+        self.secret_key_bitmex = secret_key
+
+        # Keep-alive connections reused by all the REST requests
+        self.transport = Transport(self._base_url)
+
+        self.ws: websocket.WebSocketApp
+        self.reconnect = True
+        self._decoder = BitmexDecoder()  # Trade rows to typed records, see decoding.py
+
+        # Time from the exchange trade to the order it triggers, see latency.py
+        self.latency = LatencyTracker(self.platform, clock=self.clock)
+
+        # Model constructors of the exchange, chosen once (see models.py)
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+        self._order_status = order_status_factory(self.platform)
+        self._balance = balance_factory(self.platform)
+
+        self.private_connection = False  # True once the private tables (order, execution, margin) are subscribed
+
+        # Websocket messages received by table and connections opened again, see metrics.py
+        self.message_counts: typing.Dict[str, int] = collections.Counter()
+        self.ws_reconnects = 0
+
+        # Orders of the account as pushed by the order and execution tables, by orderID
+        self._orders: typing.Dict[str, typing.Dict] = dict()
+
+        self.contracts = self.get_cryptos()
+        # Balances kept up to date in the background and by the margin table, see balance_cache.py
+        self.balance_cache = BalanceCache(self.user_balance)
+
+        self.prices = dict()
+        self.strategies: typing.Dict[int, typing.Union[TechnicalStrategy, BreakoutStrategy]] = dict()
+        # Strategies by symbol for the websocket handlers, see add_strategy()
+        self._strategies_by_symbol: typing.Dict[str, typing.Tuple[typing.Union[TechnicalStrategy, BreakoutStrategy], ...]] = dict()
+
+        # Candles shared by the strategies running on the same symbol, see get_candle_feed()
+        # With a candle cache, their history is read from it and only the missing candles are requested
+        self.candle_cache = candle_cache
+
+        # Raw market data frames archived by _on_reponse(), see recorder.py
+        self.recorder = recorder
+        self._symbol_feeds: typing.Dict[str, MultiTimeframeFeed] = dict()
+
+        # Follows the orders that are not filled when placed, see order_tracker.py
+        self.order_tracker = OrderTracker(self)
+
+        self.logs = []
+
+        t = threading.Thread(target=self._web_s_open)
+        t.start()
+
+        logger.info("Bitmex Client successfully initialized")
+    # All code below was followed according to doc specifications
+    # Any altercations caused failed connections when performing actions
+
+    @property
+    def balances(self) -> typing.Dict[str, Balance]:
+        return self.balance_cache.balances
+
+    def add_strategy(self, b_index: int, strategy: typing.Union[TechnicalStrategy, BreakoutStrategy]):
+
+        # The tuples of the symbol index are replaced and never modified in place,
+        # so the websocket thread can loop over them while the gui adds or removes strategies
+
+        self.strategies[b_index] = strategy
+
+        symbol = strategy.contract.symbol
+        self._strategies_by_symbol[symbol] = self._strategies_by_symbol.get(symbol, ()) + (strategy,)
+
+        strategy.feed.subscribe(strategy)
+
+    def remove_strategy(self, b_index: int):
+        strategy = self.strategies.pop(b_index)
+
+        symbol = strategy.contract.symbol
+        remaining = tuple(s for s in self._strategies_by_symbol.get(symbol, ()) if s is not strategy)
+
+        if len(remaining) > 0:
+            self._strategies_by_symbol[symbol] = remaining
+        else:
+            self._strategies_by_symbol.pop(symbol, None)
+
+        feed = strategy.feed
+        feed.unsubscribe(strategy)
+
+        # The candles are not updated any more once the last strategy using them stops
+        symbol_feeds = self._symbol_feeds.get(symbol)
+
+        if symbol_feeds is not None and len(feed.subscribers) == 0:
+            symbol_feeds.remove_feed(feed.timeframe)
+
+            if not symbol_feeds.in_use():
+                del self._symbol_feeds[symbol]
+
+    def get_candle_feed(self, contract: ExchangeContract, timeframe: str) -> typing.Optional[CandleFeed]:
+
+        # Candles of a symbol and timeframe shared by all the strategies using them.
+        # All the timeframes of a symbol are built from the same trades, and their history from the 1m history,
+        # which also gives the 15m, 30m and 4h timeframes that /trade/bucketed does not have.
+
+        symbol_feeds = self._symbol_feeds.get(contract.symbol)
+
+        if symbol_feeds is None:
+            history_candles = HISTORY_CANDLES[self.platform] if self.candle_cache is None else None
+            symbol_feeds = MultiTimeframeFeed("Bitmex", contract, self._history,
+                                              native_timeframes=BITMEX_TF_MINUTES.keys(),
+                                              history_candles=history_candles, clock=self.clock)
+
+        feed = symbol_feeds.get_feed(timeframe)
+
+        if feed is not None or symbol_feeds.in_use():
+            self._symbol_feeds[contract.symbol] = symbol_feeds
+
+        return feed
+
+    def _history(self, contract: ExchangeContract, timeframe: str) -> typing.List[Candle]:
+
+        # History of the feeds, read from the candle cache when there is one
+
+        if self.candle_cache is None:
+            return self._historical_data(contract, timeframe)
+
+        cache_key = self.platform + ("_testnet" if self.testnet else "")
+        return self.candle_cache.history(cache_key, contract, timeframe, self._historical_data)
+
+    def _add_log(self, msg: str):
+        logger.info("%s", msg)
+        self.logs.append({"log": msg, "displayed": False})
+
+    def _send_trade_request(self, request_type: str, endpoint: str, data: typing.Dict):
+
+        # Without API keys (see downloader.py) only the public endpoints can be used, they are sent unsigned
+        headers = dict()
+        if self.public_key_bitmex:
+            expires = str(int(time.time()) + 5)
+            headers['api-key'] = self.public_key_bitmex
+            headers['api-expires'] = expires
+            headers['api-signature'] = self._generate_signature(request_type, endpoint, expires, data)
+
+        if request_type not in ("GET", "POST", "DELETE"):
+            raise ValueError()
+
+        # The requests go through the connection pool of the client, see transport.py
+        try:
+            response = self.transport.request(request_type, endpoint, data, headers=headers)
+        except Exception as e:  # This could be ude to any type of error
+            logger.error("Error while making %s request to %s: %s", request_type, endpoint, e)
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error("Error while making %s request to %s: %s (error code %s)",
+                         request_type, endpoint, response.json(), response.status_code)
+            return None
+
+    def _generate_signature(self, method: str, endpoint: str, expires: str, data: typing.Dict) -> str:
+
+        message = method + endpoint + "?" + urlencode(data) + expires if len(data) > 0 else method + endpoint + expires
+        return hmac.new(self.secret_key_bitmex.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    def get_trade_size(self, contract: ExchangeContract, price: float, balance_pct: float):
+
+        #Compute the trade size for the strategy module based on the percentage of the balance
+        #Used to convert the amount to invest into an amount to buy/sell
+
+
+        balance = self.balance_cache.get('XBt')  # No request unless the cached balance is stale
+        if balance is not None:
+            balance = balance.wallet_balance
+        else:
+            return None
+
+        xbt_size = balance * balance_pct / 100
+
+        # https://www.bitmex.com/app/perpetualContractsGuide
+
+        if contract.quanto:
+            contracts_number = xbt_size / (contract.multiplier * price)
+        elif contract.inverse:
+            contracts_number = xbt_size / (contract.multiplier / price)
+        else:
+            contracts_number = xbt_size / (contract.multiplier * price)
+
+        logger.info("Bitmex current XBT balance = %s, contracts number = %s", balance, contracts_number)
+
+        return int(contracts_number)
+
+    def user_balance(self) -> typing.Dict[str, Balance]:
+        dbd = dict() #Get balance Data
+        dbd['currency'] = "all"
+
+        balances = dict()
+
+        margin_data = self._send_trade_request("GET", "/api/v1/user/margin", dbd)
+
+        if margin_data is not None:
+            for a in margin_data:
+                balances[a['currency']] = self._balance(a)
+
+        return balances
+
+    def get_cryptos(self) -> typing.Dict[str, ExchangeContract]:
+
+        instruments = self._send_trade_request("GET", "/api/v1/instrument/active", dict())
+
+        contracts = dict()
+
+        if instruments is not None:
+            for s in instruments:
+                contracts[s['symbol']] = self._contract(s)
+
+        return collections.OrderedDict(sorted(contracts.items()))  # Sort keys of the dictionary alphabetically
+
+    def _historical_data(self, contract: ExchangeContract, timeframe: str, start_time: typing.Optional[int] = None,
+                         end_time: typing.Optional[int] = None) -> typing.List[Candle]:
+
+        # The last 500 candles, or the first 500 opened from start_time to end_time (milliseconds).
+        # The bucket timestamps are the end of the candles, so the filters are one timeframe later.
+
+        ghcd = dict() #get historical candle data
+
+        ghcd['symbol'] = contract.symbol
+        ghcd['partial'] = True
+        ghcd['binSize'] = timeframe
+        ghcd['count'] = HISTORY_CANDLES[self.platform]
+        ghcd['reverse'] = start_time is None
+
+        if start_time is not None:
+            ghcd['startTime'] = format_bitmex_timestamp(start_time + BITMEX_TF_MINUTES[timeframe] * 60000)
+        if end_time is not None:
+            ghcd['endTime'] = format_bitmex_timestamp(end_time + BITMEX_TF_MINUTES[timeframe] * 60000)
+
+        raw_candles = self._send_trade_request("GET", "/api/v1/trade/bucketed", ghcd)
+
+        candles = []
+
+        if raw_candles is not None:
+            for c in (raw_candles if start_time is not None else reversed(raw_candles)):
+                if c['open'] is None or c['close'] is None:  # Some candles returned by Bitmex miss data
+                    continue
+                candles.append(self._candle(c, timeframe))
+
+        return candles
+
+    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: int, side: str, price=None, tif=None) -> OrderStatus:
+        pod = dict() # Place order data
+
+        pod['symbol'] = contract.symbol
+        pod['side'] = side.capitalize()
+        pod['orderQty'] = round(quantity / contract.lot_size) * contract.lot_size
+        pod['ordType'] = order_type.capitalize()
+
+        if price is not None:
+            pod['crypto_price'] = round(round(price / contract.tick_size) * contract.tick_size, 8)
+
+        if tif is not None:
+            pod['timeInForce'] = tif
+
+        mark_stage(ORDER_SENT)
+        order_status = self._send_trade_request("POST", "/api/v1/order", pod)
+        mark_stage(RESPONSE)
+
+        if order_status is not None:
+            order_status = self._order_status(order_status)
+
+        return order_status
+
+    def get_order_status(self, contract: ExchangeContract, order_id: str) -> OrderStatus:  #Must be same order as in binance connector
+
+        # The websocket keeps the orders up to date, the REST API is only requested when it is not connected
+
+        if self.private_connection and self._has_order_status(order_id):
+            return self._order_status(self._orders[order_id])
+
+        orders_status = self.get_orders_status(contract, [order_id])
+
+        if orders_status is not None:
+            return orders_status.get(order_id)
+
+    def get_orders_status(self, contract: ExchangeContract,
+                          order_ids: typing.List[str]) -> typing.Optional[typing.Dict[str, OrderStatus]]:
+
+        # Status of several orders of a symbol in one request, used by the order tracker
+
+        gosd = dict()
+        gosd['symbol'] = contract.symbol
+        gosd['filter'] = json.dumps({"orderID": list(order_ids)})
+        gosd['count'] = len(order_ids)
+
+        orders = self._send_trade_request("GET", "/api/v1/order", gosd)
+
+        if orders is None:
+            return None
+
+        return {order['orderID']: self._order_status(order) for order in orders}
+
+    def cancel_order(self, order_id: str) -> OrderStatus:
+        cod = dict() #cancel order data
+        cod['orderID'] = order_id
+
+        order_status = self._send_trade_request("DELETE", "/api/v1/order", cod)
+
+        if order_status is not None:
+            order_status = self._order_status(order_status[0])
+
+        return order_status
+
+    def _web_s_open(self):
+        self.ws = websocket.WebSocketApp(self._wss_url, on_open=self._open_confirm, on_close=self._close_confirm,
+                                         on_error=self._ws_connection_failure, on_message=self._on_reponse)
+
+        while True:
+            try:
+                if self.reconnect:
+                    self.ws.run_forever()
+                else:
+                    break
+            except Exception as e:
+                logger.error("Error: request %s", e)
+            if self.reconnect:
+                self.ws_reconnects += 1
+            time.sleep(2)
+
+    def _open_confirm(self, ws):
+        logger.info("Bitmex connection opened")
+
+        self.subscribe_channel("instrument")
+
+        self.subscribe_channel("trade")
+
+        # Private tables: order updates and fills are pushed instead of polled
+
+        self._authenticate()
+
+        for topic in ["order", "execution", "margin"]:
+            self.subscribe_channel(topic)
+
+    def _close_confirm(self, ws, *args, **kwargs):
+        logger.warning("Bitmex Websocket connection closed")
+
+        self.private_connection = False
+        self.order_tracker.set_push_updates(False)
+
+    def _authenticate(self):
+
+        # https://www.bitmex.com/app/wsAPI#API-Keys
+
+        expires = int(time.time()) + 5
+        signature = self._generate_signature("GET", "/realtime", str(expires), dict())
+
+        try:
+            self.ws.send(json.dumps({"op": "authKeyExpires", "args": [self.public_key_bitmex, expires, signature]}))
+        except Exception as e:
+            logger.error("Error while authenticating the Bitmex websocket: %s", e)
+
+    def _update_orders(self, data: typing.List[typing.Dict]):
+
+        # Merge the order / execution rows into the order cache (updates only contain the fields that changed),
+        # the orders that are finished are given to the order tracker
+
+        for d in data:
+            order_id = d.get('orderID')
+            if order_id is None or d.get('execType') == "Funding":
+                continue
+
+            order = self._orders.setdefault(order_id, dict())
+            order.update({k: v for k, v in d.items() if k in ("orderID", "symbol", "ordStatus", "avgPx", "cumQty")
+                          and v is not None})
+
+            if order.get('ordStatus') in BITMEX_FINAL_ORDER_STATUSES:
+                # An order canceled before any fill has no average price (null values are not merged)
+                order.setdefault('avgPx', 0)
+                order.setdefault('cumQty', 0)
+                self.order_tracker.resolve(self._order_status(order))
+                del self._orders[order_id]  # Only the open orders are kept
+
+    def _has_order_status(self, order_id: str) -> bool:
+        order = self._orders.get(order_id)
+        return order is not None and all(k in order for k in ("orderID", "ordStatus", "avgPx", "cumQty"))
+
+    def _update_balances(self, data: typing.List[typing.Dict]):
+        for d in data:
+            if d.get('currency') is None:
+                continue
+
+            self.balance_cache.update(d['currency'], **{attribute: d[field] * BITMEX_MULTIPLIER
+                                                        for field, attribute in BITMEX_MARGIN_FIELDS.items()
+                                                        if d.get(field) is not None})
+
+    def _on_reponse(self, ws, msg: str):
+
+        received = time.perf_counter_ns()
+
+        if self.recorder is not None:
+            self.recorder.record(msg)
+
+        omd = self._decoder.decode(msg)#On message Data
+
+        self.message_counts[omd.get('table', "other")] += 1
+
+        if omd.get('subscribe') == "order" and omd.get('success'):
+            logger.info("Bitmex private tables subscribed")
+            self.private_connection = True
+            self.order_tracker.set_push_updates(True)  # Polling is now only a fallback for missed updates
+
+        elif "error" in omd:
+            logger.error("Bitmex websocket error: %s", omd['error'])
+
+        if "table" in omd:
+            if omd['table'] == "instrument":
+
+                for d in omd['data']:
+
+                    bx_symbol = d['symbol']
+
+                    if bx_symbol not in self.prices:
+                        self.prices[bx_symbol] = {'bid': None, 'ask': None}
+
+                    if 'bidPrice' in d:
+                        self.prices[bx_symbol]['bid'] = d['bidPrice']
+                    if 'askPrice' in d:
+                        self.prices[bx_symbol]['ask'] = d['askPrice']
+
+                    # PNL Calculation
+
+                    for bx_strategy in self._strategies_by_symbol.get(bx_symbol, ()):
+                        for trade in bx_strategy.trigger_book.trades:  # Only the filled open trades
+
+                            if trade.side == "long":
+                                price = self.prices[bx_symbol]['bid']
+                            else:
+                                price = self.prices[bx_symbol]['ask']
+                            multiplier = trade.contract.multiplier
+
+                            if trade.contract.inverse:
+                                if trade.side == "long":
+                                    trade.profitloss = (1 / trade.entry_price - 1 / price) * multiplier * trade.quantity
+                                elif trade.side == "short":
+                                    trade.profitloss = (1 / price - 1 / trade.entry_price) * multiplier * trade.quantity
+                            else:
+                                if trade.side == "long":
+                                    trade.profitloss = (price - trade.entry_price) * multiplier * trade.quantity
+                                elif trade.side == "short":
+                                    trade.profitloss = (trade.entry_price - price) * multiplier * trade.quantity
+
+            if omd['table'] in ("order", "execution"):
+                self._update_orders(omd['data'])
+
+            if omd['table'] == "margin":
+                self._update_balances(omd['data'])
+
+            if omd['table'] == "trade":
+
+                for d in omd['data']:  # BitmexTrade records
+
+                    symbol_feeds = self._symbol_feeds.get(d.symbol)
+
+                    if symbol_feeds is not None:
+                        self.latency.begin(d.symbol, d.timestamp, received)
+                        symbol_feeds.on_trade(d.price, d.size, d.timestamp)
+                        self.latency.end()
+
+    def _ws_connection_failure(self, ws, msg: str):
+        logger.error("Bitmex connection error: %s", msg)
+
+    def subscribe_channel(self, topic: str):
+        scd = dict() #subscribe channel data
+        scd['op'] = "subscribe"
+        scd['args'] = []
+        scd['args'].append(topic)
+
+        try:
+            self.ws.send(json.dumps(scd))
+        except Exception as e:
+            logger.error("Error subscribing to %s: %s", topic, e)
+
+
+
+
+
+
+
+
+
+
+
+
+
+
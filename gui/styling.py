@@ -1,21 +1,21 @@
-from matplotlib import style
-"""
-global styling variables that will be used for multiple components.
-"""
-style.use("dark_background")
-backgound_color = "gray12"
-background_color_2 = "#1c2c5c"
-background_color_3 = "#2d5373"
-foreground_color = "white"
-ufo_green = "#7bed9f"#"Lime" #SteelBlue1
-plastic_pink = "#ff3a40"
-proton_purple = "#ff1e76"
-red_color = "#ca0000"
-foreground_color_3 = ("Calibri", 11, "normal", "white")
-foreground_color_4 = "#70a1ff" #75e0dd #SteelBlue1
-foreground_color_binance = "#efb90a"
-LARGE_FONT = ("Verdana", 12)
-LARGE_FONT2 = ("Calibri", 20, "normal")
-main_font = ("Calibri", 11, "normal")
-BOLD_FONT = ("Calibri", 11, "bold")
-BOLD_FONT2 = ("Calibri", 20, "bold")
+from matplotlib import style
+"""
+global styling variables that will be used for multiple components.
+"""
+style.use("dark_background")
+backgound_color = "gray12"
+background_color_2 = "#1c2c5c"
+background_color_3 = "#2d5373"
+foreground_color = "white"
+ufo_green = "#7bed9f"#"Lime" #SteelBlue1
+plastic_pink = "#ff3a40"
+proton_purple = "#ff1e76"
+red_color = "#ca0000"
+foreground_color_3 = ("Calibri", 11, "normal", "white")
+foreground_color_4 = "#70a1ff" #75e0dd #SteelBlue1
+foreground_color_binance = "#efb90a"
+LARGE_FONT = ("Verdana", 12)
+LARGE_FONT2 = ("Calibri", 20, "normal")
+main_font = ("Calibri", 11, "normal")
+BOLD_FONT = ("Calibri", 11, "bold")
+BOLD_FONT2 = ("Calibri", 20, "bold")
@@ -0,0 +1,135 @@
+import math
+import typing
+
+import pandas as pd
+
+
+# Vectorized indicators computed over a whole series of close prices.
+# These are the reference definitions: the streaming classes below must give the same values.
+
+def macd_series(closes: pd.Series, ema_fast: int, ema_slow: int, ema_signal: int) -> typing.Tuple[pd.Series, pd.Series]:
+
+    # Compute the MACD and its Signal line.
+
+    fast = closes.ewm(span=ema_fast).mean()  # Exponential Moving Average
+    slow = closes.ewm(span=ema_slow).mean()
+
+    macd_line = fast - slow
+    macd_signal = macd_line.ewm(span=ema_signal).mean()
+
+    return macd_line, macd_signal
+
+
+def rsi_series(closes: pd.Series, rsi_length: int) -> pd.Series:
+
+    # Compute the Relative Strength Index.
+
+    # Find the difference between the row before and the current
+    delta_value = closes.diff().dropna()
+
+    down, up = delta_value.copy(), delta_value.copy()
+    down[down > 0] = 0  # only negative are kept
+    up[up < 0] = 0
+
+    avg_gain = up.ewm(com=(rsi_length - 1), min_periods=rsi_length).mean()
+    avg_loss = down.abs().ewm(com=(rsi_length - 1), min_periods=rsi_length).mean()
+
+    rs = avg_gain / avg_loss  # Relative Strength
+
+    rsi = 100 - 100 / (1 + rs)
+    rsi = rsi.round(2)
+
+    return rsi.reindex(closes.index)
+
+
+# Streaming indicators: the state is updated in constant time when a candle closes.
+# The recursion is the one used by pandas for ewm(adjust=True).mean(), so the values match the series above.
+
+class StreamingEma:
+    def __init__(self, alpha: float, min_periods: int = 0):
+        self._old_wt_factor = 1 - alpha
+        self._min_periods = max(min_periods, 1)
+
+        self._weighted = math.nan
+        self._old_wt = 1.0
+        self.nobs = 0
+
+        self.value = math.nan
+
+    @classmethod
+    def from_span(cls, span: int, min_periods: int = 0) -> "StreamingEma":
+        return cls(2 / (span + 1), min_periods)
+
+    @classmethod
+    def from_com(cls, com: float, min_periods: int = 0) -> "StreamingEma":
+        return cls(1 / (1 + com), min_periods)
+
+    def update(self, x: float) -> float:
+
+        self.nobs += 1
+
+        if self.nobs == 1:
+            self._weighted = x
+        else:
+            self._old_wt *= self._old_wt_factor
+            if self._weighted != x:
+                self._weighted = (self._old_wt * self._weighted + x) / (self._old_wt + 1)
+            self._old_wt += 1
+
+        self.value = self._weighted if self.nobs >= self._min_periods else math.nan
+
+        return self.value
+
+
+class StreamingMacd:
+    def __init__(self, ema_fast: int, ema_slow: int, ema_signal: int):
+        self._fast = StreamingEma.from_span(ema_fast)
+        self._slow = StreamingEma.from_span(ema_slow)
+        self._signal = StreamingEma.from_span(ema_signal)
+
+        self.macd_line = math.nan
+        self.macd_signal = math.nan
+
+    def update(self, close: float) -> typing.Tuple[float, float]:
+        self.macd_line = self._fast.update(close) - self._slow.update(close)
+        self.macd_signal = self._signal.update(self.macd_line)
+
+        return self.macd_line, self.macd_signal
+
+
+class StreamingRsi:
+    def __init__(self, rsi_length: int):
+        self._avg_gain = StreamingEma.from_com(rsi_length - 1, min_periods=rsi_length)
+        self._avg_loss = StreamingEma.from_com(rsi_length - 1, min_periods=rsi_length)
+
+        self._previous_close = None
+
+        self.value = math.nan
+
+    def update(self, close: float) -> float:
+
+        if self._previous_close is None:  # The first close has no difference, like diff().dropna()
+            self._previous_close = close
+            return self.value
+
+        delta_value = close - self._previous_close
+        self._previous_close = close
+
+        avg_gain = self._avg_gain.update(delta_value if delta_value > 0 else 0.0)
+        avg_loss = self._avg_loss.update(-delta_value if delta_value < 0 else 0.0)
+
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            self.value = math.nan
+            return self.value
+
+        if avg_loss == 0:  # Same results as the float division by zero in pandas
+            rs = math.inf if avg_gain > 0 else math.nan
+        else:
+            rs = avg_gain / avg_loss  # Relative Strength
+
+        rsi = 100 - 100 / (1 + rs)
+
+        # Rounds half to even like pandas round(2)
+        self.value = round(rsi * 100) / 100 if math.isfinite(rsi) else rsi
+
+        return self.value
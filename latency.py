@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+import typing
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# Stages of a trade on its way to an order, in microseconds:
+# RECEIVE: exchange event time (T of aggTrade, timestamp of a Bitmex trade) to local receipt, on the client clock
+# The next ones are measured on the monotonic clock from the receipt of the frame:
+# PARSED: the candles are updated and the strategy is notified
+# SIGNAL: the strategy decided to open a position or to close a trade (Take profit / Stop loss)
+# ORDER_SENT: the order request is sent
+# RESPONSE: the REST response of the order is received
+RECEIVE = "receive"
+PARSED = "parsed"
+SIGNAL = "signal"
+ORDER_SENT = "order_sent"
+RESPONSE = "response"
+
+STAGES = (RECEIVE, PARSED, SIGNAL, ORDER_SENT, RESPONSE)
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# The percentiles of each histogram are logged at this interval, None to never log them
+LATENCY_DUMP_SECONDS = 60.0
+
+# A bucket covers 1 / 2 ** SUB_BUCKET_BITS of its value (3%), values below 2 ** (SUB_BUCKET_BITS + 1) are exact
+SUB_BUCKET_BITS = 5
+
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_BUCKETS = 2 * _SUB_BUCKETS
+
+
+class LatencyHistogram:
+    def __init__(self):
+
+        # Latencies in microseconds in log-linear buckets, like HdrHistogram: the relative precision is the same from
+        # microseconds to minutes and recording a value is a few integer operations, nothing is allocated.
+
+        self.counts = [0] * _LINEAR_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min: typing.Optional[int] = None
+        self.max = 0
+
+    def record(self, value: int):
+        if value < 0:  # Clocks of the exchange and of the machine are not exactly in sync
+            value = 0
+
+        if value < _LINEAR_BUCKETS:
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @staticmethod
+    def _bucket_value(index: int) -> int:
+
+        # Highest value of a bucket
+
+        if index < _LINEAR_BUCKETS:
+            return index
+
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        return ((index - (shift << SUB_BUCKET_BITS) + 1) << shift) - 1
+
+    def percentiles(self, percentiles: typing.Iterable[float] = DEFAULT_PERCENTILES) -> typing.Dict[float, int]:
+        percentiles = tuple(percentiles)
+
+        if self.count == 0:
+            return {p: 0 for p in percentiles}
+
+        cumulative = np.cumsum(self.counts)
+        targets = np.maximum(np.ceil(np.array(percentiles) / 100 * cumulative[-1]), 1)
+        indexes = np.searchsorted(cumulative, targets)
+
+        return {p: min(self._bucket_value(int(i)), self.max) for p, i in zip(percentiles, indexes)}
+
+    def percentile(self, percentile: float) -> int:
+        return self.percentiles((percentile,))[percentile]
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+
+class _Tick:
+    __slots__ = ("tracker", "symbol", "received", "strategy")
+
+    def __init__(self, tracker: "LatencyTracker", symbol: str, received: int):
+        self.tracker = tracker
+        self.symbol = symbol
+        self.received = received
+        self.strategy = ""
+
+
+# Trade being processed by the websocket thread of a client, see LatencyTracker.begin() and mark_stage()
+_current = threading.local()
+
+
+def mark_stage(stage: str, strategy: typing.Optional[str] = None):
+
+    # Records the time since the receipt of the trade being processed in this thread, nothing when there is none
+    # (backtests, tests, orders placed from the GUI).
+    # strategy: the strategy the stage belongs to, the strategy of the last SIGNAL by default.
+    # A SIGNAL makes the strategy the owner of the next ORDER_SENT and RESPONSE.
+
+    tick = getattr(_current, "tick", None)
+    if tick is None:
+        return
+
+    if strategy is None:
+        strategy = tick.strategy
+    elif stage == SIGNAL:
+        tick.strategy = strategy
+
+    tick.tracker.record(stage, tick.symbol, strategy, (time.perf_counter_ns() - tick.received) // 1000)
+
+
+class LatencyTracker:
+    def __init__(self, exchange: str, clock: typing.Callable[[], float] = time.time,
+                 dump_interval: typing.Optional[float] = LATENCY_DUMP_SECONDS):
+
+        # Latency histograms of the trades of a client, by (stage, symbol, strategy).
+        # The RECEIVE and the stages of the trades that no strategy uses have no strategy ("").
+        # clock: current time in seconds, compared with the exchange event time, see the clock of the clients
+
+        self.exchange = exchange
+        self.clock = clock
+        self.dump_interval = dump_interval
+
+        # Replaced when a key is added and never modified in place, so another thread can read the histograms
+        self._histograms: typing.Dict[typing.Tuple[str, str, str], LatencyHistogram] = dict()
+        self._next_dump = time.monotonic() + dump_interval if dump_interval is not None else None
+
+    def record(self, stage: str, symbol: str, strategy: str, value: int):
+        histogram = self._histograms.get((stage, symbol, strategy))
+
+        if histogram is None:
+            histogram = LatencyHistogram()
+            self._histograms = {**self._histograms, (stage, symbol, strategy): histogram}
+
+        histogram.record(value)
+
+    def begin(self, symbol: str, event_time: int, received: int):
+
+        # Called by the websocket thread before a trade is given to the candle feeds, until end().
+        # event_time: exchange time of the trade in milliseconds
+        # received: time.perf_counter_ns() when the frame was received
+
+        self.record(RECEIVE, symbol, "", int(self.clock() * 1000000) - event_time * 1000)
+        _current.tick = _Tick(self, symbol, received)
+
+    def end(self):
+        _current.tick = None
+
+        if self._next_dump is not None and time.monotonic() >= self._next_dump:
+            self._next_dump = time.monotonic() + self.dump_interval
+            self.dump()
+
+    def histogram(self, stage: str, symbol: str, strategy: str = "") -> typing.Optional[LatencyHistogram]:
+        return self._histograms.get((stage, symbol, strategy))
+
+    def percentiles(self, stage: str, symbol: str, strategy: str = "",
+                    percentiles: typing.Iterable[float] = DEFAULT_PERCENTILES) -> typing.Dict[float, float]:
+
+        # Percentiles in milliseconds, empty when nothing was recorded
+
+        histogram = self._histograms.get((stage, symbol, strategy))
+        if histogram is None:
+            return dict()
+
+        return {p: value / 1000 for p, value in histogram.percentiles(percentiles).items()}
+
+    def summary(self, percentiles: typing.Iterable[float] = DEFAULT_PERCENTILES) \
+            -> typing.Dict[typing.Tuple[str, str, str], typing.Dict[str, float]]:
+
+        # Count, mean, max and percentiles in milliseconds of every histogram, by (stage, symbol, strategy)
+
+        percentiles = tuple(percentiles)
+        summary = dict()
+
+        for key, histogram in sorted(self._histograms.items(), key=lambda item: (item[0][1], item[0][2],
+                                                                                  STAGES.index(item[0][0]))):
+            values = {"count": histogram.count, "mean": histogram.mean() / 1000, "max": histogram.max / 1000}
+            for p, value in histogram.percentiles(percentiles).items():
+                values["p%g" % p] = value / 1000
+            summary[key] = values
+
+        return summary
+
+    def dump(self):
+        for (stage, symbol, strategy), values in self.summary().items():
+            logger.info("%s latency %s %s %s: %s", self.exchange, symbol, strategy or "-", stage,
+                        " ".join("%s=%.3f" % (name, value) if name != "count" else "count=%d" % value
+                                 for name, value in values.items()))
@@ -9,6 +9,8 @@ from tkinter.ttk import Style
 
 from exchanges.bitmex import BitmexClient
 from exchanges.binance import BinanceClient
+from candle_cache import CandleCache
+from metrics import start_metrics_server
 
 
 from gui.process_log import ProcessLog
@@ -20,6 +22,7 @@ import matplotlib
 from matplotlib import pyplot as plt
 
 import datetime
+import time
 import tkmacosx as tkmac
 
 import requests
@@ -267,6 +270,14 @@ class TradeKingRoot(tk.Tk):
         self._user_trades = UserTrades(self._strategy_tradeswatch, bg=backgound_color)
         self._user_trades.pack(side=tk.TOP, pady=15)
 
+        # Duration of the gui updates, for the metrics
+        self.gui_update_seconds = 0.0
+        self.gui_update_total_seconds = 0.0
+        self.gui_updates = 0
+
+        # Prometheus metrics of the clients and of the gui when TRADEKING_METRICS_PORT is set, see metrics.py
+        self.metrics_server = start_metrics_server([self.binance, self.bitmex], self)
+
         self.gui_update()  # Starts the infinite gui update loop
 
 
@@ -277,6 +288,8 @@ class TradeKingRoot(tk.Tk):
         #Tk elements from another thread such as the websocket
         #called every 1500 seconds
 
+        start = time.perf_counter()
+
         # Logs
 
         for log in self.bitmex.logs:
@@ -368,6 +381,10 @@ class TradeKingRoot(tk.Tk):
         except RuntimeError as e:
             info_log.error("Error: watchlist dictionary loop failed: %s", e)
 
+        self.gui_update_seconds = time.perf_counter() - start
+        self.gui_update_total_seconds += self.gui_update_seconds
+        self.gui_updates += 1
+
         self.after(1500, self.gui_update)
 
     def _open_graphs(self):
@@ -441,6 +458,12 @@ class TradeKingRoot(tk.Tk):
             self.bitmex.reconnect = False
             self.binance.web_s.close()
             self.bitmex.ws.close()
+            self.binance.order_tracker.stop()
+            self.bitmex.order_tracker.stop()
+            self.binance.balance_cache.stop()
+            self.bitmex.balance_cache.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
 
             self.destroy()  # Destroys the UI and terminates the program as no other thread is running
 
@@ -845,8 +868,11 @@ def go_binance(secret_key, public_key):
     logger.addHandler(stream_handler)
     logger.addHandler(file_handler)
 
-    binance = BinanceClient(secret_key, public_key, testnet=True, futures=True)
-    bitmex = BitmexClient(" ", " ", testnet=False)
+    # History of the strategies kept on disk by both clients, see candle_cache.py
+    candle_cache = CandleCache()
+
+    binance = BinanceClient(secret_key, public_key, testnet=True, futures=True, candle_cache=candle_cache)
+    bitmex = BitmexClient(" ", " ", testnet=False, candle_cache=candle_cache)
 
     trading_bot_root = TradeKingRoot(binance, bitmex)
     trading_bot_root.mainloop()
@@ -872,8 +898,11 @@ def go_bitmex(secret_key, public_key):
     logger.addHandler(stream_handler)
     logger.addHandler(file_handler)
 
-    binance = BinanceClient(" ", " ", testnet=False, futures=False)
-    bitmex = BitmexClient(secret_key, public_key, testnet=True)
+    # History of the strategies kept on disk by both clients, see candle_cache.py
+    candle_cache = CandleCache()
+
+    binance = BinanceClient(" ", " ", testnet=False, futures=False, candle_cache=candle_cache)
+    bitmex = BitmexClient(secret_key, public_key, testnet=True, candle_cache=candle_cache)
 
     trading_bot_root = TradeKingRoot(binance, bitmex)
     trading_bot_root.mainloop()
@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+import typing
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if typing.TYPE_CHECKING:
+    from exchanges.binance import BinanceClient
+    from exchanges.bitmex import BitmexClient
+
+logger = logging.getLogger()
+
+# The metrics server is started by the gui when this environment variable holds a port, see start_metrics_server()
+METRICS_PORT_VARIABLE = "TRADEKING_METRICS_PORT"
+METRICS_HOST = "127.0.0.1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Client = typing.Union["BinanceClient", "BitmexClient"]
+Sample = typing.Tuple[typing.Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_metric(name: str, metric_type: str, help_text: str, samples: typing.Iterable[Sample]) -> str:
+
+    # One metric in the Prometheus text format
+
+    lines = ["# HELP %s %s" % (name, help_text), "# TYPE %s %s" % (name, metric_type)]
+
+    for labels, value in samples:
+        if len(labels) > 0:
+            label_str = ",".join('%s="%s"' % (key, _escape(value)) for key, value in labels.items())
+            lines.append("%s{%s} %r" % (name, label_str, float(value)))
+        else:
+            lines.append("%s %r" % (name, float(value)))
+
+    return "\n".join(lines) + "\n"
+
+
+def _client_samples(clients: typing.List[Client]) -> typing.Dict[str, typing.List[Sample]]:
+    samples = {name: [] for name in ("messages", "reconnects", "rest_requests", "rest_errors", "open_trades", "pnl",
+                                     "candles", "latency", "latency_count")}
+
+    for client in clients:
+        exchange = client.platform
+
+        for channel, count in list(client.message_counts.items()):
+            samples["messages"].append(({"exchange": exchange, "channel": channel}, count))
+
+        samples["reconnects"].append(({"exchange": exchange}, client.ws_reconnects))
+
+        transport = getattr(client, "transport", None)  # None for the replay clients
+        if transport is not None:
+            for key, stats in transport.latency_stats().items():
+                method, _, endpoint = key.partition(" ")
+                labels = {"exchange": exchange, "method": method, "endpoint": endpoint}
+                samples["rest_requests"].append((labels, stats["count"]))
+                samples["rest_errors"].append((labels, stats["errors"]))
+
+        for b_index, strategy in list(client.strategies.items()):
+            labels = {"exchange": exchange, "strategy_id": b_index, "strategy": strategy.latency_name,
+                      "symbol": strategy.contract.symbol}
+            trades = list(strategy.trades)
+            samples["open_trades"].append((labels, sum(1 for trade in trades if trade.status == "open")))
+            samples["pnl"].append((labels, sum(trade.profitloss for trade in trades)))
+
+        for symbol, symbol_feeds in list(client._symbol_feeds.items()):
+            for timeframe, feed in list(symbol_feeds.feeds.items()):
+                samples["candles"].append(({"exchange": exchange, "symbol": symbol, "timeframe": timeframe},
+                                           len(feed.candles)))
+
+        for (stage, symbol, strategy), values in client.latency.summary().items():
+            labels = {"exchange": exchange, "symbol": symbol, "strategy": strategy, "stage": stage}
+            for name, value in values.items():
+                if name.startswith("p"):
+                    quantile = float(name[1:]) / 100
+                    samples["latency"].append(({**labels, "quantile": "%g" % quantile}, value / 1000))
+            samples["latency_count"].append((labels, values["count"]))
+
+    return samples
+
+
+def collect(clients: typing.List[Client], gui=None) -> str:
+
+    # Prometheus text exposition of the clients and of the gui (TradeKingRoot) at the time of the call
+
+    samples = _client_samples(clients)
+
+    metrics = [
+        ("tradeking_websocket_messages_total", "counter", "Websocket messages received by channel",
+         samples["messages"]),
+        ("tradeking_websocket_reconnects_total", "counter", "Websocket connections lost and opened again",
+         samples["reconnects"]),
+        ("tradeking_rest_requests_total", "counter", "REST requests sent by endpoint", samples["rest_requests"]),
+        ("tradeking_rest_errors_total", "counter", "REST requests that failed or did not return 200, by endpoint",
+         samples["rest_errors"]),
+        ("tradeking_open_trades", "gauge", "Open trades of a strategy", samples["open_trades"]),
+        ("tradeking_strategy_pnl", "gauge", "Profit and loss of the trades of a strategy, in the margin asset",
+         samples["pnl"]),
+        ("tradeking_candles", "gauge", "Candles held by a candle feed", samples["candles"]),
+        ("tradeking_tick_latency_seconds", "gauge", "Latency percentiles from the exchange trade, see latency.py",
+         samples["latency"]),
+        ("tradeking_tick_latency_count", "counter", "Trades measured by the latency histograms",
+         samples["latency_count"]),
+    ]
+
+    if gui is not None:
+        metrics += [
+            ("tradeking_gui_update_seconds", "gauge", "Duration of the last gui update",
+             [({}, gui.gui_update_seconds)]),
+            ("tradeking_gui_update_seconds_total", "counter", "Total duration of the gui updates",
+             [({}, gui.gui_update_total_seconds)]),
+            ("tradeking_gui_updates_total", "counter", "Gui updates", [({}, gui.gui_updates)]),
+        ]
+
+    return "".join(_format_metric(*metric) for metric in metrics)
+
+
+class MetricsServer:
+    def __init__(self, clients: typing.List[Client], gui=None, host: str = METRICS_HOST, port: int = 0):
+
+        # Serves collect() at /metrics for Prometheus, from a background thread.
+        # The metrics are read from the clients when scraped, nothing is added to the websocket threads.
+        # port 0 picks a free port, see the port attribute once started.
+
+        self.clients = clients
+        self.gui = gui
+        self.host = host
+        self.port = port
+
+        self._server: typing.Optional[ThreadingHTTPServer] = None
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return "http://%s:%s/metrics" % (self.host, self.port)
+
+    def start(self) -> "MetricsServer":
+        metrics_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                try:
+                    body = collect(metrics_server.clients, metrics_server.gui).encode()
+                except Exception as e:
+                    logger.error("Error while collecting the metrics: %s", e)
+                    self.send_error(500)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # One line per scrape otherwise
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+        logger.info("Metrics available at %s", self.url)
+
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+
+def start_metrics_server(clients: typing.List[Client], gui=None) -> typing.Optional[MetricsServer]:
+
+    # Metrics server on the port of TRADEKING_METRICS_PORT, None when it is not set or the port is not available
+
+    port = os.environ.get(METRICS_PORT_VARIABLE)
+    if not port:
+        return None
+
+    try:
+        return MetricsServer(clients, gui, port=int(port)).start()
+    except (ValueError, OSError) as e:
+        logger.error("Metrics server not started on port %s: %s", port, e)
+        return None
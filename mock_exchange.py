@@ -0,0 +1,667 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import socket
+import threading
+import time
+import typing
+
+from aiohttp import web, WSMsgType
+
+from decoding import format_bitmex_timestamp, parse_bitmex_timestamp
+from models import BITMEX_TF_MINUTES
+
+logger = logging.getLogger()
+
+# Contracts listed by the mock exchange, as returned by /fapi/v1/exchangeInfo and /api/v1/instrument/active
+BINANCE_CONTRACTS = [
+    {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 1, 'quantityPrecision': 3,
+     'status': "TRADING"},
+    {'symbol': "ETHUSDT", 'baseAsset': "ETH", 'quoteAsset': "USDT", 'pricePrecision': 2, 'quantityPrecision': 3,
+     'status': "TRADING"},
+]
+BITMEX_CONTRACTS = [
+    {'symbol': "XBTUSD", 'rootSymbol': "XBT", 'quoteCurrency': "USD", 'tickSize': 0.5, 'lotSize': 100,
+     'isQuanto': False, 'isInverse': True, 'multiplier': -100000000, 'state': "Open"},
+    {'symbol': "ETHUSD", 'rootSymbol': "ETH", 'quoteCurrency': "USD", 'tickSize': 0.05, 'lotSize': 1,
+     'isQuanto': True, 'isInverse': False, 'multiplier': 100, 'state': "Open"},
+]
+START_PRICES = {"BTCUSDT": 30000.0, "ETHUSDT": 2000.0, "XBTUSD": 30000.0, "ETHUSD": 2000.0}
+
+# Balance of the mock account: USDT on Binance, XBT on Bitmex (pushed in satoshis like the real margin table)
+MOCK_BALANCES = {"binance": 10000.0, "bitmex": 1.0}
+
+BINANCE_TF_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "4h": 14400, "1d": 86400}
+
+# The trades and quotes are generated in batches at this interval (seconds), the rates are spread over the batches
+STREAM_INTERVAL = 0.005
+
+
+class _Market:
+    def __init__(self, symbol: str, tick_size: float, lot_size: float, rng: random.Random):
+
+        # Random walk of the last price of a symbol, the spread is one tick
+
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.decimals = max(0, -int(math.floor(math.log10(tick_size) + 0.5)))  # Price decimals of the frames
+        self.price = START_PRICES.get(symbol, 100.0)
+        self._rng = rng
+
+    def step(self) -> float:
+        price = self.price * (1 + self._rng.gauss(0, 0.0002))
+        self.price = max(self.tick_size, round(price / self.tick_size) * self.tick_size)
+        return self.price
+
+    @property
+    def bid(self) -> float:
+        return self.price - self.tick_size
+
+    @property
+    def ask(self) -> float:
+        return self.price + self.tick_size
+
+
+def synthetic_candle(symbol: str, timestamp: int, interval: int) -> typing.Tuple[float, float, float, float, float]:
+
+    # (open, high, low, close, volume) of the history candle opened at timestamp (milliseconds).
+    # The history is a function of the time only, so the same candles are returned by every request.
+
+    base = START_PRICES.get(symbol, 100.0)
+
+    def price(t: int) -> float:
+        return base * (1 + 0.03 * math.sin(t / 7.3e6) + 0.004 * math.sin(t / 4.1e5))
+
+    open_price = price(timestamp)
+    close = price(timestamp + interval)
+    middle = price(timestamp + interval // 2)
+    volume = 10 + 5 * math.sin(timestamp / 1.9e6) + interval / 60000
+
+    return open_price, max(open_price, close, middle), min(open_price, close, middle), close, volume
+
+
+class MockExchange:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, trade_rate: float = 100, quote_rate: float = 100,
+                 seed: int = 0):
+
+        # Local stand-in for the Binance futures and Bitmex APIs used by the clients, REST and websocket on the
+        # same port, so the clients and the strategies can run (and be load tested) without the real exchanges.
+        # BinanceClient(..., base_url=mock.url, wss_url=mock.binance_wss_url)
+        # BitmexClient(..., base_url=mock.url, wss_url=mock.bitmex_wss_url)
+        # Trades and quotes of the listed symbols are generated at trade_rate and quote_rate messages per second
+        # for each exchange, and sent to the connections subscribed to them.
+        # Orders are filled by the generated prices: market orders at once at the bid/ask, limit orders when
+        # the quotes cross them. The fills are pushed to the Binance user data streams and the Bitmex order table.
+        # The signatures are not checked. The server runs on its own event loop thread, see start().
+
+        self.host = host
+        self.port = port
+        self.trade_rate = trade_rate
+        self.quote_rate = quote_rate
+
+        rng = random.Random(seed)
+        self._rng = rng
+        self.markets: typing.Dict[str, typing.Dict[str, _Market]] = {
+            "binance": {c['symbol']: _Market(c['symbol'], 1 / pow(10, c['pricePrecision']),
+                                             1 / pow(10, c['quantityPrecision']), rng) for c in BINANCE_CONTRACTS},
+            "bitmex": {c['symbol']: _Market(c['symbol'], c['tickSize'], c['lotSize'], rng) for c in BITMEX_CONTRACTS}}
+
+        self.balances = dict(MOCK_BALANCES)
+        self.sent = {"trade": 0, "quote": 0}  # Messages sent to the websocket connections
+        self.requests = {"rest": 0, "websocket": 0}
+
+        self._orders: typing.Dict[str, typing.Dict[typing.Any, typing.Dict]] = {"binance": dict(), "bitmex": dict()}
+        self._open_orders: typing.Dict[str, typing.Dict[typing.Any, typing.Dict]] = {"binance": dict(),
+                                                                                       "bitmex": dict()}
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+
+        # Connections and their subscriptions: Binance streams ("btcusdt@aggTrade"), Bitmex tables ("trade")
+        self._binance_streams: typing.Dict[web.WebSocketResponse, typing.Set[str]] = dict()
+        self._binance_users: typing.Set[web.WebSocketResponse] = set()
+        self._bitmex_tables: typing.Dict[web.WebSocketResponse, typing.Set[str]] = dict()
+
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._thread: typing.Optional[threading.Thread] = None
+        self._runner: typing.Optional[web.AppRunner] = None
+        self._stream_task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        return "http://%s:%s" % (self.host, self.port)
+
+    @property
+    def binance_wss_url(self) -> str:
+        return "ws://%s:%s/binance" % (self.host, self.port)
+
+    @property
+    def bitmex_wss_url(self) -> str:
+        return "ws://%s:%s/realtime" % (self.host, self.port)
+
+    def start(self) -> "MockExchange":
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="mock-exchange", daemon=True)
+        self._thread.start()
+
+        asyncio.run_coroutine_threadsafe(self._start(sock), self.loop).result()
+
+        logger.info("Mock exchange listening on %s", self.url)
+
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    async def _start(self, sock: socket.socket):
+        app = web.Application()
+        app.add_routes([
+            web.get("/fapi/v1/exchangeInfo", self._binance_exchange_info),
+            web.get("/fapi/v1/klines", self._binance_klines),
+            web.get("/fapi/v1/ticker/bookTicker", self._binance_book_ticker),
+            web.get("/fapi/v1/account", self._binance_account),
+            web.post("/fapi/v1/order", self._binance_new_order),
+            web.get("/fapi/v1/order", self._binance_get_order),
+            web.delete("/fapi/v1/order", self._binance_cancel_order),
+            web.get("/fapi/v1/openOrders", self._binance_open_orders),
+            web.post("/fapi/v1/listenKey", self._binance_listen_key),
+            web.put("/fapi/v1/listenKey", self._binance_listen_key),
+            web.get("/binance", self._binance_websocket),
+            web.get("/binance/ws/{listen_key}", self._binance_user_websocket),
+            web.get("/api/v1/instrument/active", self._bitmex_instruments),
+            web.get("/api/v1/trade/bucketed", self._bitmex_bucketed),
+            web.get("/api/v1/user/margin", self._bitmex_margin),
+            web.post("/api/v1/order", self._bitmex_new_order),
+            web.get("/api/v1/order", self._bitmex_get_orders),
+            web.delete("/api/v1/order", self._bitmex_cancel_order),
+            web.get("/realtime", self._bitmex_websocket),
+        ])
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+
+        self._stream_task = asyncio.get_running_loop().create_task(self._stream())
+
+    async def _stop(self):
+        self._stream_task.cancel()
+
+        # A connection that stopped reading never answers the close frame, and aiohttp cancels the close of a
+        # connection whose handler is still reading
+        for ws in list(self._binance_streams) + list(self._binance_users) + list(self._bitmex_tables):
+            try:
+                await asyncio.wait_for(ws.close(), 1)
+            except (asyncio.TimeoutError, asyncio.CancelledError, ConnectionError):
+                pass
+
+        await self._runner.cleanup()
+
+    # Generated market data
+
+    async def _stream(self):
+        loop = asyncio.get_running_loop()
+        carry = {"trade": 0.0, "quote": 0.0}
+        last = loop.time()
+
+        while True:
+            await asyncio.sleep(STREAM_INTERVAL)
+
+            now = loop.time()
+            elapsed, last = now - last, now
+
+            for kind, rate in (("trade", self.trade_rate), ("quote", self.quote_rate)):
+                # At most one second of messages is caught up when the loop falls behind
+                carry[kind] = min(carry[kind] + rate * elapsed, max(rate, 1))
+                count = int(carry[kind])
+                carry[kind] -= count
+
+                for exchange, markets in self.markets.items():
+                    symbols = list(markets.values())
+                    for i in range(count):
+                        await self._market_message(exchange, kind, symbols[i % len(symbols)])
+
+    async def _market_message(self, exchange: str, kind: str, market: _Market):
+        if kind == "trade":
+            market.step()
+
+        # The frames are only built for the symbols somebody subscribed to
+        if exchange == "binance":
+            stream = market.symbol.lower() + ("@aggTrade" if kind == "trade" else "@bookTicker")
+            receivers = [ws for ws, streams in self._binance_streams.items() if stream in streams]
+        else:
+            table = "trade" if kind == "trade" else "instrument"
+            receivers = [ws for ws, tables in self._bitmex_tables.items()
+                         if table in tables or table + ":" + market.symbol in tables]
+
+        if len(receivers) > 0:
+            frame = self._market_frame(exchange, kind, market)
+
+            for ws in receivers:
+                await self._send(ws, frame)
+
+            self.sent[kind] += len(receivers)
+
+        if kind == "quote" and len(self._open_orders[exchange]) > 0:
+            await self._match_orders(exchange, market)
+
+    def _market_frame(self, exchange: str, kind: str, market: _Market) -> str:
+        timestamp = int(time.time() * 1000)
+
+        if exchange == "binance":
+            decimals = market.decimals
+
+            if kind == "trade":
+                trade_id = next(self._trade_ids)
+                return ('{"e":"aggTrade","E":%d,"a":%d,"s":"%s","p":"%.*f","q":"%s","f":%d,"l":%d,"T":%d,"m":%s}'
+                        % (timestamp, trade_id, market.symbol, decimals, market.price,
+                           round(market.lot_size * self._rng.randint(1, 100), 8), trade_id, trade_id, timestamp,
+                           "true" if self._rng.random() < 0.5 else "false"))
+
+            return ('{"e":"bookTicker","u":%d,"s":"%s","b":"%.*f","B":"1.000","a":"%.*f","A":"1.000","T":%d,"E":%d}'
+                    % (next(self._trade_ids), market.symbol, decimals, market.bid, decimals, market.ask, timestamp,
+                       timestamp))
+
+        if kind == "trade":
+            return json.dumps({"table": "trade", "action": "insert",
+                               "data": [{"timestamp": format_bitmex_timestamp(timestamp), "symbol": market.symbol,
+                                         "side": "Buy" if self._rng.random() < 0.5 else "Sell",
+                                         "size": market.lot_size * self._rng.randint(1, 100), "price": market.price}]})
+
+        return json.dumps({"table": "instrument", "action": "update",
+                           "data": [{"symbol": market.symbol, "bidPrice": market.bid, "askPrice": market.ask,
+                                     "timestamp": format_bitmex_timestamp(timestamp)}]})
+
+    async def _send(self, ws: web.WebSocketResponse, frame: str):
+        try:
+            await ws.send_str(frame)
+        except (ConnectionError, RuntimeError):  # Closed meanwhile, removed by its handler
+            pass
+
+    # Orders of the mock account
+
+    async def _place(self, exchange: str, symbol: str, side: str, order_type: str, quantity: float,
+                     price: typing.Optional[float]) -> typing.Optional[typing.Dict]:
+        market = self.markets[exchange].get(symbol)
+        if market is None:
+            return None
+
+        order = {'id': next(self._order_ids), 'symbol': symbol, 'side': side.lower(), 'type': order_type.lower(),
+                 'quantity': quantity, 'price': price, 'status': "new", 'average_price': 0.0, 'executed_qty': 0}
+        self._orders[exchange][order['id']] = order
+
+        if order['type'] == "market":
+            await self._fill(exchange, order, market.ask if order['side'] == "buy" else market.bid)
+        elif price is not None and (order['side'] == "buy" and market.ask <= price
+                                    or order['side'] == "sell" and market.bid >= price):
+            await self._fill(exchange, order, price)
+        else:
+            self._open_orders[exchange][order['id']] = order
+
+        return order
+
+    async def _fill(self, exchange: str, order: typing.Dict, price: float):
+        order['status'] = "filled"
+        order['average_price'] = price
+        order['executed_qty'] = order['quantity']
+
+        await self._push_order(exchange, order)
+
+    async def _cancel(self, exchange: str, order_id) -> typing.Optional[typing.Dict]:
+        order = self._orders[exchange].get(order_id)
+
+        if order is not None and self._open_orders[exchange].pop(order_id, None) is not None:
+            order['status'] = "canceled"
+            await self._push_order(exchange, order)
+
+        return order
+
+    async def _match_orders(self, exchange: str, market: _Market):
+        for order in list(self._open_orders[exchange].values()):
+            if order['symbol'] != market.symbol:
+                continue
+
+            if order['side'] == "buy" and market.ask <= order['price'] or \
+                    order['side'] == "sell" and market.bid >= order['price']:
+                del self._open_orders[exchange][order['id']]
+                await self._fill(exchange, order, order['price'])
+
+    async def _push_order(self, exchange: str, order: typing.Dict):
+        if exchange == "binance":
+            frame = json.dumps({"e": "ORDER_TRADE_UPDATE", "E": int(time.time() * 1000), "T": int(time.time() * 1000),
+                                "o": {"s": order['symbol'], "i": order['id'], "S": order['side'].upper(),
+                                      "o": order['type'].upper(), "X": order['status'].upper(),
+                                      "ap": str(order['average_price']), "z": str(order['executed_qty'])}})
+            receivers = list(self._binance_users)
+        else:
+            frame = json.dumps({"table": "order", "action": "update", "data": [self._bitmex_order(order)]})
+            receivers = [ws for ws, tables in self._bitmex_tables.items() if "order" in tables]
+
+        for ws in receivers:
+            await self._send(ws, frame)
+
+    # Binance REST API
+
+    def _binance_order(self, order: typing.Dict) -> typing.Dict:
+        return {'orderId': order['id'], 'symbol': order['symbol'], 'status': order['status'].upper(),
+                'side': order['side'].upper(), 'type': order['type'].upper(), 'origQty': str(order['quantity']),
+                'price': str(order['price'] or 0), 'avgPrice': str(order['average_price']),
+                'executedQty': str(order['executed_qty']), 'updateTime': int(time.time() * 1000)}
+
+    def _binance_error(self, code: int, msg: str) -> web.Response:
+        return web.json_response({'code': code, 'msg': msg}, status=400)
+
+    async def _binance_exchange_info(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        return web.json_response({'timezone': "UTC", 'serverTime': int(time.time() * 1000),
+                                  'symbols': BINANCE_CONTRACTS})
+
+    async def _binance_klines(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        q = request.query
+
+        if q.get('symbol') not in self.markets["binance"] or q.get('interval') not in BINANCE_TF_SECONDS:
+            return self._binance_error(-1121, "Invalid symbol or interval.")
+
+        interval = BINANCE_TF_SECONDS[q['interval']] * 1000
+        limit = min(int(q.get('limit', 500)), 1500)
+        now = int(time.time() * 1000)
+        last = min(int(q.get('endTime', now)), now)
+        last -= last % interval
+
+        if 'startTime' in q:
+            first = -(-int(q['startTime']) // interval) * interval
+            timestamps = range(first, min(last, first + (limit - 1) * interval) + 1, interval)
+        else:
+            timestamps = range(last - (limit - 1) * interval, last + 1, interval)
+
+        decimals = self.markets["binance"][q['symbol']].decimals
+
+        klines = []
+        for ts in timestamps:
+            o, h, low, c, v = synthetic_candle(q['symbol'], ts, interval)
+            klines.append([ts, "%.*f" % (decimals, o), "%.*f" % (decimals, h), "%.*f" % (decimals, low),
+                           "%.*f" % (decimals, c), "%.3f" % v, ts + interval - 1, "0", 0, "0", "0", "0"])
+
+        return web.json_response(klines)
+
+    async def _binance_book_ticker(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        market = self.markets["binance"].get(request.query.get('symbol'))
+
+        if market is None:
+            return self._binance_error(-1121, "Invalid symbol.")
+
+        return web.json_response({'symbol': market.symbol, 'bidPrice': str(market.bid), 'bidQty': "1.000",
+                                  'askPrice': str(market.ask), 'askQty': "1.000", 'time': int(time.time() * 1000)})
+
+    async def _binance_account(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        balance = str(self.balances["binance"])
+        return web.json_response({'assets': [{'asset': "USDT", 'initialMargin': "0", 'maintMargin': "0",
+                                              'marginBalance': balance, 'walletBalance': balance,
+                                              'unrealizedProfit': "0"}]})
+
+    async def _binance_new_order(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        q = request.query
+
+        try:
+            order = await self._place("binance", q['symbol'], q['side'], q['type'], float(q['quantity']),
+                                      float(q['price']) if 'price' in q else None)
+        except (KeyError, ValueError):
+            return self._binance_error(-1102, "Mandatory parameter was not sent or is invalid.")
+
+        if order is None:
+            return self._binance_error(-1121, "Invalid symbol.")
+
+        return web.json_response(self._binance_order(order))
+
+    async def _binance_get_order(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        order = self._orders["binance"].get(int(request.query.get('orderId', 0)))
+
+        if order is None:
+            return self._binance_error(-2013, "Order does not exist.")
+
+        return web.json_response(self._binance_order(order))
+
+    async def _binance_cancel_order(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        order = await self._cancel("binance", int(request.query.get('orderId', 0)))
+
+        if order is None:
+            return self._binance_error(-2011, "Unknown order sent.")
+
+        return web.json_response(self._binance_order(order))
+
+    async def _binance_open_orders(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        symbol = request.query.get('symbol')
+        return web.json_response([self._binance_order(o) for o in self._open_orders["binance"].values()
+                                  if symbol is None or o['symbol'] == symbol])
+
+    async def _binance_listen_key(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        return web.json_response({'listenKey': "mock-listen-key"} if request.method == "POST" else {})
+
+    async def _binance_websocket(self, request: web.Request) -> web.WebSocketResponse:
+
+        # Market streams, subscribed with {"method": "SUBSCRIBE", "params": ["btcusdt@aggTrade"], "id": 1}
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        streams: typing.Set[str] = set()
+        self._binance_streams[ws] = streams
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+
+                self.requests["websocket"] += 1
+                data = json.loads(msg.data)
+                method = data.get('method', data.get('request_type'))  # The client names the field request_type
+
+                if method == "SUBSCRIBE":
+                    streams.update(data.get('params', []))
+                elif method == "UNSUBSCRIBE":
+                    streams.difference_update(data.get('params', []))
+
+                await ws.send_str(json.dumps({'result': None, 'id': data.get('id')}))
+        finally:
+            del self._binance_streams[ws]
+
+        return ws
+
+    async def _binance_user_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        self._binance_users.add(ws)
+
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._binance_users.discard(ws)
+
+        return ws
+
+    # Bitmex REST API
+
+    def _bitmex_order(self, order: typing.Dict) -> typing.Dict:
+        return {'orderID': str(order['id']), 'symbol': order['symbol'], 'side': order['side'].capitalize(),
+                'ordType': order['type'].capitalize(), 'orderQty': order['quantity'], 'price': order['price'],
+                'ordStatus': order['status'].capitalize(), 'avgPx': order['average_price'],
+                'cumQty': order['executed_qty'], 'timestamp': format_bitmex_timestamp(int(time.time() * 1000))}
+
+    def _bitmex_error(self, status: int, message: str) -> web.Response:
+        return web.json_response({'error': {'message': message, 'name': "HTTPError"}}, status=status)
+
+    async def _bitmex_instruments(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        return web.json_response(BITMEX_CONTRACTS)
+
+    async def _bitmex_bucketed(self, request: web.Request) -> web.Response:
+
+        # The bucket timestamps are the end of the candles, the last bucket is the candle in progress
+
+        self.requests["rest"] += 1
+        q = request.query
+
+        if q.get('symbol') not in self.markets["bitmex"] or q.get('binSize') not in BITMEX_TF_MINUTES:
+            return self._bitmex_error(400, "Invalid symbol or binSize")
+
+        interval = BITMEX_TF_MINUTES[q['binSize']] * 60000
+        count = min(int(q.get('count', 100)), 1000)
+        now = int(time.time() * 1000)
+        last = now - now % interval + interval
+
+        if 'endTime' in q:
+            last = min(last, parse_bitmex_timestamp(q['endTime']) // interval * interval)
+
+        if 'startTime' in q:
+            first = -(-parse_bitmex_timestamp(q['startTime']) // interval) * interval
+        else:
+            first = last - (count - 1) * interval
+
+        if q.get('reverse', "false").lower() == "true":
+            ends = range(last, max(first, last - (count - 1) * interval) - 1, -interval)
+        else:
+            ends = range(first, min(last, first + (count - 1) * interval) + 1, interval)
+
+        tick = self.markets["bitmex"][q['symbol']].tick_size
+
+        buckets = []
+        for end in ends:
+            candle = synthetic_candle(q['symbol'], end - interval, interval)
+            o, h, low, c = (round(price / tick) * tick for price in candle[:4])
+            buckets.append({'timestamp': format_bitmex_timestamp(end), 'symbol': q['symbol'], 'open': o, 'high': h,
+                            'low': low, 'close': c, 'trades': 10, 'volume': round(candle[4] * 1000)})
+
+        return web.json_response(buckets)
+
+    async def _bitmex_margin(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        satoshis = int(self.balances["bitmex"] * 100000000)
+        return web.json_response([{'currency': "XBt", 'initMargin': 0, 'maintMargin': 0, 'marginBalance': satoshis,
+                                   'walletBalance': satoshis, 'unrealisedPnl': 0}])
+
+    async def _bitmex_new_order(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        q = request.query
+        price = q.get('price', q.get('crypto_price'))  # The client names the price crypto_price
+
+        try:
+            order = await self._place("bitmex", q['symbol'], q['side'], q['ordType'], float(q['orderQty']),
+                                      float(price) if price is not None else None)
+        except (KeyError, ValueError):
+            return self._bitmex_error(400, "Missing or invalid parameter")
+
+        if order is None:
+            return self._bitmex_error(404, "Instrument not listed for trading yet")
+
+        return web.json_response(self._bitmex_order(order))
+
+    async def _bitmex_get_orders(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        order_ids = json.loads(request.query.get('filter', "{}")).get('orderID', [])
+
+        if isinstance(order_ids, str):
+            order_ids = [order_ids]
+
+        orders = [self._orders["bitmex"].get(int(order_id)) for order_id in order_ids]
+        return web.json_response([self._bitmex_order(o) for o in orders if o is not None])
+
+    async def _bitmex_cancel_order(self, request: web.Request) -> web.Response:
+        self.requests["rest"] += 1
+        order = await self._cancel("bitmex", int(request.query.get('orderID', 0)))
+
+        if order is None:
+            return self._bitmex_error(404, "Not Found")
+
+        return web.json_response([self._bitmex_order(order)])
+
+    async def _bitmex_websocket(self, request: web.Request) -> web.WebSocketResponse:
+
+        # Tables subscribed with {"op": "subscribe", "args": ["trade"]}, "trade:XBTUSD" for one symbol
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        tables: typing.Set[str] = set()
+        self._bitmex_tables[ws] = tables
+
+        await ws.send_str(json.dumps({'info': "Welcome to the mock exchange", 'version': "mock",
+                                      'timestamp': format_bitmex_timestamp(int(time.time() * 1000))}))
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+
+                self.requests["websocket"] += 1
+                data = json.loads(msg.data)
+
+                if data.get('op') == "subscribe":
+                    for table in data.get('args', []):
+                        tables.add(table)
+                        await ws.send_str(json.dumps({'success': True, 'subscribe': table, 'request': data}))
+
+                elif data.get('op') == "unsubscribe":
+                    for table in data.get('args', []):
+                        tables.discard(table)
+                        await ws.send_str(json.dumps({'success': True, 'unsubscribe': table, 'request': data}))
+
+                elif data.get('op') == "authKeyExpires":
+                    await ws.send_str(json.dumps({'success': True, 'request': data}))
+
+                else:
+                    await ws.send_str(json.dumps({'error': "Unknown or expired command.", 'request': data}))
+        finally:
+            del self._bitmex_tables[ws]
+
+        return ws
+
+
+def main(argv: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local mock of the Binance futures and Bitmex APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--trade-rate", type=float, default=1000, help="Trades per second and exchange")
+    parser.add_argument("--quote-rate", type=float, default=1000, help="Quotes per second and exchange")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s :: %(message)s")
+
+    mock = MockExchange(args.host, args.port, args.trade_rate, args.quote_rate, args.seed).start()
+
+    print("REST: %s  Binance websocket: %s  Bitmex websocket: %s" % (mock.url, mock.binance_wss_url,
+                                                                     mock.bitmex_wss_url))
+
+    try:
+        while True:
+            sent = sum(mock.sent.values())
+            time.sleep(10)
+            logger.info("%.0f messages/s sent, %s REST requests", (sum(mock.sent.values()) - sent) / 10,
+                        mock.requests["rest"])
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
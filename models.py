@@ -1,123 +1,228 @@
-import datetime
-import dateutil.parser
-
-BITMEX_TF_MINUTES = {"1m": 1, "5m": 5, "1h": 60, "1d": 1440}
-#SAtoshi numbers
-BITMEX_MULTIPLIER = 0.00000001
-
-
-class Candle:
-    def __init__(self, candle_info, timeframe, exchange):
-        if exchange in ["binance_futures", "binance_spot"]:
-            self.timestamp = candle_info[0]
-            self.open = float(candle_info[1])
-            self.high = float(candle_info[2])
-            self.low = float(candle_info[3])
-            self.close = float(candle_info[4])
-            self.volume = float(candle_info[5])
-
-        elif exchange == "bitmex":
-            self.timestamp = dateutil.parser.isoparse(candle_info['timestamp'])
-            self.timestamp = self.timestamp - datetime.timedelta(minutes=BITMEX_TF_MINUTES[timeframe])
-            self.timestamp = int(self.timestamp.timestamp() * 1000)
-            self.open = candle_info['open']
-            self.high = candle_info['high']
-            self.low = candle_info['low']
-            self.close = candle_info['close']
-            self.volume = candle_info['volume']
-
-        elif exchange == "parse_trade":
-            self.timestamp = candle_info['ts']
-            self.open = candle_info['open']
-            self.high = candle_info['high']
-            self.low = candle_info['low']
-            self.close = candle_info['close']
-            self.volume = candle_info['volume']
-
-class Balance:
-    def __init__(self, info, exchange):
-        if exchange == "binance_futures":
-            self.initial_margin = float(info['initialMargin'])
-            self.maintenance_margin = float(info['maintMargin'])
-            self.margin_balance = float(info['marginBalance'])
-            self.wallet_balance = float(info['walletBalance'])
-            self.unrealized_pnl = float(info['unrealizedProfit'])
-
-        elif exchange == "bitmex":
-            self.initial_margin = info['initMargin'] * BITMEX_MULTIPLIER
-            self.maintenance_margin = info['maintMargin'] * BITMEX_MULTIPLIER
-            self.margin_balance = info['marginBalance'] * BITMEX_MULTIPLIER
-            self.wallet_balance = info['walletBalance'] * BITMEX_MULTIPLIER
-            self.unrealized_pnl = info['unrealisedPnl'] * BITMEX_MULTIPLIER
-
-
-class OrderStatus:
-    def __init__(self, order_info, exchange):
-        if exchange == "binance_futures":
-            self.order_id = order_info['orderId']
-            self.status = order_info['status'].lower()
-            self.average_price = float(order_info['avgPrice'])
-            self.executed_qty = float(order_info['executedQty'])
-        elif exchange == "bitmex":
-            self.order_id = order_info['orderID']
-            self.status = order_info['ordStatus'].lower()
-            self.average_price = order_info['avgPx']
-            self.executed_qty = order_info['cumQty']
-
-class ExchangeContract:
-    def __init__(self, contract_info, exchange):
-        if exchange == "binance_futures":
-            self.symbol = contract_info['symbol']
-            self.base_asset = contract_info['baseAsset']
-            self.quote_currency = contract_info['quoteAsset']
-            self.price_decimals = contract_info['pricePrecision']
-            self.quantity_decimals = contract_info['quantityPrecision']
-            self.tick_size = 1 / pow(10, contract_info['pricePrecision'])
-            self.lot_size = 1 / pow(10, contract_info['quantityPrecision'])
-
-        elif exchange == "bitmex":
-            self.symbol = contract_info['symbol']
-            self.base_asset = contract_info['rootSymbol']
-            self.quote_currency = contract_info['quoteCurrency']
-            self.price_decimals = tick_to_decimals(contract_info['tickSize'])
-            self.quantity_decimals = tick_to_decimals(contract_info['lotSize'])
-            self.tick_size = contract_info['tickSize']
-            self.lot_size = contract_info['lotSize']
-
-            self.quanto = contract_info['isQuanto']
-            self.inverse = contract_info['isInverse']
-
-            self.multiplier = contract_info['multiplier'] * BITMEX_MULTIPLIER
-
-            if self.inverse:
-                self.multiplier *= -1
-
-        self.exchange = exchange
-
-class Trade:
-    def __init__(self, trade_info):
-        # Trade_info is a dictionary
-        self.time: int = trade_info['time']
-        self.status: str = trade_info['status']
-        self.side: str = trade_info['side']
-        self.strategy: str = trade_info['strategy']
-        self.entry_price: float = trade_info['entry_price']
-        self.profitloss: float = trade_info['profitloss']
-        self.entry_id = trade_info['entry_id']
-        self.contract: ExchangeContract = trade_info['contract']
-        self.quantity = trade_info['quantity']
-
-def tick_to_decimals(tick_size: float) -> int:
-    tick_size_str = "{0:.8f}".format(tick_size)
-    while tick_size_str[-1] == "0":
-        tick_size_str = tick_size_str[:-1]
-
-    split_tick = tick_size_str.split(".")
-
-    if len(split_tick) > 1:
-        return len(split_tick[1])
-    else:
-        return 0
-
-
-
+import typing
+
+from decoding import parse_bitmex_timestamp
+
+BITMEX_TF_MINUTES = {"1m": 1, "5m": 5, "1h": 60, "1d": 1440}
+# Candles returned by one history request (_historical_data() of the clients)
+HISTORY_CANDLES = {"binance_futures": 1000, "bitmex": 500}
+#SAtoshi numbers
+BITMEX_MULTIPLIER = 0.00000001
+
+
+# The models use __slots__: no per-instance __dict__, thousands of candles and contracts take much less memory.
+# Each exchange has its parser functions, the constructors pick them in a dictionary instead of comparing exchange
+# strings, and the clients get them once with the *_factory() functions to skip even that lookup.
+
+_new = object.__new__
+
+
+class Candle:
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, candle_info, timeframe, exchange):
+        _CANDLE_PARSERS[exchange](self, candle_info, timeframe)
+
+
+def _parse_binance_candle(candle: Candle, candle_info, timeframe):
+    candle.timestamp = candle_info[0]
+    candle.open = float(candle_info[1])
+    candle.high = float(candle_info[2])
+    candle.low = float(candle_info[3])
+    candle.close = float(candle_info[4])
+    candle.volume = float(candle_info[5])
+
+
+def _parse_bitmex_candle(candle: Candle, candle_info, timeframe):
+    # Bitmex timestamps are the end of the candle
+    candle.timestamp = parse_bitmex_timestamp(candle_info['timestamp']) - BITMEX_TF_MINUTES[timeframe] * 60000
+    candle.open = candle_info['open']
+    candle.high = candle_info['high']
+    candle.low = candle_info['low']
+    candle.close = candle_info['close']
+    candle.volume = candle_info['volume']
+
+
+def _parse_trade_candle(candle: Candle, candle_info, timeframe):
+    candle.timestamp = candle_info['ts']
+    candle.open = candle_info['open']
+    candle.high = candle_info['high']
+    candle.low = candle_info['low']
+    candle.close = candle_info['close']
+    candle.volume = candle_info['volume']
+
+
+_CANDLE_PARSERS = {"binance_futures": _parse_binance_candle, "binance_spot": _parse_binance_candle,
+                   "bitmex": _parse_bitmex_candle, "parse_trade": _parse_trade_candle}
+
+
+class Balance:
+    __slots__ = ("initial_margin", "maintenance_margin", "margin_balance", "wallet_balance", "unrealized_pnl")
+
+    def __init__(self, info, exchange):
+        _BALANCE_PARSERS[exchange](self, info)
+
+
+def _parse_binance_balance(balance: Balance, info):
+    balance.initial_margin = float(info['initialMargin'])
+    balance.maintenance_margin = float(info['maintMargin'])
+    balance.margin_balance = float(info['marginBalance'])
+    balance.wallet_balance = float(info['walletBalance'])
+    balance.unrealized_pnl = float(info['unrealizedProfit'])
+
+
+def _parse_bitmex_balance(balance: Balance, info):
+    balance.initial_margin = info['initMargin'] * BITMEX_MULTIPLIER
+    balance.maintenance_margin = info['maintMargin'] * BITMEX_MULTIPLIER
+    balance.margin_balance = info['marginBalance'] * BITMEX_MULTIPLIER
+    balance.wallet_balance = info['walletBalance'] * BITMEX_MULTIPLIER
+    balance.unrealized_pnl = info['unrealisedPnl'] * BITMEX_MULTIPLIER
+
+
+_BALANCE_PARSERS = {"binance_futures": _parse_binance_balance, "bitmex": _parse_bitmex_balance}
+
+
+class OrderStatus:
+    __slots__ = ("order_id", "status", "average_price", "executed_qty")
+
+    def __init__(self, order_info, exchange):
+        _ORDER_STATUS_PARSERS[exchange](self, order_info)
+
+
+def _parse_binance_order_status(order_status: OrderStatus, order_info):
+    order_status.order_id = order_info['orderId']
+    order_status.status = order_info['status'].lower()
+    order_status.average_price = float(order_info['avgPrice'])
+    order_status.executed_qty = float(order_info['executedQty'])
+
+
+def _parse_bitmex_order_status(order_status: OrderStatus, order_info):
+    order_status.order_id = order_info['orderID']
+    order_status.status = order_info['ordStatus'].lower()
+    order_status.average_price = order_info['avgPx']
+    order_status.executed_qty = order_info['cumQty']
+
+
+_ORDER_STATUS_PARSERS = {"binance_futures": _parse_binance_order_status, "bitmex": _parse_bitmex_order_status}
+
+
+class ExchangeContract:
+    __slots__ = ("symbol", "base_asset", "quote_currency", "price_decimals", "quantity_decimals", "tick_size",
+                 "lot_size", "quanto", "inverse", "multiplier", "exchange")
+
+    def __init__(self, contract_info, exchange):
+        _CONTRACT_PARSERS[exchange](self, contract_info)
+        self.exchange = exchange
+
+
+def _parse_binance_contract(contract: ExchangeContract, contract_info):
+    contract.symbol = contract_info['symbol']
+    contract.base_asset = contract_info['baseAsset']
+    contract.quote_currency = contract_info['quoteAsset']
+    contract.price_decimals = contract_info['pricePrecision']
+    contract.quantity_decimals = contract_info['quantityPrecision']
+    contract.tick_size = 1 / pow(10, contract_info['pricePrecision'])
+    contract.lot_size = 1 / pow(10, contract_info['quantityPrecision'])
+
+
+def _parse_bitmex_contract(contract: ExchangeContract, contract_info):
+    contract.symbol = contract_info['symbol']
+    contract.base_asset = contract_info['rootSymbol']
+    contract.quote_currency = contract_info['quoteCurrency']
+    contract.price_decimals = tick_to_decimals(contract_info['tickSize'])
+    contract.quantity_decimals = tick_to_decimals(contract_info['lotSize'])
+    contract.tick_size = contract_info['tickSize']
+    contract.lot_size = contract_info['lotSize']
+
+    contract.quanto = contract_info['isQuanto']
+    contract.inverse = contract_info['isInverse']
+
+    contract.multiplier = contract_info['multiplier'] * BITMEX_MULTIPLIER
+
+    if contract.inverse:
+        contract.multiplier *= -1
+
+
+_CONTRACT_PARSERS = {"binance_futures": _parse_binance_contract, "bitmex": _parse_bitmex_contract}
+
+
+class Trade:
+    __slots__ = ("time", "status", "side", "strategy", "entry_price", "profitloss", "entry_id", "contract", "quantity")
+
+    def __init__(self, trade_info):
+        # Trade_info is a dictionary
+        self.time: int = trade_info['time']
+        self.status: str = trade_info['status']
+        self.side: str = trade_info['side']
+        self.strategy: str = trade_info['strategy']
+        self.entry_price: float = trade_info['entry_price']
+        self.profitloss: float = trade_info['profitloss']
+        self.entry_id = trade_info['entry_id']
+        self.contract: ExchangeContract = trade_info['contract']
+        self.quantity = trade_info['quantity']
+
+
+def candle_factory(exchange: str) -> typing.Callable[[typing.Any, str], Candle]:
+
+    # Function building the candles of an exchange, candle_factory("bitmex")(candle_info, timeframe)
+
+    parser = _CANDLE_PARSERS[exchange]
+
+    def build(candle_info, timeframe: str) -> Candle:
+        candle = _new(Candle)
+        parser(candle, candle_info, timeframe)
+        return candle
+
+    return build
+
+
+def contract_factory(exchange: str) -> typing.Callable[[typing.Dict], ExchangeContract]:
+
+    # Function building the contracts of an exchange, contract_factory("bitmex")(contract_info)
+
+    parser = _CONTRACT_PARSERS[exchange]
+
+    def build(contract_info) -> ExchangeContract:
+        contract = _new(ExchangeContract)
+        parser(contract, contract_info)
+        contract.exchange = exchange
+        return contract
+
+    return build
+
+
+def balance_factory(exchange: str) -> typing.Callable[[typing.Dict], Balance]:
+    parser = _BALANCE_PARSERS[exchange]
+
+    def build(info) -> Balance:
+        balance = _new(Balance)
+        parser(balance, info)
+        return balance
+
+    return build
+
+
+def order_status_factory(exchange: str) -> typing.Callable[[typing.Dict], OrderStatus]:
+    parser = _ORDER_STATUS_PARSERS[exchange]
+
+    def build(order_info) -> OrderStatus:
+        order_status = _new(OrderStatus)
+        parser(order_status, order_info)
+        return order_status
+
+    return build
+
+
+def tick_to_decimals(tick_size: float) -> int:
+    tick_size_str = "{0:.8f}".format(tick_size)
+    while tick_size_str[-1] == "0":
+        tick_size_str = tick_size_str[:-1]
+
+    split_tick = tick_size_str.split(".")
+
+    if len(split_tick) > 1:
+        return len(split_tick[1])
+    else:
+        return 0
+
+
+
@@ -0,0 +1,213 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+from concurrent.futures import Future
+
+from models import ExchangeContract, OrderStatus
+
+logger = logging.getLogger()
+
+# Statuses after which an order does not change any more (lower case, like OrderStatus.status)
+FINAL_ORDER_STATUSES = {"filled", "canceled", "cancelled", "rejected", "expired"}
+
+# Polling intervals while a websocket pushes the order updates: polling only catches the updates that were missed
+PUSH_FALLBACK_MIN_INTERVAL = 5.0
+PUSH_FALLBACK_MAX_INTERVAL = 30.0
+
+# Pushed updates of orders that are not tracked yet are kept this many seconds: long enough for the response of the
+# order request, so the updates of the orders that will never be tracked (filled when placed, exit orders) expire
+# before they could evict the others
+EARLY_UPDATE_SECONDS = 10.0
+
+# Number of pushed updates kept for orders that are not tracked yet
+MAX_EARLY_UPDATES = 500
+
+
+class _PendingOrder:
+    def __init__(self, contract: ExchangeContract, order_id, callback: typing.Optional[typing.Callable]):
+        self.contract = contract
+        self.order_id = order_id
+        self.callbacks = [callback] if callback is not None else []
+        self.future: Future = Future()
+
+
+class OrderTracker:
+    def __init__(self, client, min_interval: float = 1.0, max_interval: float = 8.0,
+                 early_update_seconds: float = EARLY_UPDATE_SECONDS):
+
+        # Follows the orders that were not filled when placed, for all the strategies of a client.
+        # One thread polls the pending orders with one request per symbol (get_orders_status() of the client),
+        # instead of one Timer thread and one request per order every 2 seconds.
+        # The polling interval doubles up to max_interval while nothing changes, and goes back to min_interval
+        # when an order is added or resolved.
+
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._polling_intervals = (min_interval, max_interval)
+
+        self._pending: typing.Dict[typing.Any, _PendingOrder] = dict()
+
+        # A pushed update can arrive before the response of the order request, and so before track() is called.
+        # (arrival time, status) by order id, oldest first
+        self.early_update_seconds = early_update_seconds
+        self._early_updates: typing.Dict[typing.Any, typing.Tuple[float, OrderStatus]] = collections.OrderedDict()
+
+        self._condition = threading.Condition()
+        self._interval = min_interval
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, contract: ExchangeContract, order_id,
+              callback: typing.Optional[typing.Callable[[OrderStatus], None]] = None) -> Future:
+
+        # The future gets the final OrderStatus of the order, the callback is called with it from the tracker thread
+        # (or from the thread that calls resolve())
+
+        with self._condition:
+            self._expire_early_updates()
+            early_update = self._early_updates.pop(order_id, (None, None))[1]
+            pending = self._pending.get(order_id)
+
+            if early_update is not None:
+                pending = _PendingOrder(contract, order_id, callback)
+
+            elif pending is None:
+                pending = _PendingOrder(contract, order_id, callback)
+                self._pending[order_id] = pending
+
+                self._interval = self.min_interval
+
+                # Orders placed while the thread waits for the next poll are checked with that poll
+                if len(self._pending) == 1:
+                    self._condition.notify()
+
+            elif callback is not None:
+                pending.callbacks.append(callback)
+
+        if early_update is not None:  # Already finished, no need to poll it
+            self._complete(pending, early_update)
+
+        return pending.future
+
+    def resolve(self, order_status: OrderStatus) -> bool:
+
+        # Order update received from another source (a websocket for example), returns True if the order was tracked
+
+        if order_status.status not in FINAL_ORDER_STATUSES:
+            return False
+
+        with self._condition:
+            pending = self._pending.pop(order_status.order_id, None)
+
+            if pending is None:
+                self._expire_early_updates()
+                self._early_updates[order_status.order_id] = (time.monotonic(), order_status)
+                if len(self._early_updates) > MAX_EARLY_UPDATES:
+                    self._early_updates.popitem(last=False)
+
+        if pending is None:
+            return False
+
+        self._complete(pending, order_status)
+
+        return True
+
+    def _expire_early_updates(self):
+
+        # Called with the condition held
+
+        expiry = time.monotonic() - self.early_update_seconds
+
+        while len(self._early_updates) > 0 and next(iter(self._early_updates.values()))[0] < expiry:
+            self._early_updates.popitem(last=False)
+
+    def set_push_updates(self, connected: bool):
+
+        # Called by the client when its private websocket connects or disconnects
+
+        with self._condition:
+            if connected:
+                self.min_interval, self.max_interval = PUSH_FALLBACK_MIN_INTERVAL, PUSH_FALLBACK_MAX_INTERVAL
+            else:
+                self.min_interval, self.max_interval = self._polling_intervals
+
+            self._interval = self.min_interval
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _complete(self, pending: _PendingOrder, order_status: OrderStatus):
+        for callback in pending.callbacks:
+            try:
+                callback(order_status)
+            except Exception as e:
+                logger.error("Error in the callback of order %s: %s", pending.order_id, e)
+
+        pending.future.set_result(order_status)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and len(self._pending) == 0:
+                    self._condition.wait()
+
+                if not self._running:
+                    return
+
+                self._condition.wait(self._interval)
+
+                if not self._running:
+                    return
+
+                by_symbol: typing.Dict[str, typing.List[_PendingOrder]] = dict()
+                for pending in self._pending.values():
+                    by_symbol.setdefault(pending.contract.symbol, []).append(pending)
+
+            if len(by_symbol) > 0 and self._poll(by_symbol) == 0:
+                with self._condition:
+                    self._interval = min(self._interval * 2, self.max_interval)
+
+    def _poll(self, by_symbol: typing.Dict[str, typing.List[_PendingOrder]]) -> int:
+
+        # One request per symbol, returns the number of orders resolved
+
+        resolved = 0
+
+        for orders in by_symbol.values():
+            try:
+                statuses = self.client.get_orders_status(orders[0].contract, [p.order_id for p in orders])
+            except Exception as e:
+                logger.error("Error while checking the status of %s orders: %s", orders[0].contract.symbol, e)
+                continue
+
+            if statuses is None:
+                continue
+
+            for pending in orders:
+                order_status = statuses.get(pending.order_id)
+
+                if order_status is None or order_status.status not in FINAL_ORDER_STATUSES:
+                    continue
+
+                with self._condition:
+                    if self._pending.pop(pending.order_id, None) is None:  # Resolved in the meantime
+                        continue
+                    self._interval = self.min_interval
+
+                logger.info("Order %s of %s: %s", pending.order_id, pending.contract.symbol, order_status.status)
+
+                self._complete(pending, order_status)
+                resolved += 1
+
+        return resolved
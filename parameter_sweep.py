@@ -0,0 +1,187 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import typing
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtesting import CANDLE_COLUMNS, candle_arrays, run_backtest
+from candle_file import CandleFile
+
+logger = logging.getLogger()
+
+# Parameters of run_backtest() itself, every other parameter of a combination goes into other_params
+BACKTEST_PARAMS = ["take_profit", "stop_loss", "balance_pct", "initial_balance", "fee_pct"]
+
+_worker_data: typing.Dict[str, np.ndarray] = dict()
+_worker_shm: typing.Optional[shared_memory.SharedMemory] = None
+_worker_file: typing.Optional[CandleFile] = None
+
+
+def expand_grid(grid: typing.Dict[str, typing.List]) -> typing.List[typing.Dict]:
+
+    # {"ema_fast": [8, 12], "ema_slow": [26]} -> [{"ema_fast": 8, "ema_slow": 26}, {"ema_fast": 12, "ema_slow": 26}]
+
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def data_hash(data: typing.Dict[str, np.ndarray]) -> str:
+    h = hashlib.sha256()
+    for col in CANDLE_COLUMNS:
+        h.update(np.ascontiguousarray(data[col]).tobytes())
+    return h.hexdigest()
+
+
+class SweepCache:
+    def __init__(self, path: str = "sweep_cache.db"):
+        self.connection = sqlite3.connect(path)
+        self.cursor = self.connection.cursor()
+
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS results (data_hash TEXT, strategy_type TEXT, params TEXT,"
+                            "stats TEXT, PRIMARY KEY (data_hash, strategy_type, params))")
+        self.connection.commit()
+
+    @staticmethod
+    def params_key(params: typing.Dict) -> str:
+        return json.dumps(params, sort_keys=True)
+
+    def get(self, digest: str, strategy_type: str) -> typing.Dict[str, typing.Dict]:
+
+        # All the results recorded for the data and strategy, by parameters key
+
+        self.cursor.execute("SELECT params, stats FROM results WHERE data_hash = ? AND strategy_type = ?",
+                            (digest, strategy_type))
+        return {params: json.loads(stats) for params, stats in self.cursor.fetchall()}
+
+    def save(self, digest: str, strategy_type: str, results: typing.List[typing.Tuple[typing.Dict, typing.Dict]]):
+        self.cursor.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                [(digest, strategy_type, self.params_key(params), json.dumps(stats))
+                                 for params, stats in results])
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def _init_worker(shm_name: str, length: int):
+
+    # Runs once in each worker process: maps the candle columns from the shared memory block
+
+    global _worker_shm
+
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+
+    for i, col in enumerate(CANDLE_COLUMNS):
+        dtype = np.int64 if col == "timestamp" else np.float64
+        _worker_data[col] = np.ndarray((length,), dtype=dtype, buffer=_worker_shm.buf, offset=i * length * 8)
+
+
+def _init_file_worker(path: str, start_time: typing.Optional[int], end_time: typing.Optional[int]):
+
+    # Same with a candle file: each worker maps it, the pages are shared through the page cache
+
+    global _worker_file
+
+    _worker_file = CandleFile(path, start_time, end_time)
+    _worker_data.update(_worker_file.columns)
+
+
+def _run_combination(strategy_type: str, params: typing.Dict) -> typing.Dict:
+    backtest_params = {k: v for k, v in params.items() if k in BACKTEST_PARAMS}
+    other_params = {k: v for k, v in params.items() if k not in BACKTEST_PARAMS}
+
+    backtest_params.setdefault("take_profit", None)
+    backtest_params.setdefault("stop_loss", None)
+
+    result = run_backtest(strategy_type, _worker_data, other_params=other_params, **backtest_params)
+
+    return result.stats()
+
+
+def run_sweep(strategy_type: str, candles, grid: typing.Dict[str, typing.List],
+              output_path: typing.Optional[str] = None, cache_path: typing.Optional[str] = "sweep_cache.db",
+              max_workers: typing.Optional[int] = None, rank_by: str = "return_pct") -> pd.DataFrame:
+
+    # Backtests every combination of the grid on all the CPU cores and returns them ranked by rank_by.
+    # grid maps each parameter name (strategy parameters like ema_fast or min_volume, and take_profit, stop_loss,
+    # balance_pct, fee_pct) to the list of values to try.
+    # The candles are copied once into shared memory that all the workers map, instead of being pickled per task.
+    # A CandleFile is not copied at all, the workers map the file.
+    # Results are cached by data hash and parameters, a new run only computes the missing combinations.
+    # output_path: .csv or .parquet file where the ranked table is written
+
+    data = candle_arrays(candles)
+    length = len(data["close"])
+    digest = data_hash(data)
+
+    combinations = expand_grid(grid)
+
+    cache = SweepCache(cache_path) if cache_path is not None else None
+    cached = cache.get(digest, strategy_type) if cache is not None else dict()
+
+    missing = [params for params in combinations if SweepCache.params_key(params) not in cached]
+
+    logger.info("Parameter sweep on %s candles: %s combinations, %s already computed", length, len(combinations),
+                len(combinations) - len(missing))
+
+    if len(missing) > 0:
+        shm = None
+
+        if isinstance(candles, CandleFile):
+            # The workers map the same file, nothing is copied. The bounds are the candles hashed here, the file may
+            # be appended to meanwhile.
+            timestamps = data["timestamp"]
+            bounds = (int(timestamps[0]), int(timestamps[-1])) if length > 0 else (candles.start_time, candles.end_time)
+            initializer, initargs = _init_file_worker, (candles.path, *bounds)
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, length * 8 * len(CANDLE_COLUMNS)))
+            initializer, initargs = _init_worker, (shm.name, length)
+
+            for i, col in enumerate(CANDLE_COLUMNS):
+                dtype = np.int64 if col == "timestamp" else np.float64
+                np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=i * length * 8)[:] = data[col]
+
+        try:
+            workers = max_workers or os.cpu_count() or 1
+            chunksize = max(1, len(missing) // (workers * 4))
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+                all_stats = list(executor.map(_run_combination, [strategy_type] * len(missing), missing,
+                                              chunksize=chunksize))
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        new_results = list(zip(missing, all_stats))
+
+        for params, stats in new_results:
+            cached[SweepCache.params_key(params)] = stats
+
+        if cache is not None:
+            cache.save(digest, strategy_type, new_results)
+
+    if cache is not None:
+        cache.close()
+
+    rows = [{**params, **cached[SweepCache.params_key(params)]} for params in combinations]
+
+    table = pd.DataFrame(rows)
+    if len(table) > 0:
+        table = table.sort_values(rank_by, ascending=False, ignore_index=True)
+
+    if output_path is not None:
+        if output_path.endswith(".parquet"):
+            table.to_parquet(output_path, index=False)  # Needs pyarrow or fastparquet
+        else:
+            table.to_csv(output_path, index=False)
+
+    return table
@@ -0,0 +1,143 @@
+import datetime
+import glob
+import gzip
+import logging
+import os
+import queue
+import threading
+import time
+import typing
+
+logger = logging.getLogger()
+
+# A segment is closed and a new one started after this many bytes of frames or this many seconds
+RECORDER_SEGMENT_BYTES = 64 * 1024 * 1024
+RECORDER_SEGMENT_SECONDS = 3600
+
+# The open segment is flushed at this interval, a crash loses at most the frames received since
+RECORDER_FLUSH_SECONDS = 5.0
+
+SEGMENT_SUFFIX = ".ticks.gz"
+PARTIAL_SUFFIX = ".part"
+
+
+class TickRecorder:
+    def __init__(self, directory: str, prefix: str, segment_bytes: int = RECORDER_SEGMENT_BYTES,
+                 segment_seconds: float = RECORDER_SEGMENT_SECONDS, compresslevel: int = 6):
+
+        # Records the raw websocket frames of a client with their local receive time, for replays and tick
+        # backtests. record() only puts the frame in a queue: a background thread compresses and writes it,
+        # the websocket thread never waits for the disk.
+        # Each segment is a gzip file of "<receive time in ns> <frame>" lines, written to <name>.part and renamed
+        # when it is complete. A segment is never modified once closed.
+
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compresslevel = compresslevel
+
+        self.recorded = 0
+        self.segments: typing.List[str] = []  # Completed segments, oldest first
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue: "queue.SimpleQueue[typing.Optional[typing.Tuple[int, str]]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="recorder-" + prefix, daemon=True)
+        self._thread.start()
+
+    def record(self, frame: str, receive_time: typing.Optional[int] = None):
+
+        # Called by the websocket thread, receive_time in nanoseconds (now by default)
+
+        self._queue.put((time.time_ns() if receive_time is None else receive_time, frame))
+
+    def _segment_path(self, receive_time: int) -> str:
+        dt = datetime.datetime.fromtimestamp(receive_time // 10 ** 9, datetime.timezone.utc)
+        name = "%s-%s%03d%s" % (self.prefix, dt.strftime("%Y%m%dT%H%M%S"), receive_time // 10 ** 6 % 1000,
+                                SEGMENT_SUFFIX)
+        return os.path.join(self.directory, name)
+
+    def _run(self):
+        segment = None
+        path = None
+        segment_size = 0
+        segment_end = 0.0
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=RECORDER_FLUSH_SECONDS)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                break
+
+            if item is not False:
+                receive_time, frame = item
+
+                if segment is not None and (segment_size >= self.segment_bytes or time.monotonic() >= segment_end):
+                    self._close(segment, path)
+                    segment = None
+
+                if segment is None:
+                    path = self._segment_path(receive_time)
+                    segment = gzip.open(path + PARTIAL_SUFFIX, "wt", compresslevel=self.compresslevel,
+                                        encoding="utf-8")
+                    segment_size = 0
+                    segment_end = time.monotonic() + self.segment_seconds
+
+                line = "%d %s\n" % (receive_time, frame)
+                segment.write(line)
+                segment_size += len(line)
+                self.recorded += 1
+
+            if segment is not None and time.monotonic() - last_flush >= RECORDER_FLUSH_SECONDS:
+                segment.flush()
+                last_flush = time.monotonic()
+
+        if segment is not None:
+            self._close(segment, path)
+
+    def _close(self, segment, path: str):
+        segment.close()
+        os.replace(path + PARTIAL_SUFFIX, path)
+        self.segments.append(path)
+
+        logger.info("Recorder: segment %s closed", path)
+
+    def stop(self):
+
+        # Writes the frames still in the queue and closes the segment
+
+        self._queue.put(None)
+        self._thread.join()
+
+
+def segment_paths(directory: str, prefix: str, include_partial: bool = False) -> typing.List[str]:
+
+    # Segments of a recorder, oldest first. The partial segment is the one being written, or the last one of a
+    # recorder that was not stopped.
+
+    paths = glob.glob(os.path.join(directory, glob.escape(prefix) + "-*" + SEGMENT_SUFFIX))
+    if include_partial:
+        paths += glob.glob(os.path.join(directory, glob.escape(prefix) + "-*" + SEGMENT_SUFFIX + PARTIAL_SUFFIX))
+
+    return sorted(paths)
+
+
+def read_ticks(paths: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[int, str]]:
+
+    # (receive time in ns, frame) of the segments, in order. A truncated segment is read up to where it stops.
+
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    receive_time, _, frame = line[:-1].partition(" ")
+                    yield int(receive_time), frame
+            except EOFError:
+                logger.warning("Recorder: %s is truncated", path)
@@ -0,0 +1,413 @@
+import argparse
+import collections
+import itertools
+import json
+import logging
+import os
+import time
+import typing
+
+from balance_cache import BalanceCache
+from candle_cache import HISTORY_CANDLES
+from candle_feed import TFRAME_EQUIV
+from candle_file import CandleFile
+from decoding import BinanceDecoder, BitmexDecoder
+from exchanges.binance import BinanceClient
+from exchanges.bitmex import BitmexClient
+from latency import LatencyTracker
+from models import BITMEX_MULTIPLIER, Balance, Candle, ExchangeContract, OrderStatus, balance_factory, \
+    candle_factory, contract_factory, order_status_factory
+from order_tracker import OrderTracker
+from recorder import read_ticks, segment_paths
+from strategies import BreakoutStrategy, TechnicalStrategy
+
+logger = logging.getLogger()
+
+# Wallet balance of the simulated account, in the quote currency of the exchange (USDT, XBT on Bitmex)
+REPLAY_BALANCE = 10000.0
+
+_trade_candle = candle_factory("parse_trade")
+
+# history(contract, timeframe, end_time): candles of the feeds opened up to end_time (milliseconds), oldest first
+ReplayHistory = typing.Callable[[ExchangeContract, str, int], typing.List[Candle]]
+
+STRATEGIES = {"Technical": TechnicalStrategy, "Breakout": BreakoutStrategy}
+
+
+def candle_file_history(directory: str, platform: str, count: int = HISTORY_CANDLES) -> ReplayHistory:
+
+    # History read from the candle files of the downloader (see downloader.py), no request is made.
+    # Only the candles opened before the first replayed frame are given to the feeds.
+
+    def history(contract: ExchangeContract, timeframe: str, end_time: int) -> typing.List[Candle]:
+        path = os.path.join(directory, "%s_%s_%s.candles" % (platform, contract.symbol, timeframe))
+
+        if not os.path.exists(path):
+            return []
+
+        # The candle in progress at end_time is left out, its trades are in the recording
+        end_time -= end_time % (TFRAME_EQUIV[timeframe] * 1000)
+        columns = CandleFile(path, end_time=end_time - 1).columns
+
+        rows = zip(*(columns[col][-count:].tolist() for col in ["timestamp", "open", "high", "low", "close",
+                                                                "volume"]))
+        return [_trade_candle({'ts': r[0], 'open': r[1], 'high': r[2], 'low': r[3], 'close': r[4], 'volume': r[5]},
+                              timeframe) for r in rows]
+
+    return history
+
+
+class _SimulatedAccount:
+
+    # Order placement of the replay clients: the orders never leave the process.
+    # Market orders are filled at once at the best bid/ask of the last quote frame (the last trade price when no
+    # quote was received yet). Limit orders are filled at their price when the quotes cross it, on the frame that
+    # crosses it: the order tracker is then told by resolve(), like with the orders pushed by a websocket.
+    # Everything runs in the replay thread, so two replays of the same frames give the same fills.
+    # The wallet balance does not change with the fills, each trade is sized from the same balance.
+
+    def _init_account(self, contracts: typing.Dict[str, ExchangeContract], history: typing.Optional[ReplayHistory],
+                      balance: float):
+        self.testnet = False
+        self.contracts = contracts
+        self.replay_history = history
+        self.replay_time = 0.0  # Receive time of the frame being replayed, in seconds
+
+        self.strategies = dict()
+        self._strategies_by_symbol = dict()
+        self._symbol_feeds = dict()
+
+        self.candle_cache = None
+        self.recorder = None
+        self.latency = LatencyTracker(self.platform, clock=self.clock)
+        self.message_counts = collections.Counter()
+        self.ws_reconnects = 0
+        self.logs = []
+
+        self._candle = candle_factory(self.platform)
+        self._contract = contract_factory(self.platform)
+        self._order_status = order_status_factory(self.platform)
+        self._balance = balance_factory(self.platform)
+
+        self.fills: typing.List[typing.Dict] = []
+        self._order_ids = itertools.count(1)
+        self._orders: typing.Dict[typing.Any, typing.Dict] = dict()
+        self._open_orders: typing.Dict[typing.Any, typing.Dict] = dict()  # Limit orders waiting for the price
+
+        self._wallet_balance = balance
+        self.balance_cache = BalanceCache(self.user_balance)
+        self.order_tracker = OrderTracker(self)
+
+    def clock(self) -> float:
+        return self.replay_time
+
+    def _history(self, contract: ExchangeContract, timeframe: str) -> typing.List[Candle]:
+        if self.replay_history is None:
+            return []
+        return self.replay_history(contract, timeframe, int(self.replay_time * 1000))
+
+    def _quote(self, symbol: str) -> typing.Tuple[typing.Optional[float], typing.Optional[float]]:
+
+        # (bid, ask), the last trade price for both when the symbol has no quote yet
+
+        prices = self._prices.get(symbol)
+        if prices is not None and prices['bid'] is not None and prices['ask'] is not None:
+            return prices['bid'], prices['ask']
+
+        symbol_feeds = self._symbol_feeds.get(symbol)
+        if symbol_feeds is not None and len(symbol_feeds.feeds) > 0:
+            last_price = float(next(iter(symbol_feeds.feeds.values())).candles.closes[-1])
+            return last_price, last_price
+
+        return None, None
+
+    def _place(self, contract: ExchangeContract, order_type: str, quantity: float, side: str,
+               price: typing.Optional[float]) -> typing.Optional[OrderStatus]:
+        side = side.lower()
+        bid, ask = self._quote(contract.symbol)
+
+        if bid is None:
+            logger.warning("Replay: no price for %s yet, order rejected", contract.symbol)
+            return None
+
+        order = {'id': next(self._order_ids), 'symbol': contract.symbol, 'side': side, 'quantity': quantity,
+                 'price': price, 'status': "new", 'average_price': 0, 'executed_qty': 0}
+        self._orders[order['id']] = order
+
+        if order_type.lower() == "market":
+            self._fill(order, ask if side == "buy" else bid)
+        elif side == "buy" and ask <= price or side == "sell" and bid >= price:
+            self._fill(order, price)
+        else:
+            self._open_orders[order['id']] = order
+
+        return self._order_status(self._order_info(order))
+
+    def _fill(self, order: typing.Dict, price: float):
+        order['status'] = "filled"
+        order['average_price'] = price
+        order['executed_qty'] = order['quantity']
+
+        self.fills.append({'time': int(self.replay_time * 1000), 'order_id': order['id'], 'symbol': order['symbol'],
+                           'side': order['side'], 'quantity': order['quantity'], 'price': price})
+
+    def _match_open_orders(self):
+        for order in list(self._open_orders.values()):
+            bid, ask = self._quote(order['symbol'])
+
+            if order['side'] == "buy" and ask <= order['price'] or order['side'] == "sell" and bid >= order['price']:
+                del self._open_orders[order['id']]
+                self._fill(order, order['price'])
+                self.order_tracker.resolve(self._order_status(self._order_info(order)))
+
+    def _cancel(self, order_id) -> typing.Optional[OrderStatus]:
+        order = self._orders.get(order_id)
+        if order is None:
+            return None
+
+        if self._open_orders.pop(order_id, None) is not None:
+            order['status'] = "canceled"
+
+        return self._order_status(self._order_info(order))
+
+    def get_orders_status(self, contract: ExchangeContract,
+                          order_ids: typing.List) -> typing.Optional[typing.Dict[typing.Any, OrderStatus]]:
+
+        # Only the open orders: the filled ones are given to the tracker by the replay thread, never by its own
+        # thread, whose polls are not in step with the replayed frames
+
+        return {order_id: self._order_status(self._order_info(self._orders[order_id])) for order_id in order_ids
+                if order_id in self._open_orders}
+
+    def get_order_status(self, contract: ExchangeContract, order_id) -> typing.Optional[OrderStatus]:
+        order = self._orders.get(order_id)
+        return self._order_status(self._order_info(order)) if order is not None else None
+
+    def _on_reponse(self, ws, response: str):
+        super()._on_reponse(ws, response)
+
+        if len(self._open_orders) > 0:
+            self._match_open_orders()
+
+    def start_strategy(self, b_index: int, strategy_name: str, symbol: str, timeframe: str, balance_pct: float,
+                       take_profit: float, stop_loss: float, other_params: typing.Dict):
+
+        # Same steps as the strategy component of the GUI, with the history up to the current replay time
+
+        contract = self.contracts[symbol]
+        strategy = STRATEGIES[strategy_name](self, contract, self.platform, timeframe, balance_pct, take_profit,
+                                             stop_loss, other_params)
+
+        feed = self.get_candle_feed(contract, timeframe)
+        if feed is None:
+            raise ValueError("No history for %s %s before the replay" % (symbol, timeframe))
+
+        strategy.attach_feed(feed)
+        self.add_strategy(b_index, strategy)
+
+        return strategy
+
+    def close(self):
+        self.order_tracker.stop()
+        self.balance_cache.stop()
+
+
+class ReplayBinanceClient(_SimulatedAccount, BinanceClient):
+    def __init__(self, contracts: typing.Dict[str, ExchangeContract], history: typing.Optional[ReplayHistory] = None,
+                 balance: float = REPLAY_BALANCE, quote_asset: str = "USDT"):
+
+        # BinanceClient fed by replay(): no API keys, no websocket, no request
+
+        self.platform = "binance_futures"
+        self.futures_client = True
+
+        self.crypto_prices = dict()
+        self._prices = self.crypto_prices
+        self._decoder = BinanceDecoder()
+
+        self._quote_asset = quote_asset
+        self._init_account(contracts, history, balance)
+
+    def user_balance(self) -> typing.Dict[str, Balance]:
+        return {self._quote_asset: self._balance({'initialMargin': 0, 'maintMargin': 0,
+                                                  'marginBalance': self._wallet_balance,
+                                                  'walletBalance': self._wallet_balance, 'unrealizedProfit': 0})}
+
+    def _order_info(self, order: typing.Dict) -> typing.Dict:
+        return {'orderId': order['id'], 'status': order['status'].upper(), 'avgPrice': order['average_price'],
+                'executedQty': order['executed_qty']}
+
+    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: float, side: str,
+                                  price=None, tif=None) -> OrderStatus:
+        quantity = round(int(quantity / contract.lot_size) * contract.lot_size, 8)
+        return self._place(contract, order_type, quantity, side, price)
+
+    def cancel_order(self, contract: ExchangeContract, order_id: int) -> OrderStatus:
+        return self._cancel(order_id)
+
+
+class ReplayBitmexClient(_SimulatedAccount, BitmexClient):
+    def __init__(self, contracts: typing.Dict[str, ExchangeContract], history: typing.Optional[ReplayHistory] = None,
+                 balance: float = REPLAY_BALANCE):
+
+        # Same for BitmexClient. The order, execution and margin tables of the recording belong to the real
+        # account and are ignored.
+
+        self.platform = "bitmex"
+        self.futures = True
+
+        self.prices = dict()
+        self._prices = self.prices
+        self._decoder = BitmexDecoder()
+        self.private_connection = False
+
+        self._init_account(contracts, history, balance)
+
+    def user_balance(self) -> typing.Dict[str, Balance]:
+        xbt = self._wallet_balance / BITMEX_MULTIPLIER  # Satoshis, as in the margin table
+        return {'XBt': self._balance({'initMargin': 0, 'maintMargin': 0, 'marginBalance': xbt, 'walletBalance': xbt,
+                                      'unrealisedPnl': 0})}
+
+    def _order_info(self, order: typing.Dict) -> typing.Dict:
+        return {'orderID': order['id'], 'ordStatus': order['status'].capitalize(), 'avgPx': order['average_price'],
+                'cumQty': order['executed_qty']}
+
+    def _update_orders(self, data: typing.List[typing.Dict]):
+        pass
+
+    def _update_balances(self, data: typing.List[typing.Dict]):
+        pass
+
+    def create_crypto_trade_order(self, contract: ExchangeContract, order_type: str, quantity: int, side: str,
+                                  price=None, tif=None) -> OrderStatus:
+        quantity = round(quantity / contract.lot_size) * contract.lot_size
+        return self._place(contract, order_type, quantity, side, price)
+
+    def cancel_order(self, order_id) -> OrderStatus:
+        return self._cancel(order_id)
+
+
+class Replay:
+    def __init__(self, client: typing.Union[ReplayBinanceClient, ReplayBitmexClient], paths: typing.Iterable[str]):
+
+        # Feeds recorded frames (see recorder.py) to the _on_reponse() method of a replay client, so they go through
+        # the same decoding, candle feeds and strategies as the live frames.
+        # The client clock is set to the first frame at once: the strategies started before run() get the history
+        # up to the start of the recording.
+
+        self.client = client
+
+        ticks = read_ticks(paths)
+        first = next(ticks, None)
+
+        if first is not None:
+            client.replay_time = first[0] / 1e9
+            ticks = itertools.chain((first,), ticks)
+
+        self._ticks = ticks
+
+        self.frames = 0
+        self.elapsed = 0.0
+
+    def run(self, speed: typing.Optional[float] = None, max_frames: typing.Optional[int] = None) -> typing.Dict:
+
+        # speed: None replays the frames as fast as they are processed, otherwise speed times faster than
+        # they were received (1 for real time)
+        # max_frames: stop after this number of frames, the next run() continues from there
+
+        client = self.client
+        on_response = client._on_reponse
+
+        ticks = self._ticks if max_frames is None else itertools.islice(self._ticks, max_frames)
+        first_time = None
+
+        start = time.perf_counter()
+
+        for receive_time, frame in ticks:
+            if speed is not None:
+                if first_time is None:
+                    first_time = receive_time
+
+                wait = (receive_time - first_time) / 1e9 / speed - (time.perf_counter() - start)
+                if wait > 0:
+                    time.sleep(wait)
+
+            client.replay_time = receive_time / 1e9
+            on_response(None, frame)
+            self.frames += 1
+
+        self.elapsed += time.perf_counter() - start
+
+        return self.stats()
+
+    def stats(self) -> typing.Dict:
+        return {"frames": self.frames, "elapsed": self.elapsed,
+                "frames_per_second": self.frames / self.elapsed if self.elapsed > 0 else 0.0,
+                "fills": len(self.client.fills)}
+
+
+REPLAY_CLIENTS = {"binance": ReplayBinanceClient, "bitmex": ReplayBitmexClient}
+
+
+def load_contracts(path: str, exchange: str) -> typing.Dict[str, ExchangeContract]:
+
+    # Contracts from a saved response of /fapi/v1/exchangeInfo (Binance) or /api/v1/instrument/active (Bitmex)
+
+    with open(path) as f:
+        data = json.load(f)
+
+    platform = "binance_futures" if exchange == "binance" else "bitmex"
+    build = contract_factory(platform)
+
+    return {info['symbol']: build(info) for info in (data['symbols'] if exchange == "binance" else data)}
+
+
+def _param(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def main(argv: typing.Optional[typing.List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded websocket frames through a strategy")
+    parser.add_argument("--exchange", choices=sorted(REPLAY_CLIENTS), default="binance")
+    parser.add_argument("--recordings", required=True, help="Directory of the recorder segments")
+    parser.add_argument("--prefix", help="Recorder prefix, the exchange by default")
+    parser.add_argument("--contracts", required=True, help="Saved exchangeInfo / instrument response (JSON)")
+    parser.add_argument("--candles", help="Directory of the downloaded candle files, for the history")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="Breakout")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--timeframe", default="1m", choices=list(TFRAME_EQUIV))
+    parser.add_argument("--balance-pct", type=float, default=10)
+    parser.add_argument("--take-profit", type=float, default=2)
+    parser.add_argument("--stop-loss", type=float, default=1)
+    parser.add_argument("--param", action="append", default=[], help="Strategy parameter, min_volume=10 for example")
+    parser.add_argument("--speed", type=float, help="Times faster than real time, as fast as possible by default")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s :: %(message)s")
+
+    platform = "binance_futures" if args.exchange == "binance" else "bitmex"
+    history = candle_file_history(args.candles, platform) if args.candles is not None else None
+
+    client = REPLAY_CLIENTS[args.exchange](load_contracts(args.contracts, args.exchange), history)
+    replay = Replay(client, segment_paths(args.recordings, args.prefix or args.exchange, include_partial=True))
+
+    other_params = {key: _param(value) for key, _, value in (p.partition("=") for p in args.param)}
+    client.start_strategy(0, args.strategy, args.symbol, args.timeframe, args.balance_pct, args.take_profit,
+                          args.stop_loss, other_params)
+
+    try:
+        stats = replay.run(args.speed)
+    finally:
+        client.close()
+
+    print("%s frames in %.2f s (%.0f frames/s), %s fills" % (stats["frames"], stats["elapsed"],
+                                                            stats["frames_per_second"], stats["fills"]))
+    for fill in client.fills:
+        print("%(time)s %(symbol)s %(side)s %(quantity)s @ %(price)s" % fill)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,335 +1,340 @@
-import logging
-from typing import *
-import time
-
-from models import *
-
-from threading import Timer
-
-import pandas as pd
-
-if TYPE_CHECKING:  # Import the connector class names only for typing purpose (the classes aren't actually imported)
-    from exchanges.bitmex import BitmexClient
-    from exchanges.binance import BinanceClient
-
-logger = logging.getLogger()
-
-# TFRAME_EQUIV is used in parse_trades() to compare the last candle timestamp to the new trade timestamp
-TFRAME_EQUIV = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "4h": 14400}
-
-class Strategy:
-    def __init__(self, client: Union["BitmexClient", "BinanceClient"], contract: ExchangeContract, exchange: str,
-                 timeframe: str, balance_pct: float, take_profit: float, stop_loss: float, strat_name):
-
-        self.client = client
-
-        self.contract = contract
-        self.exchange = exchange
-        self.timeframe = timeframe
-        self.timeframe_equiv = TFRAME_EQUIV[timeframe] * 1000
-        self.balance_pct = balance_pct
-        self.take_profit = take_profit
-        self.stop_loss = stop_loss
-
-        self.strategy_name = strat_name
-
-        self.ongoing_position = False
-
-        self.candles: List[Candle] = []  # candles is a list of Candle objects
-
-        self.trades: List[Trade] = []  # trades is a list of Trade objects
-        self.logs = []
-
-    def add_log(self, msg: str):
-        logger.info("%s", msg)
-        self.logs.append({"log": msg, "displayed": False})  # Append a dictionary with a log new_log
-
-    def parse_trades(self, price: float, size: float, timestamp: int) -> str:
-
-        # Parse new trades coming in from the websocket and update the list of Candles based on the timestamp.
-        # crypto_price: The trade crypto_price
-        # size: The trade size
-        # timestamp: Unix timestamp in milliseconds
-
-        timestamp_diff = int(time.time() * 1000) - timestamp  # multiply by 1000 to get miliseconds
-        if timestamp_diff >= 2000:
-            logger.warning("%s %s: %s milliseconds of difference between the current time and the trade time",
-                           self.exchange, self.contract.symbol, timestamp_diff)
-
-        previous_candle = self.candles[-1]
-
-        # Same Candle
-
-        if timestamp < previous_candle.timestamp + self.timeframe_equiv:
-
-            previous_candle.close = price
-            previous_candle.volume += size
-
-            if price > previous_candle.high:
-                previous_candle.high = price
-            elif price < previous_candle.low:
-                previous_candle.low = price
-
-            # Check Take profit / Stop loss
-
-            for trade in self.trades:
-                if trade.status == "open" and trade.entry_price is not None:
-                    self._check_tp_sl(trade)
-
-            return "same_candle"
-
-        # Missing Candle(s)
-
-        elif timestamp >= previous_candle.timestamp + 2 * self.timeframe_equiv:
-
-            missing_candles = int((timestamp - previous_candle.timestamp) / self.timeframe_equiv) - 1
-
-            logger.info("%s missing %s candles for %s %s (%s %s)", self.exchange, missing_candles, self.contract.symbol,
-                        self.timeframe, timestamp, previous_candle.timestamp)
-
-            for missing in range(missing_candles):
-                new_ts = previous_candle.timestamp + self.timeframe_equiv
-                candle_info = {'ts': new_ts, 'open': previous_candle.close, 'high': previous_candle.close,
-                               'low': previous_candle.close, 'close': previous_candle.close, 'volume': 0}
-                new_candle = Candle(candle_info, self.timeframe, "parse_trade")
-
-                self.candles.append(new_candle)
-
-                previous_candle = new_candle
-
-            new_ts = previous_candle.timestamp + self.timeframe_equiv
-            candle_info = {'ts': new_ts, 'open': price, 'high': price, 'low': price, 'close': price,
-                           'volume': size}
-            new_candle = Candle(candle_info, self.timeframe, "parse_trade")
-
-            self.candles.append(new_candle)
-
-            return "new_candle"
-
-        # New Candle
-
-        elif timestamp >= previous_candle.timestamp + self.timeframe_equiv:
-            new_ts = previous_candle.timestamp + self.timeframe_equiv
-            candle_info = {'ts': new_ts, 'open': price, 'high': price, 'low': price, 'close': price,
-                           'volume': size}
-            new_candle = Candle(candle_info, self.timeframe, "parse_trade")
-
-            self.candles.append(new_candle)
-
-            logger.info("%s New candle for %s %s", self.exchange, self.contract.symbol, self.timeframe)
-
-            return "new_candle"
-
-    def _check_trade_order_status(self, order_id):
-
-        # Called  after an order has been placed, continues until it is filled.
-
-        trade_order_status = self.client.get_order_status(self.contract, order_id)
-
-        if trade_order_status is not None:
-
-            logger.info("%s order status: %s", self.exchange, trade_order_status.status)
-
-            if trade_order_status.status == "filled":
-                for trade in self.trades:  # Loop through the trades - it may not be the only one placed
-                    if trade.entry_id == order_id:
-                        trade.entry_price = trade_order_status.average_price
-                        trade.quantity = trade_order_status.executed_qty
-                        break
-                return
-
-        tmr = Timer(2.0,
-                    lambda: self._check_trade_order_status(
-                        order_id))  # Check every 2 seconds until order status is filled
-        tmr.start()
-
-    def _open_position(self, signal_result: int):
-
-        # Open Long or Short position based on the signal result.
-        # signal_result: 1 (Long) or -1 (Short)
-
-        trade_size = self.client.get_trade_size(self.contract, self.candles[-1].close, self.balance_pct)
-        if trade_size is None:
-            return
-
-        order_type = "buy" if signal_result == 1 else "sell"
-        position_side = "long" if signal_result == 1 else "short"
-
-        self.add_log(f"{position_side.capitalize()} signal on {self.contract.symbol} {self.timeframe}")
-
-        order_state = self.client.create_crypto_trade_order(self.contract, "MARKET", trade_size, order_type)
-
-        if order_state is not None:
-            self.add_log(f"{order_type.capitalize()} order placed on {self.exchange} | Status: {order_state.status}")
-
-            self.ongoing_position = True
-
-            average_fill_price = None
-
-            if order_state.status == "filled":
-                average_fill_price = order_state.average_price
-            else:
-                tmr = Timer(2.0, lambda: self._check_trade_order_status(order_state.order_id))
-                tmr.start()
-
-            new_trade = Trade({"time": int(time.time() * 1000), "entry_price": average_fill_price,
-                               "contract": self.contract, "strategy": self.strategy_name, "side": position_side,
-                               "status": "open", "profitloss": 0, "quantity": order_state.executed_qty,
-                               "entry_id": order_state.order_id})
-            self.trades.append(new_trade)
-
-    def _check_tp_sl(self, trade: Trade):
-
-        # Based on the average entry crypto_price and calculates
-        #If  the defined stop loss or take profit has been acheived.
-        current_price = self.candles[-1].close
-
-        stop_loss_triggered = False
-        take_profit_triggered = False
-
-        if trade.side == "short":
-            if self.take_profit is not None:
-                if current_price <= trade.entry_price * (1 - self.take_profit / 100):
-                    take_profit_triggered = True
-            if self.stop_loss is not None:
-                if current_price >= trade.entry_price * (1 + self.stop_loss / 100):
-                    stop_loss_triggered = True
-
-        elif trade.side == "long":
-            if self.take_profit is not None:
-                if current_price >= trade.entry_price * (1 + self.take_profit / 100):
-                    take_profit_triggered = True
-            if self.stop_loss is not None:
-                if current_price <= trade.entry_price * (1 - self.stop_loss / 100):
-                    stop_loss_triggered = True
-
-        if stop_loss_triggered or take_profit_triggered:
-
-            self.add_log(
-                f"| Current Price = {current_price} (Entry price was {trade.entry_price})"
-                f"{'Stop loss' if stop_loss_triggered else 'Take profit'} for {self.contract.symbol} {self.timeframe} ")
-
-            order_side = "SELL" if trade.side == "long" else "BUY"
-
-            order_status = self.client.create_crypto_trade_order(self.contract, "MARKET", trade.quantity, order_side)
-
-            if order_status is not None:
-                self.add_log(f"Exit order on {self.contract.symbol} {self.timeframe} placed successfully")
-                trade.status = "closed"
-                self.ongoing_position = False
-
-class BreakoutStrategy(Strategy):
-    def __init__(self, client, contract: ExchangeContract, exchange: str, timeframe: str, balance_pct: float,
-                 take_profit: float,
-                 stop_loss: float, other_params: Dict):
-        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Breakout")
-        # only one variable needed - The min volume
-        self.min_volume = other_params['min_volume']
-
-    def _check_signal(self) -> int:
-
-        # Use candlesticks OHLC data to define Long or Short patterns and return a 1 for long signal and -1 for the short signal
-
-        if self.candles[-1].close > self.candles[-2].high and self.candles[-1].volume > self.min_volume:
-            return 1
-        elif self.candles[-1].close < self.candles[-2].low and self.candles[-1].volume > self.min_volume:
-            return -1
-        else:
-            return 0
-
-    def check_trade(self, tick_type: str):
-
-        # triggered from the websocket _on_message() methods
-
-        if not self.ongoing_position:
-            signal_result = self._check_signal()
-
-            if signal_result in [1, -1]:
-                self._open_position(signal_result)
-
-class TechnicalStrategy(Strategy):
-    def __init__(self, client, contract: ExchangeContract, exchange: str, timeframe: str, balance_pct: float,
-                 take_profit: float,
-                 stop_loss: float, other_params: Dict):
-        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Technical")
-
-
-        self._ema_slow = other_params['ema_slow']
-        self._ema_fast = other_params['ema_fast']
-        self._rsi_length = other_params['rsi_length']
-        self._ema_signal = other_params['ema_signal']
-
-    def _rsi(self) -> float:
-
-        # Compute the Relative Strength Index.
-
-        close_price_list = []
-        for candle in self.candles:
-            close_price_list.append(candle.close)
-
-        closes = pd.Series(close_price_list)
-
-        # Find the difference between the row before and the current
-        delta_value = closes.diff().dropna()
-
-        down, up = delta_value.copy(), delta_value.copy()
-        down[down > 0] = 0 # only negative are kept
-        up[up < 0] = 0
-
-        avg_gain = up.ewm(com=(self._rsi_length - 1), min_periods=self._rsi_length).mean()
-        avg_loss = down.abs().ewm(com=(self._rsi_length - 1), min_periods=self._rsi_length).mean()
-
-        rs = avg_gain / avg_loss  # Relative Strength
-
-        rsi = 100 - 100 / (1 + rs)
-        rsi = rsi.round(2)
-
-        return rsi.iloc[-2]
-
-    def _macd(self) -> Tuple[float, float]:
-
-        # Compute the MACD and its Signal line.
-
-        close_list = []
-        for candle in self.candles:
-            close_list.append(candle.close)  # Use only the close crypto_price of each candlestick for the calculations
-
-        closes = pd.Series(close_list)  # Converts the close crypto_prices list to a pandas Series.
-
-        ema_fast = closes.ewm(span=self._ema_fast).mean()  # Exponential Moving Average request_type
-        ema_slow = closes.ewm(span=self._ema_slow).mean()
-
-        macd_line = ema_fast - ema_slow
-        macd_signal = macd_line.ewm(span=self._ema_signal).mean()
-
-        return macd_line.iloc[-2], macd_signal.iloc[-2]
-
-    def _check_signal(self):
-
-        # Compute technical indicators and compare their value to some predefined levels to know whether to go Long, Short, or do nothing.
-        # 1 for a Long signal, -1 for a Short signal, 0 for no signal
-
-        macd_line, macd_signal = self._macd()
-        relative_strength_index = self._rsi()
-
-        print(f"rsi = {relative_strength_index}, MACD signal = {macd_signal}, MACD line = {macd_line}")
-
-        if relative_strength_index < 30 and macd_line > macd_signal:
-            return 1
-        elif relative_strength_index > 70 and macd_line < macd_signal:
-            return -1
-        else:
-            return 0
-
-    def check_trade(self, tick_type: str):
-
-        # To be triggered from the websocket _on_message() methods.
-        # Triggered only once per candlestick to avoid constantly calculating the indicators.
-        # A trade can occur only if the is no open position at the moment.
-
-        if tick_type == "new_candle" and not self.ongoing_position:
-            signal_value = self._check_signal()
-
-            if signal_value in [1, -1]:
-                self._open_position(signal_value)
-
+import logging
+from typing import *
+import time
+
+from models import *
+
+import numpy as np
+
+from indicators import StreamingMacd, StreamingRsi
+from candle_feed import CandleFeed, TFRAME_EQUIV
+from trigger_book import TriggerBook
+from latency import mark_stage, PARSED, SIGNAL
+
+if TYPE_CHECKING:  # Import the connector class names only for typing purpose (the classes aren't actually imported)
+    from exchanges.bitmex import BitmexClient
+    from exchanges.binance import BinanceClient
+
+logger = logging.getLogger()
+
+
+# Signal and exit definitions shared by the live strategies and the backtesting module.
+# They accept single values as well as NumPy arrays holding a whole candle series.
+
+def breakout_signal(close, previous_high, previous_low, volume, min_volume):
+
+    # 1 for a Long signal, -1 for a Short signal, 0 for no signal
+
+    return np.where((close > previous_high) & (volume > min_volume), 1,
+                    np.where((close < previous_low) & (volume > min_volume), -1, 0))
+
+
+def technical_signal(rsi, macd_line, macd_signal):
+
+    # 1 for a Long signal, -1 for a Short signal, 0 for no signal (also when the RSI is not defined yet)
+
+    return np.where((rsi < 30) & (macd_line > macd_signal), 1,
+                    np.where((rsi > 70) & (macd_line < macd_signal), -1, 0))
+
+
+def tp_sl_prices(entry_price, side: str, take_profit: Optional[float],
+                 stop_loss: Optional[float]) -> Tuple[Optional[float], Optional[float]]:
+
+    # Prices at which the take profit and the stop loss of a trade are triggered, None when not set.
+    # A long trade exits above its entry on take profit, a short trade below.
+
+    take_profit_price = None
+    stop_loss_price = None
+
+    if side == "short":
+        if take_profit is not None:
+            take_profit_price = entry_price * (1 - take_profit / 100)
+        if stop_loss is not None:
+            stop_loss_price = entry_price * (1 + stop_loss / 100)
+
+    elif side == "long":
+        if take_profit is not None:
+            take_profit_price = entry_price * (1 + take_profit / 100)
+        if stop_loss is not None:
+            stop_loss_price = entry_price * (1 - stop_loss / 100)
+
+    return take_profit_price, stop_loss_price
+
+
+class Strategy:
+    def __init__(self, client: Union["BitmexClient", "BinanceClient"], contract: ExchangeContract, exchange: str,
+                 timeframe: str, balance_pct: float, take_profit: float, stop_loss: float, strat_name):
+
+        self.client = client
+
+        self.contract = contract
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.timeframe_equiv = TFRAME_EQUIV[timeframe] * 1000
+        self.balance_pct = balance_pct
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+
+        self.strategy_name = strat_name
+        self.latency_name = f"{strat_name} {timeframe}"  # Strategy of the latency histograms, see latency.py
+
+        self.ongoing_position = False
+
+        # Own feed until attach_feed() is called, its candles are a fixed size ring (see candle_buffer.py)
+        self.feed = CandleFeed(exchange, contract, timeframe)
+        self.candles = self.feed.candles
+
+        self.trades: List[Trade] = []  # trades is a list of Trade objects
+        self.trigger_book = TriggerBook()  # Take profit / Stop loss prices of the filled open trades
+        self.logs = []
+
+    def add_log(self, msg: str):
+        logger.info("%s", msg)
+        self.logs.append({"log": msg, "displayed": False})  # Append a dictionary with a log new_log
+
+    def attach_feed(self, feed: CandleFeed):
+
+        # Use the candles of a feed shared with other strategies (see get_candle_feed() in the clients)
+
+        self.feed = feed
+        self.candles = feed.candles
+
+    def parse_trades(self, price: float, size: float, timestamp: int) -> str:
+
+        # Update the candles of the strategy feed with a new trade and check the Take profit / Stop loss.
+        # Strategies subscribed to a feed shared by the client receive on_feed_update() instead,
+        # so the trade is not aggregated once per strategy.
+
+        res = self.feed.parse_trades(price, size, timestamp)
+
+        if res == "same_candle":
+            self._check_open_trades()
+
+        return res
+
+    def on_feed_update(self, tick_type: str):
+
+        # Called by the feed after it parsed a new trade
+
+        mark_stage(PARSED, self.latency_name)
+
+        if tick_type == "same_candle":
+            self._check_open_trades()
+
+        self.check_trade(tick_type)
+
+    def _check_open_trades(self):
+
+        # Check Take profit / Stop loss against the nearest trigger prices, see trigger_book.py
+
+        current_price = float(self.candles.closes[-1])
+
+        for trade, trigger in self.trigger_book.check(current_price):
+            self._close_trade(trade, trigger == "stop_loss", current_price)
+
+    def _register_trade(self, trade: Trade):
+
+        # Called once the entry price of the trade is known
+
+        take_profit_price, stop_loss_price = tp_sl_prices(trade.entry_price, trade.side, self.take_profit,
+                                                          self.stop_loss)
+        self.trigger_book.add(trade, take_profit_price, stop_loss_price)
+
+    def _on_entry_order_status(self, trade_order_status: OrderStatus):
+
+        # Called by the order tracker of the client once an entry order that was not filled when placed is finished
+
+        logger.info("%s order status: %s", self.exchange, trade_order_status.status)
+
+        for trade in self.trades:  # Loop through the trades - it may not be the only one placed
+            if trade.entry_id == trade_order_status.order_id:
+                # A canceled or expired order may still be partly filled: the position is real and needs its
+                # Take profit / Stop loss
+                if trade_order_status.executed_qty > 0:
+                    if trade_order_status.status != "filled":
+                        self.add_log(f"Entry order on {self.contract.symbol} {self.timeframe} "
+                                     f"{trade_order_status.status}, {trade_order_status.executed_qty} filled")
+                    trade.entry_price = trade_order_status.average_price
+                    trade.quantity = trade_order_status.executed_qty
+                    self._register_trade(trade)
+                else:
+                    self.add_log(f"Entry order on {self.contract.symbol} {self.timeframe} {trade_order_status.status}")
+                    trade.status = "closed"
+                    self.ongoing_position = False
+                break
+
+    def check_trade(self, tick_type: str):
+
+        # triggered from the websocket _on_message() methods, through the feed
+
+        signal_result = self._signal(tick_type)
+
+        if signal_result in [1, -1]:
+            self._open_position(signal_result)
+
+    def _signal(self, tick_type: str) -> int:
+
+        # 1 for a Long signal, -1 for a Short signal, 0 when no position should be opened after this update.
+        # Only reads the candles, the asyncio clients call it with the feed lock held (see StrategyTask).
+
+        raise NotImplementedError
+
+    def _open_position(self, signal_result: int, price: Optional[float] = None):
+
+        # Open Long or Short position based on the signal result.
+        # signal_result: 1 (Long) or -1 (Short)
+        # price: last close, read by the caller with the feed lock held when the candles are written by another thread
+
+        mark_stage(SIGNAL, self.latency_name)
+
+        if price is None:
+            price = float(self.candles.closes[-1])
+
+        trade_size = self.client.get_trade_size(self.contract, price, self.balance_pct)
+        if trade_size is None:
+            return
+
+        order_type = "buy" if signal_result == 1 else "sell"
+        position_side = "long" if signal_result == 1 else "short"
+
+        self.add_log(f"{position_side.capitalize()} signal on {self.contract.symbol} {self.timeframe}")
+
+        order_state = self.client.create_crypto_trade_order(self.contract, "MARKET", trade_size, order_type)
+
+        if order_state is not None:
+            self.add_log(f"{order_type.capitalize()} order placed on {self.exchange} | Status: {order_state.status}")
+
+            self.ongoing_position = True
+
+            average_fill_price = None
+
+            if order_state.status == "filled":
+                average_fill_price = order_state.average_price
+
+            new_trade = Trade({"time": int(self.feed.clock() * 1000), "entry_price": average_fill_price,
+                               "contract": self.contract, "strategy": self.strategy_name, "side": position_side,
+                               "status": "open", "profitloss": 0, "quantity": order_state.executed_qty,
+                               "entry_id": order_state.order_id})
+            self.trades.append(new_trade)
+
+            if average_fill_price is not None:
+                self._register_trade(new_trade)
+            else:
+                self.client.order_tracker.track(self.contract, order_state.order_id, self._on_entry_order_status)
+
+    def _close_trade(self, trade: Trade, stop_loss_triggered: bool, current_price: float):
+
+        # Place the exit order of a trade whose Stop loss or Take profit was reached
+
+        mark_stage(SIGNAL, self.latency_name)
+
+        self.add_log(
+            f"| Current Price = {current_price} (Entry price was {trade.entry_price})"
+            f"{'Stop loss' if stop_loss_triggered else 'Take profit'} for {self.contract.symbol} {self.timeframe} ")
+
+        order_side = "SELL" if trade.side == "long" else "BUY"
+
+        order_status = self.client.create_crypto_trade_order(self.contract, "MARKET", trade.quantity, order_side)
+
+        if order_status is not None:
+            self.add_log(f"Exit order on {self.contract.symbol} {self.timeframe} placed successfully")
+            trade.status = "closed"
+            self.trigger_book.remove(trade)
+            self.ongoing_position = False
+
+class BreakoutStrategy(Strategy):
+    def __init__(self, client, contract: ExchangeContract, exchange: str, timeframe: str, balance_pct: float,
+                 take_profit: float,
+                 stop_loss: float, other_params: Dict):
+        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Breakout")
+        # only one variable needed - The min volume
+        self.min_volume = other_params['min_volume']
+
+    def _check_signal(self) -> int:
+
+        # Use candlesticks OHLC data to define Long or Short patterns and return a 1 for long signal and -1 for the short signal
+
+        closes, highs, lows, volumes = self.candles.closes, self.candles.highs, self.candles.lows, self.candles.volumes
+
+        return int(breakout_signal(closes[-1], highs[-2], lows[-2], volumes[-1], self.min_volume))
+
+    def _signal(self, tick_type: str) -> int:
+
+        # Checked on every trade
+
+        if self.ongoing_position:
+            return 0
+
+        return self._check_signal()
+
+class TechnicalStrategy(Strategy):
+    def __init__(self, client, contract: ExchangeContract, exchange: str, timeframe: str, balance_pct: float,
+                 take_profit: float,
+                 stop_loss: float, other_params: Dict):
+        super().__init__(client, contract, exchange, timeframe, balance_pct, take_profit, stop_loss, "Technical")
+
+
+        self._ema_slow = other_params['ema_slow']
+        self._ema_fast = other_params['ema_fast']
+        self._rsi_length = other_params['rsi_length']
+        self._ema_signal = other_params['ema_signal']
+
+        # Indicators are updated in constant time for each closed candle instead of being recomputed on all candles
+        self._macd_engine = StreamingMacd(self._ema_fast, self._ema_slow, self._ema_signal)
+        self._rsi_engine = StreamingRsi(self._rsi_length)
+        self._closed_candles = 0
+
+    def _update_indicators(self):
+
+        # Feed the close of every candle that finished since the last call into the streaming indicators.
+        # The last candle is still in progress, so it is left out until the next one starts.
+
+        closed_candles = self.candles.total - 1
+        first_held = self.candles.total - len(self.candles)  # Absolute index of the oldest candle in the buffer
+
+        start = max(self._closed_candles, first_held)
+
+        for close in self.candles.closes[start - first_held:closed_candles - first_held].tolist():
+            self._macd_engine.update(close)
+            self._rsi_engine.update(close)
+
+        self._closed_candles = max(self._closed_candles, closed_candles)
+
+    def _rsi(self) -> float:
+
+        # Relative Strength Index of the last completed candle.
+
+        self._update_indicators()
+
+        return self._rsi_engine.value
+
+    def _macd(self) -> Tuple[float, float]:
+
+        # MACD and its Signal line of the last completed candle.
+
+        self._update_indicators()
+
+        return self._macd_engine.macd_line, self._macd_engine.macd_signal
+
+    def _check_signal(self):
+
+        # Compute technical indicators and compare their value to some predefined levels to know whether to go Long, Short, or do nothing.
+        # 1 for a Long signal, -1 for a Short signal, 0 for no signal
+
+        macd_line, macd_signal = self._macd()
+        relative_strength_index = self._rsi()
+
+        logger.debug("rsi = %s, MACD signal = %s, MACD line = %s", relative_strength_index, macd_signal, macd_line)
+
+        return int(technical_signal(relative_strength_index, macd_line, macd_signal))
+
+    def _signal(self, tick_type: str) -> int:
+
+        # Triggered only once per candlestick to avoid constantly calculating the indicators.
+        # A trade can occur only if the is no open position at the moment.
+
+        if tick_type != "new_candle" or self.ongoing_position:
+            return 0
+
+        return self._check_signal()
+
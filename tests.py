@@ -1,4 +1,29 @@
+import base64
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import random
+import socket
+import struct
+import tempfile
+import threading
+import time
+import types
 import unittest
+import unittest.mock
+import urllib.error
+import urllib.request
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import dateutil.parser
+import numpy as np
+import pandas as pd
+import websocket
 
 from exchanges.bitmex import BitmexClient
 from exchanges.binance import BinanceClient
@@ -7,6 +32,27 @@ from exchanges import binance, bitmex
 from main import MainMenu
 from main import *
 from strategies import *
+from indicators import *
+from candle_buffer import CandleBuffer
+from backtesting import *
+from parameter_sweep import run_sweep, expand_grid
+from candle_feed import CandleFeed, MultiTimeframeFeed, resample_candles
+from candle_cache import CandleCache
+from candle_file import CandleFile, CandleFileWriter, CandleFeedWriter
+from downloader import BitmexHistory, Downloader, RateLimiter, main as download_main
+from recorder import TickRecorder, read_ticks, segment_paths
+from replay import Replay, ReplayBinanceClient, ReplayBitmexClient
+from latency import LatencyHistogram, LatencyTracker, mark_stage
+from metrics import MetricsServer, start_metrics_server
+from mock_exchange import MockExchange
+from trigger_book import TriggerBook
+from order_tracker import OrderTracker, MAX_EARLY_UPDATES
+from balance_cache import BalanceCache
+from transport import Transport
+from decoding import *
+from models import candle_factory, contract_factory
+from exchanges.async_client import SyncClient
+from exchanges.async_binance import AsyncBinanceClient
 from exchanges import *
 from exchanges import *
 
@@ -30,16 +76,27 @@ class TestBinanceConnection(unittest.TestCase):
 """
 
 class TestBitmexConnection(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockExchange().start()  # Instead of the Bitmex testnet, see mock_exchange.py
+
+    def tearDown(self):
+        self.mock.stop()
+
     def test_bitmex_connection(self):
         public_key_bitmex = "tyhjtyjdtyjdtyjdtyjdtyd456356y35"
         secret_key_bitmex = "455345g56h56h356huki8kl689o5o567n6737g67j74j67j46873563657m7m567"
         testnet = True
 
-        connection = BitmexClient(public_key_bitmex, secret_key_bitmex, testnet)
+        connection = BitmexClient(public_key_bitmex, secret_key_bitmex, testnet, base_url=self.mock.url,
+                                  wss_url=self.mock.bitmex_wss_url)
 
-        self.assertIsInstance(connection.public_key_bitmex, str)
-        self.assertIsInstance(connection.secret_key_bitmex, str)
-        self.assertIsInstance(connection.testnet, bool)
+        try:
+            self.assertIsInstance(connection.public_key_bitmex, str)
+            self.assertIsInstance(connection.secret_key_bitmex, str)
+            self.assertIsInstance(connection.testnet, bool)
+            self.assertIn("XBTUSD", connection.contracts)
+        finally:
+            _close_client(connection)
 
 class TestParentStrategy(unittest.TestCase):
     def test_strategy(self):
@@ -62,6 +119,1627 @@ class TestParentStrategy(unittest.TestCase):
         self.assertIsInstance(new_strategy.take_profit, float)
         self.assertIsInstance(new_strategy.stop_loss, float)
 
+def _random_walk_candles(count, seed=42, start=1650000000000):
+    # Deterministic candle history used in place of exchange data
+    rng = random.Random(seed)
+    candles = []
+    close = 30000.0
+    for i in range(count):
+        open_price = close
+        close = round(open_price * (1 + rng.gauss(0, 0.003)), 2)
+        if 100 <= i < 110:  # A flat stretch, like the missing candles added by parse_trades()
+            close = open_price
+        high = max(open_price, close) + round(rng.random() * 20, 2)
+        low = min(open_price, close) - round(rng.random() * 20, 2)
+        candle_info = {'ts': start + i * 60000, 'open': open_price, 'high': high, 'low': low,
+                       'close': close, 'volume': round(rng.random() * 50, 3)}
+        candles.append(Candle(candle_info, "1m", "parse_trade"))
+    return candles
+
+
+def _binance_contract(symbol="BTCUSDT"):
+    return ExchangeContract({'symbol': symbol, 'baseAsset': symbol[:-4], 'quoteAsset': "USDT",
+                             'pricePrecision': 2, 'quantityPrecision': 3}, "binance_futures")
+
+
+class _FakeOrderClient:
+    # Fills every market order at the price given to get_trade_size()
+
+    def __init__(self):
+        self.orders = []
+        self.price = None
+
+    def get_trade_size(self, contract, price, balance_pct):
+        self.price = price
+        return 1.0
+
+    def create_crypto_trade_order(self, contract, order_type, quantity, side, price=None, tif=None):
+        self.orders.append((side.lower(), quantity))
+        return OrderStatus({'orderId': len(self.orders), 'status': "FILLED", 'avgPrice': str(self.price),
+                            'executedQty': str(quantity)}, "binance_futures")
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    def test_macd_rsi_parity_with_pandas(self):
+        params = {'ema_fast': 12, 'ema_slow': 26, 'ema_signal': 9, 'rsi_length': 14}
+        history = _random_walk_candles(600)
+
+        strategy = TechnicalStrategy(None, None, "Binance", "1m", 1.0, 2.0, 2.0, params)
+        strategy.candles.extend(history[:1])
+
+        for i in range(2, len(history) + 1):
+            strategy.candles.extend(history[i - 1:i])
+
+            closes = pd.Series([candle.close for candle in history[:i]])
+            macd_line, macd_signal = macd_series(closes, params['ema_fast'], params['ema_slow'], params['ema_signal'])
+            rsi = rsi_series(closes, params['rsi_length'])
+
+            streaming_line, streaming_signal = strategy._macd()
+            streaming_rsi = strategy._rsi()
+
+            self.assertAlmostEqual(streaming_line, macd_line.iloc[-2], places=9)
+            self.assertAlmostEqual(streaming_signal, macd_signal.iloc[-2], places=9)
+            if pd.isna(rsi.iloc[-2]):
+                self.assertTrue(pd.isna(streaming_rsi))
+            else:
+                self.assertEqual(streaming_rsi, rsi.iloc[-2])
+
+    def test_streaming_rsi_matches_full_series(self):
+        history = _random_walk_candles(300)
+
+        rsi = StreamingRsi(14)
+        for candle in history:
+            rsi.update(candle.close)
+
+        expected = rsi_series(pd.Series([candle.close for candle in history]), 14)
+        self.assertEqual(rsi.value, expected.iloc[-1])
+
+
+class TestCandleBuffer(unittest.TestCase):
+    def test_ring_keeps_last_candles_in_order(self):
+        history = _random_walk_candles(25)
+
+        candles = CandleBuffer(capacity=10)
+        candles.extend(history)
+
+        self.assertEqual(len(candles), 10)
+        self.assertEqual(candles.total, 25)
+        self.assertEqual(candles.timestamps.tolist(), [c.timestamp for c in history[-10:]])
+        self.assertEqual(candles.closes.tolist(), [c.close for c in history[-10:]])
+        self.assertEqual(candles[0].open, history[-10].open)
+        self.assertEqual(candles[-1].high, history[-1].high)
+
+    def test_columns_are_views(self):
+        candles = CandleBuffer(capacity=4)
+        candles.extend(_random_walk_candles(6))
+
+        self.assertFalse(candles.closes.flags.owndata)
+
+    def test_update_last(self):
+        candles = CandleBuffer(capacity=3)
+        candles.extend(_random_walk_candles(4))
+        last = candles[-1]
+
+        candles.update_last(last.high + 5, 2.0)
+        candles.update_last(last.low - 5, 1.0)
+
+        self.assertEqual(candles[-1].close, last.low - 5)
+        self.assertEqual(candles[-1].high, last.high + 5)
+        self.assertEqual(candles[-1].low, last.low - 5)
+        self.assertAlmostEqual(candles[-1].volume, last.volume + 3.0)
+
+    def test_parse_trades_missing_candles(self):
+        strategy = BreakoutStrategy(None, _binance_contract(), "Binance", "1m", 1.0, 2.0, 2.0, {'min_volume': 1.0})
+        strategy.candles.extend(_random_walk_candles(3))
+        last = strategy.candles[-1]
+
+        self.assertEqual(strategy.parse_trades(last.close + 1, 0.5, last.timestamp + 1000), "same_candle")
+        self.assertEqual(strategy.parse_trades(last.close + 2, 0.5, last.timestamp + 3 * 60000 + 10), "new_candle")
+
+        self.assertEqual(len(strategy.candles), 6)
+        self.assertEqual(strategy.candles[-2].volume, 0)
+        self.assertEqual(strategy.candles[-2].close, last.close + 1)
+        self.assertEqual(strategy.candles[-1].timestamp, last.timestamp + 3 * 60000)
+
+
+class TestBacktesting(unittest.TestCase):
+    def test_signals_match_live_strategies(self):
+        history = _random_walk_candles(400)
+        data = candle_arrays(history)
+
+        params = {'ema_fast': 5, 'ema_slow': 12, 'ema_signal': 4, 'rsi_length': 6}
+        technical = TechnicalStrategy(None, None, "Binance", "1m", 1.0, 2.0, 2.0, params)
+        breakout = BreakoutStrategy(None, None, "Binance", "1m", 1.0, 2.0, 2.0, {'min_volume': 20.0})
+
+        technical_signals = compute_signals("Technical", data, params)
+        breakout_signals = compute_signals("Breakout", data, {'min_volume': 20.0})
+
+        for i, candle in enumerate(history):
+            technical.candles.append(candle.timestamp, candle.open, candle.high, candle.low, candle.close,
+                                     candle.volume)
+            breakout.candles.append(candle.timestamp, candle.open, candle.high, candle.low, candle.close,
+                                    candle.volume)
+            if i >= 1:
+                # The live Technical strategy looks at the candle before the one in progress
+                self.assertEqual(technical._check_signal(), technical_signals[i - 1])
+                self.assertEqual(breakout._check_signal(), breakout_signals[i])
+
+        self.assertTrue(technical_signals.any())
+        self.assertTrue(breakout_signals.any())
+
+    def test_take_profit_and_stop_loss(self):
+        data = {"timestamp": [0, 60000, 120000, 180000, 240000, 300000],
+                "open": [100, 100, 103, 104, 101, 96],
+                "high": [101, 104, 103, 106, 101, 97],
+                "low": [99, 99, 102, 103, 94, 95],
+                "close": [100, 103, 103, 104, 95, 96],
+                "volume": [1, 10, 1, 10, 1, 1]}
+
+        result = run_backtest("Breakout", data, 2.0, 1.0, {'min_volume': 5}, balance_pct=100,
+                              initial_balance=1000)
+
+        trades = result.trades
+        self.assertEqual(trades["side"].tolist(), ["long", "long"])
+        self.assertEqual(trades["entry_price"].tolist(), [103, 104])
+        self.assertEqual(trades["exit_reason"].tolist(), ["take_profit", "stop_loss"])
+        self.assertAlmostEqual(trades["exit_price"].iloc[0], 103 * 1.02)
+        self.assertAlmostEqual(trades["exit_price"].iloc[1], 101)  # Opened below the stop loss price
+        self.assertAlmostEqual(result.equity[-1], 1000 + trades["profitloss"].sum())
+        self.assertEqual(result.stats()["trades"], 2)
+
+
+class TestParameterSweep(unittest.TestCase):
+    def test_sweep_ranks_and_caches(self):
+        history = _random_walk_candles(500)
+        grid = {'min_volume': [10.0, 25.0, 40.0], 'take_profit': [0.5, 1.0], 'stop_loss': [0.5]}
+
+        self.assertEqual(len(expand_grid(grid)), 6)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "cache.db")
+            output_path = os.path.join(tmp, "results.csv")
+
+            table = run_sweep("Breakout", history, grid, output_path=output_path, cache_path=cache_path,
+                              max_workers=2)
+
+            self.assertEqual(len(table), 6)
+            self.assertTrue(table["return_pct"].is_monotonic_decreasing)
+            self.assertTrue(os.path.exists(output_path))
+
+            expected = run_backtest("Breakout", history, 1.0, 0.5, {'min_volume': 25.0}).stats()
+            row = table[(table["min_volume"] == 25.0) & (table["take_profit"] == 1.0)].iloc[0]
+            self.assertAlmostEqual(row["return_pct"], expected["return_pct"])
+
+            # Every combination is in the cache, no worker process is needed
+            cached_table = run_sweep("Breakout", history, grid, cache_path=cache_path, max_workers=0)
+            self.assertEqual(cached_table["return_pct"].tolist(), table["return_pct"].tolist())
+
+
+class TestCandleFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "BTCUSDT_1m.candles")
+        self.history = _random_walk_candles(500)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_grow_and_range(self):
+        writer = CandleFileWriter(self.path, "binance_futures", "BTCUSDT", "1m", capacity=64)
+        writer.extend(candle_arrays(self.history[:100]))
+        for c in self.history[100:]:
+            writer.append(c.timestamp, c.open, c.high, c.low, c.close, c.volume)
+
+        # The candle in progress is replaced, older candles are rejected
+        last = self.history[-1]
+        writer.append(last.timestamp, last.open, last.high + 5, last.low, last.close, last.volume)
+        with self.assertRaises(ValueError):
+            writer.append(last.timestamp - 60000, 1, 1, 1, 1, 1)
+
+        self.assertEqual((len(writer), writer.capacity), (500, 512))
+        writer.close()
+
+        candle_file = CandleFile(self.path)
+        self.assertEqual((candle_file.exchange, candle_file.symbol, candle_file.timeframe, len(candle_file)),
+                         ("binance_futures", "BTCUSDT", "1m", 500))
+        np.testing.assert_array_equal(candle_file["close"], candle_arrays(self.history)["close"])
+        self.assertEqual(candle_file["high"][-1], last.high + 5)
+
+        start, end = self.history[10].timestamp, self.history[19].timestamp
+        self.assertEqual(len(candle_file.range(start, end)["timestamp"]), 10)
+        self.assertEqual(len(candle_file.range(start + 1, end + 1)["timestamp"]), 9)
+        self.assertEqual(len(CandleFile(self.path, start, end)), 10)
+
+        stats = run_backtest("Breakout", candle_file, 1.0, 0.5, {'min_volume': 25.0}).stats()
+        self.assertEqual(stats, run_backtest("Breakout", self.history, 1.0, 0.5, {'min_volume': 25.0}).stats())
+
+        table = run_sweep("Breakout", candle_file, {'min_volume': [25.0], 'take_profit': [1.0], 'stop_loss': [0.5]},
+                          cache_path=None, max_workers=1)
+        self.assertAlmostEqual(table["return_pct"][0], stats["return_pct"])
+
+    def test_grow_with_a_reader_open(self):
+        writer = CandleFileWriter(self.path, "binance_futures", "BTCUSDT", "1m", capacity=64)
+        writer.extend(candle_arrays(self.history[:64]))
+        reader = CandleFile(self.path)
+
+        # POSIX: the reader keeps the old file, refresh() sees the new one
+        writer.extend(candle_arrays(self.history[64:100]))
+        self.assertEqual(writer.capacity, 128)
+        np.testing.assert_array_equal(reader["close"], candle_arrays(self.history[:64])["close"])
+        np.testing.assert_array_equal(reader.refresh()["close"], candle_arrays(self.history[:100])["close"])
+
+        # Windows refuses to replace a mapped file: the writer keeps the old file and stays usable
+        writer.extend(candle_arrays(self.history[100:128]))
+        with unittest.mock.patch("os.replace", side_effect=PermissionError("file in use")):
+            with self.assertRaises(OSError):
+                writer.append(self.history[128].timestamp, 1, 1, 1, 1, 1)
+
+        self.assertEqual((len(writer), writer.capacity), (128, 128))
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        writer.extend(candle_arrays(self.history[128:]))
+        writer.close()
+        np.testing.assert_array_equal(CandleFile(self.path)["close"], candle_arrays(self.history)["close"])
+
+    def test_live_feed(self):
+        feed = CandleFeed("Binance", _binance_contract(), "1m")
+        feed.candles.extend(self.history[:50])
+
+        recorder = CandleFeedWriter(feed, CandleFileWriter(self.path, "binance_futures", "BTCUSDT", "1m"))
+
+        last = feed.candles[-1]
+        feed.on_trade(last.close, 2.0, last.timestamp + 1000)
+        self.assertEqual(len(recorder.writer), 0)
+
+        feed.on_trade(last.close, 2.0, last.timestamp + 60000)
+        recorder.stop()
+
+        candle_file = CandleFile(self.path)
+        self.assertEqual(len(candle_file), 50)
+        self.assertAlmostEqual(candle_file["volume"][-1], last.volume + 2.0)
+
+
+class TestDownloader(unittest.TestCase):
+    listing = 1650000000000
+
+    failures = 0
+
+    def _klines(self, params):
+        # 2500 synthetic 1m klines from the listing time, at most `limit` per request like /fapi/v1/klines.
+        # The requests sent while failures > 0 are rejected by the rate limit.
+        if self.failures > 0:
+            self.failures -= 1
+            return 429, {'code': -1003, 'msg': "Too many requests"}
+
+        start = max(int(params.get('startTime', self.listing)), self.listing)
+        end = min(int(params.get('endTime', start + 10 ** 12)), self.listing + 2499 * 60000)
+        first = -(-start // 60000) * 60000
+        return [[ts, "1.0", "2.0", "0.5", "1.5", "10"]
+                for ts in range(first, end + 1, 60000)][:int(params['limit'])]
+
+    def setUp(self):
+        symbol_info = {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 2,
+                       'quantityPrecision': 3}
+        self.rest = _FakeRestServer({("GET", "/fapi/v1/exchangeInfo"): {'symbols': [symbol_info]},
+                                     ("GET", "/fapi/v1/klines"): self._klines})
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.rest.close()
+        self.tmp.cleanup()
+
+    def _downloader(self):
+        return Downloader("binance", self.tmp.name, base_url=self.rest.url, workers=2, retries=2, retry_delay=0.01)
+
+    def test_paginated_and_resumed(self):
+        end_time = self.listing + 3000 * 60000
+
+        # Interrupted after 1500 candles
+        results = self._downloader().run(["BTCUSDT", "XXXUSDT"], ["1m"], self.listing - 60000,
+                                         self.listing + 1499 * 60000)
+        self.assertEqual(results, {("BTCUSDT", "1m"): 1500})
+
+        self.rest.requests.clear()
+        downloader = self._downloader()
+        results = downloader.run(["BTCUSDT"], ["1m"], self.listing - 60000, end_time)
+
+        # Resumed from the checkpoint: one page of 1000 candles, then an empty page
+        self.assertEqual(results, {("BTCUSDT", "1m"): 1000})
+        self.assertEqual(self.rest.requests.count(("GET", "/fapi/v1/klines")), 2)
+
+        candle_file = CandleFile(downloader.path("BTCUSDT", "1m"))
+        self.assertEqual(len(candle_file), 2500)
+        self.assertTrue(np.all(np.diff(candle_file["timestamp"]) == 60000))
+
+        with open(os.path.join(self.tmp.name, "checkpoint.json")) as f:
+            self.assertEqual(json.load(f), {"binance_futures BTCUSDT 1m": self.listing + 2500 * 60000})
+
+    def test_failed_requests(self):
+        end_time = self.listing + 3000 * 60000
+
+        # Two errors are retried
+        self.failures = 2
+        results = self._downloader().run(["BTCUSDT"], ["1m"], self.listing - 60000, self.listing + 1499 * 60000)
+        self.assertEqual(results, {("BTCUSDT", "1m"): 1500})
+
+        # Three are not: the job is reported failed and the download resumes from the checkpoint
+        self.failures = 3
+        results = self._downloader().run(["BTCUSDT"], ["1m"], self.listing - 60000, end_time)
+        self.assertEqual(results, {("BTCUSDT", "1m"): None})
+
+        argv = ["--symbols", "BTCUSDT", "--start", "2022-04-15", "--end", "2022-04-17", "--output-dir", self.tmp.name,
+                "--base-url", self.rest.url]
+        self.failures = 6  # The CLI retries 5 times
+        with unittest.mock.patch("time.sleep"), unittest.mock.patch("logging.basicConfig"), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(download_main(argv), 1)
+            self.assertEqual(download_main(argv), 0)
+
+        candle_file = CandleFile(self._downloader().path("BTCUSDT", "1m"))
+        self.assertEqual(len(candle_file), 2500)
+
+    def test_bitmex_requests_unsigned(self):
+        rest = _FakeRestServer({("GET", "/api/v1/instrument/active"): []})
+        client = BitmexHistory(base_url=rest.url)
+
+        self.assertEqual(client.get_cryptos(), dict())
+        client.transport.close()
+        rest.close()
+
+        self.assertEqual([key for key in rest.headers[0] if key.lower().startswith("api-")], [])
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(600)  # 10 per second
+        start = time.monotonic()
+
+        for _ in range(605):
+            limiter.acquire(1)
+
+        self.assertGreater(time.monotonic() - start, 0.4)
+
+
+class TestCandleFeed(unittest.TestCase):
+    def test_trades_are_aggregated_once_for_all_subscribers(self):
+        contract = _binance_contract()
+        feed = CandleFeed("Binance", contract, "1m")
+        feed.candles.extend(_random_walk_candles(50))
+
+        strategies = [BreakoutStrategy(None, contract, "Binance", "1m", 1.0, 2.0, 2.0, {'min_volume': 1e9})
+                      for _ in range(3)]
+        tick_types = []
+
+        for strategy in strategies:
+            strategy.attach_feed(feed)
+            strategy.check_trade = tick_types.append
+            feed.subscribe(strategy)
+
+        last = feed.candles[-1]
+        feed.on_trade(last.close, 2.0, last.timestamp + 1000)
+        feed.on_trade(last.close, 2.0, last.timestamp + 60000)
+
+        self.assertEqual(tick_types, ["same_candle"] * 3 + ["new_candle"] * 3)
+        self.assertAlmostEqual(feed.candles[-2].volume, last.volume + 2.0)
+        for strategy in strategies:
+            self.assertIs(strategy.candles, feed.candles)
+
+        feed.unsubscribe(strategies[0])
+        self.assertEqual(len(feed.subscribers), 2)
+
+
+class TestMultiTimeframeFeed(unittest.TestCase):
+    def test_resample_matches_pandas(self):
+        history = _random_walk_candles(1000)[7:]  # Starts in the middle of a 15m candle
+        data = candle_arrays(history)
+
+        resampled = resample_candles(data["timestamp"], data["open"], data["high"], data["low"], data["close"],
+                                     data["volume"], "15m")
+
+        df = pd.DataFrame(data, index=pd.to_datetime(data["timestamp"], unit="ms"))
+        expected = df.resample("15min").agg({"open": "first", "high": "max", "low": "min", "close": "last",
+                                             "volume": "sum"}).iloc[1:]
+
+        self.assertEqual(resampled["timestamp"][0] % (15 * 60000), 0)
+        for col in ["open", "high", "low", "close", "volume"]:
+            self.assertTrue(np.allclose(resampled[col], expected[col].to_numpy()))
+
+    def test_timeframes_built_from_one_trade_stream(self):
+        history = _random_walk_candles(1000)
+        requests = []
+
+        def historical_data(contract, timeframe):
+            requests.append(timeframe)
+            return history if timeframe == "1m" else []
+
+        symbol_feeds = MultiTimeframeFeed("Binance", _binance_contract(), historical_data, min_resampled_candles=10)
+        five_minutes = symbol_feeds.get_feed("5m")
+        one_hour = symbol_feeds.get_feed("1h")
+
+        self.assertEqual(requests, ["1m"])
+
+        rng = random.Random(3)
+        timestamp = history[-1].timestamp
+        for i in range(2000):
+            timestamp += rng.randint(0, 4000) if i != 1000 else 2 * 3600000  # Missing candles in every timeframe
+            symbol_feeds.on_trade(round(30000 + rng.random() * 100, 2), rng.random(), timestamp)
+
+        base = symbol_feeds.feeds["1m"].candles
+        for feed in [five_minutes, one_hour]:
+            expected = resample_candles(base.timestamps, base.opens, base.highs, base.lows, base.closes, base.volumes,
+                                        feed.timeframe)
+            count = len(expected["close"])
+            self.assertEqual(feed.candles.timestamps[-count:].tolist(), expected["timestamp"].tolist())
+            self.assertTrue(np.allclose(feed.candles.closes[-count:], expected["close"]))
+            self.assertTrue(np.allclose(feed.candles.highs[-count:], expected["high"]))
+            self.assertTrue(np.allclose(feed.candles.volumes[-count:], expected["volume"]))
+
+    def test_trades_parsed_once(self):
+        history = _random_walk_candles(1000)
+        symbol_feeds = MultiTimeframeFeed("Binance", _binance_contract(), lambda contract, timeframe: history,
+                                          min_resampled_candles=10, clock=lambda: history[-1].timestamp / 1000)
+        feeds = [symbol_feeds.get_feed(timeframe) for timeframe in ["1m", "5m", "15m", "1h"]]
+        counters = [_FeedCounter() for _ in feeds]
+        for feed, counter in zip(feeds, counters):
+            feed.subscribe(counter)
+
+        # One lag warning for the trade, not one per timeframe
+        with self.assertLogs(level="WARNING") as logs:
+            symbol_feeds.on_trade(30000, 1, history[-1].timestamp - 5000)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual([c.updates for c in counters], [1, 1, 1, 1])
+
+        history = _random_walk_candles(120, start=1650009600000)  # Starts at the beginning of a 4h candle
+        requests = []
+
+        def historical_data(contract, timeframe):
+            requests.append(timeframe)
+            return history
+
+        symbol_feeds = MultiTimeframeFeed("Bitmex", _binance_contract(), historical_data,
+                                          native_timeframes=["1m", "5m", "1h"])
+        symbol_feeds.get_feed("1h")  # Too few resampled candles, requested from the exchange
+        symbol_feeds.get_feed("4h")  # Not available from the exchange, resampled anyway
+
+        self.assertEqual(requests, ["1m", "1h"])
+        self.assertEqual(sorted(symbol_feeds.feeds), ["1h", "1m", "4h"])
+
+        symbol_feeds.remove_feed("1h")
+        symbol_feeds.remove_feed("4h")
+        self.assertEqual(symbol_feeds.feeds, {})
+
+    def test_1m_history_only_when_it_resamples(self):
+        history = _random_walk_candles(1000)
+        requests = []
+
+        def historical_data(contract, timeframe):
+            requests.append(timeframe)
+            if timeframe == "1m":
+                return history
+            data = candle_arrays(history)
+            resampled = resample_candles(data["timestamp"], data["open"], data["high"], data["low"], data["close"],
+                                         data["volume"], timeframe)
+            return [Candle({'ts': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}, timeframe,
+                           "parse_trade")
+                    for ts, o, h, l, c, v in zip(*(resampled[col].tolist() for col in ["timestamp", "open", "high",
+                                                                                      "low", "close", "volume"]))]
+
+        # 1000 1m candles make 66 15m candles: the 15m history is requested alone
+        symbol_feeds = MultiTimeframeFeed("Binance", _binance_contract(), historical_data, history_candles=1000,
+                                          clock=lambda: history[-1].timestamp / 1000 + 60)
+        fifteen_minutes = symbol_feeds.get_feed("15m")
+        self.assertEqual(requests, ["15m"])
+
+        # And 200 5m candles
+        symbol_feeds.get_feed("5m")
+        self.assertEqual(requests, ["15m", "1m"])
+        self.assertEqual(sorted(symbol_feeds.feeds), ["15m", "1m", "5m"])
+
+        # The 15m feed is now rolled up from the 1m feed
+        last = fifteen_minutes.candles[-1]
+        symbol_feeds.on_trade(last.close + 1, 2.0, history[-1].timestamp + 60000)
+        self.assertEqual(symbol_feeds.feeds["1m"].candles[-1].close, fifteen_minutes.candles[-1].close)
+
+
+class _FakeHistory:
+    def __init__(self, page_size: int, holes=(), failures: int = 0):
+
+        # _historical_data() of an exchange with 1m candles at any time except the holes, page_size per request.
+        # The next failures requests fail: no candle, like the clients on a REST error.
+
+        self.page_size = page_size
+        self.holes = set(holes)
+        self.failures = failures
+        self.requests = []
+
+    def __call__(self, contract, timeframe, start_time, end_time):
+        self.requests.append((start_time, end_time))
+
+        if self.failures > 0:
+            self.failures -= 1
+            return []
+
+        candles = []
+        ts = start_time
+        while ts <= end_time and len(candles) < self.page_size:
+            if ts not in self.holes:
+                candles.append(Candle({'ts': ts, 'open': ts, 'high': ts, 'low': ts, 'close': ts + 1, 'volume': 1},
+                                      timeframe, "parse_trade"))
+            ts += 60000
+
+        return candles
+
+
+class TestCandleCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CandleCache(":memory:")
+        self.contract = types.SimpleNamespace(symbol="BTCUSDT")
+        self.now = 1651400096787 - 1651400096787 % 60000
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_paginated_then_tail_only(self):
+        fetch = _FakeHistory(page_size=4, holes=[self.now - 5 * 60000])
+
+        candles = self.cache.history("binance_futures", self.contract, "1m", fetch, count=10, end_time=self.now)
+
+        self.assertEqual(len(fetch.requests), 3)
+        self.assertEqual([c.timestamp for c in candles],
+                         [self.now - i * 60000 for i in range(9, -1, -1) if i != 5])
+
+        # Two minutes later only the candles since the last cached one are requested, the hole is not
+        fetch.requests.clear()
+        candles = self.cache.history("binance_futures", self.contract, "1m", fetch, count=10,
+                                     end_time=self.now + 2 * 60000)
+
+        self.assertEqual(fetch.requests, [(self.now, self.now + 2 * 60000)])
+        self.assertEqual(candles[-1].timestamp, self.now + 2 * 60000)
+        self.assertEqual(len(candles), 9)
+
+        # A longer history only requests the older candles and the tail
+        fetch.requests.clear()
+        candles = self.cache.history("binance_futures", self.contract, "1m", fetch, count=15,
+                                     end_time=self.now + 2 * 60000)
+
+        self.assertEqual(fetch.requests[0], (self.now - 12 * 60000, self.now - 10 * 60000))
+        self.assertEqual(len(candles), 14)
+
+    def test_keys(self):
+        fetch = _FakeHistory(page_size=100)
+
+        self.cache.history("binance_futures", self.contract, "1m", fetch, count=5, end_time=self.now)
+        self.cache.history("bitmex", self.contract, "1m", fetch, count=5, end_time=self.now)
+
+        self.assertEqual(len(fetch.requests), 2)
+        self.assertEqual(self.cache.coverage("bitmex", "BTCUSDT", "1m"), (self.now - 4 * 60000, self.now))
+        self.assertIsNone(self.cache.coverage("bitmex", "BTCUSDT", "5m"))
+
+    def test_failed_request_is_retried(self):
+        fetch = _FakeHistory(page_size=100)
+        self.cache.history("binance_futures", self.contract, "1m", fetch, count=5, end_time=self.now)
+
+        # The older candles fail once: the covered range is not widened to them
+        fetch.failures = 1
+        fetch.requests.clear()
+        candles = self.cache.history("binance_futures", self.contract, "1m", fetch, count=10, end_time=self.now)
+
+        self.assertEqual(fetch.requests[0], (self.now - 9 * 60000, self.now - 5 * 60000))
+        self.assertEqual(len(candles), 5)
+        self.assertEqual(self.cache.coverage("binance_futures", "BTCUSDT", "1m"), (self.now - 4 * 60000, self.now))
+
+        # The gap is requested again by the next call
+        fetch.requests.clear()
+        candles = self.cache.history("binance_futures", self.contract, "1m", fetch, count=10, end_time=self.now)
+
+        self.assertEqual(fetch.requests[0], (self.now - 9 * 60000, self.now - 5 * 60000))
+        self.assertEqual(len(candles), 10)
+        self.assertEqual(self.cache.coverage("binance_futures", "BTCUSDT", "1m"), (self.now - 9 * 60000, self.now))
+
+
+class TestTriggerBook(unittest.TestCase):
+    def _trade(self, side, entry_price):
+        return Trade({"time": 0, "entry_price": entry_price, "contract": None, "strategy": "Breakout", "side": side,
+                      "status": "open", "profitloss": 0, "quantity": 1, "entry_id": 1})
+
+    def test_nearest_triggers(self):
+        book = TriggerBook()
+        long_trade = self._trade("long", 100)
+        short_trade = self._trade("short", 100)
+        book.add(long_trade, 110, 95)
+        book.add(short_trade, 90, 105)
+
+        self.assertEqual(book.check(100), [])
+        self.assertEqual(book.check(106), [(short_trade, "stop_loss")])
+        self.assertEqual(book.check(111), [(short_trade, "stop_loss"), (long_trade, "take_profit")])
+        self.assertEqual(book.check(94), [(long_trade, "stop_loss")])
+
+        book.remove(long_trade)
+        self.assertEqual(book.check(94), [])
+        self.assertEqual(book.trades, (short_trade,))
+
+    def test_strategy_exits_through_the_book(self):
+        client = _FakeOrderClient()
+        strategy = BreakoutStrategy(client, _binance_contract(), "Binance", "1m", 10.0, 2.0, 1.0,
+                                    {'min_volume': 0.5})
+        strategy.candles.extend(_random_walk_candles(2))
+
+        for i in range(200):  # Closed trades must not be checked any more
+            closed = Trade({"time": i, "entry_price": 1.0, "contract": None, "strategy": "Breakout", "side": "long",
+                            "status": "closed", "profitloss": 0, "quantity": 1, "entry_id": i})
+            strategy.trades.append(closed)
+
+        last = strategy.candles[-1]
+        entry = round(last.high + 10, 2)
+        strategy.parse_trades(entry, 1.0, last.timestamp + 60000)
+        strategy.check_trade("new_candle")
+
+        self.assertTrue(strategy.ongoing_position)
+        self.assertEqual(len(strategy.trigger_book), 1)
+
+        strategy.parse_trades(entry * 1.015, 0.1, last.timestamp + 61000)
+        self.assertEqual(client.orders, [("buy", 1.0)])
+
+        strategy.parse_trades(entry * 1.021, 0.1, last.timestamp + 62000)
+        self.assertEqual(client.orders, [("buy", 1.0), ("sell", 1.0)])
+        self.assertFalse(strategy.ongoing_position)
+        self.assertEqual(len(strategy.trigger_book), 0)
+        self.assertEqual(strategy.trades[-1].status, "closed")
+
+    def test_partly_filled_entry_order(self):
+        strategies = []
+
+        for status, executed_qty in (("CANCELED", "0.4"), ("EXPIRED", "0")):
+            strategy = BreakoutStrategy(_FakeOrderClient(), _binance_contract(), "Binance", "1m", 10.0, 2.0, 1.0,
+                                        {'min_volume': 0.5})
+            strategy.ongoing_position = True
+            strategy.trades.append(Trade({"time": 0, "entry_price": None, "contract": strategy.contract,
+                                          "strategy": "Breakout", "side": "long", "status": "open", "profitloss": 0,
+                                          "quantity": 0, "entry_id": 1}))
+            strategy._on_entry_order_status(OrderStatus({'orderId': 1, 'status': status, 'avgPrice': "100.0",
+                                                         'executedQty': executed_qty}, "binance_futures"))
+            strategies.append(strategy)
+
+        # Canceled after a partial fill: the trade stays open with the filled quantity and its Take profit
+        partial = strategies[0]
+        self.assertEqual((partial.trades[0].status, partial.trades[0].quantity, partial.trades[0].entry_price),
+                         ("open", 0.4, 100.0))
+        self.assertTrue(partial.ongoing_position)
+        self.assertEqual(partial.trigger_book.check(102.5), [(partial.trades[0], "take_profit")])
+
+        # Nothing filled: the trade is closed
+        self.assertEqual(strategies[1].trades[0].status, "closed")
+        self.assertFalse(strategies[1].ongoing_position)
+
+
+class _FakeStatusClient:
+    # Orders stay new for a number of polls, then they are filled
+
+    def __init__(self, polls_before_fill):
+        self.polls_before_fill = polls_before_fill
+        self.requests = []
+
+    def get_orders_status(self, contract, order_ids):
+        self.requests.append((contract.symbol, sorted(order_ids)))
+        status = "FILLED" if len(self.requests) > self.polls_before_fill else "NEW"
+        return {order_id: OrderStatus({'orderId': order_id, 'status': status, 'avgPrice': "100.5",
+                                       'executedQty': "2"}, "binance_futures") for order_id in order_ids}
+
+
+class TestOrderTracker(unittest.TestCase):
+    def test_orders_are_polled_together(self):
+        client = _FakeStatusClient(polls_before_fill=2)
+        tracker = OrderTracker(client, min_interval=0.05, max_interval=0.2)
+        filled = []
+
+        futures = [tracker.track(_binance_contract(), order_id, filled.append) for order_id in (1, 2)]
+        futures.append(tracker.track(_binance_contract("ETHUSDT"), 3))
+
+        statuses = [f.result(timeout=5) for f in futures]
+        tracker.stop()
+
+        self.assertEqual([s.status for s in statuses], ["filled"] * 3)
+        self.assertEqual(sorted(s.order_id for s in filled), [1, 2])
+        self.assertIn(("BTCUSDT", [1, 2]), client.requests)
+        self.assertEqual(len(tracker), 0)
+
+    def test_resolve_from_update(self):
+        client = _FakeStatusClient(polls_before_fill=1000)
+        tracker = OrderTracker(client, min_interval=10, max_interval=10)
+
+        future = tracker.track(_binance_contract(), 7)
+        self.assertFalse(tracker.resolve(OrderStatus({'orderId': 7, 'status': "NEW", 'avgPrice': "0",
+                                                      'executedQty': "0"}, "binance_futures")))
+        self.assertTrue(tracker.resolve(OrderStatus({'orderId': 7, 'status': "FILLED", 'avgPrice': "10",
+                                                     'executedQty': "1"}, "binance_futures")))
+
+        # Update pushed before the order request returned
+        self.assertFalse(tracker.resolve(OrderStatus({'orderId': 8, 'status': "FILLED", 'avgPrice': "11",
+                                                      'executedQty': "1"}, "binance_futures")))
+        early_future = tracker.track(_binance_contract(), 8)
+        tracker.stop()
+
+        self.assertEqual(future.result(timeout=1).average_price, 10.0)
+        self.assertEqual(early_future.result(timeout=0).average_price, 11.0)
+        self.assertEqual(client.requests, [])
+
+    def test_early_updates_expire(self):
+        tracker = OrderTracker(_FakeStatusClient(polls_before_fill=1000), min_interval=10, max_interval=10,
+                               early_update_seconds=0.1)
+
+        # Updates of orders that are never tracked (filled when placed, exit orders)
+        for order_id in range(MAX_EARLY_UPDATES):
+            tracker.resolve(OrderStatus({'orderId': order_id, 'status': "FILLED", 'avgPrice': "10",
+                                         'executedQty': "1"}, "binance_futures"))
+        time.sleep(0.2)
+
+        # They expired instead of evicting the update of an order being placed
+        tracker.resolve(OrderStatus({'orderId': "new", 'status': "FILLED", 'avgPrice': "11", 'executedQty': "1"},
+                                    "binance_futures"))
+        self.assertEqual(len(tracker._early_updates), 1)
+        future = tracker.track(_binance_contract(), "new")
+        self.assertEqual(tracker.track(_binance_contract(), 0).done(), False)
+        tracker.stop()
+
+        self.assertEqual(future.result(timeout=0).average_price, 11.0)
+
+
+class TestTransport(unittest.TestCase):
+    def test_latency_stats(self):
+        rest = _FakeRestServer({("GET", "/fapi/v1/time"): {'serverTime': 1}})
+        transport = Transport(rest.url, headers={'X-MBX-APIKEY': "public"})
+
+        for _ in range(3):
+            self.assertEqual(transport.request("GET", "/fapi/v1/time").json(), {'serverTime': 1})
+        self.assertEqual(transport.request("POST", "/fapi/v1/order", {'symbol': "BTCUSDT"}).status_code, 404)
+
+        stats = transport.latency_stats()
+        transport.close()
+        rest.close()
+
+        self.assertEqual(stats["GET /fapi/v1/time"]["count"], 3)
+        self.assertEqual(stats["POST /fapi/v1/order"]["count"], 1)
+        self.assertEqual((stats["GET /fapi/v1/time"]["errors"], stats["POST /fapi/v1/order"]["errors"]), (0, 1))
+        self.assertGreater(stats["GET /fapi/v1/time"]["p95_ms"], 0)
+
+
+class TestDecoding(unittest.TestCase):
+    def test_bitmex_timestamps(self):
+        for timestamp in ["2022-05-01T10:14:56.787Z", "2020-02-29T23:59:59.999Z", "1999-12-31T00:00:00.000Z",
+                          "2022-05-01T10:14:56Z", "2022-05-01T10:14:56.787+00:00"]:
+            expected = int(dateutil.parser.isoparse(timestamp).timestamp() * 1000)
+            self.assertEqual(parse_bitmex_timestamp(timestamp), expected, timestamp)
+
+    def test_records(self):
+        agg_trade = '{"e":"aggTrade","s":"BTCUSDT","p":"38123.40","q":"0.012","T":1651400096787,"m":true}'
+        spot_ticker = '{"u":400900217,"s":"BNBUSDT","b":"25.35","B":"31.21","a":"25.36","A":"40.66"}'
+        bitmex_trade = ('{"table":"trade","action":"insert","data":[{"timestamp":"2022-05-01T10:14:56.787Z",'
+                        '"symbol":"XBTUSD","side":"Buy","size":1200,"price":38121.5}]}')
+
+        for loads in [json.loads, default_loads]:
+            self.assertEqual(BinanceDecoder(loads).decode(agg_trade), AggTrade("BTCUSDT", 38123.4, 0.012, 1651400096787))
+            self.assertEqual(BinanceDecoder(loads).decode(spot_ticker), BookTicker("BNBUSDT", 25.35, 25.36))
+            self.assertEqual(BinanceDecoder(loads).decode('{"result":null,"id":1}'), {"result": None, "id": 1})
+            self.assertEqual(BitmexDecoder(loads).decode(bitmex_trade)['data'],
+                             [BitmexTrade("XBTUSD", 38121.5, 1200.0, 1651400096787)])
+
+
+class TestModels(unittest.TestCase):
+    def test_slots(self):
+        candle = Candle({'ts': 0, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 10.0}, "1m",
+                        "parse_trade")
+
+        self.assertFalse(hasattr(candle, "__dict__"))
+        with self.assertRaises(AttributeError):
+            candle.other = 1
+
+    def test_factories(self):
+        kline = [1651363200000, "38123.40", "38150.10", "38100.00", "38140.20", "152.312"]
+        bucket = {'timestamp': "2022-05-01T10:15:00.000Z", 'open': 38121.5, 'high': 38150.0, 'low': 38100.0,
+                  'close': 38140.0, 'volume': 1200}
+        instrument = {'symbol': "XBTUSD", 'rootSymbol': "XBT", 'quoteCurrency': "USD", 'tickSize': 0.5, 'lotSize': 100,
+                      'isQuanto': False, 'isInverse': True, 'multiplier': -100000000}
+
+        for candle_info, exchange in [(kline, "binance_futures"), (bucket, "bitmex")]:
+            candle = candle_factory(exchange)(candle_info, "5m")
+            expected = Candle(candle_info, "5m", exchange)
+            self.assertEqual([getattr(candle, a) for a in Candle.__slots__],
+                             [getattr(expected, a) for a in Candle.__slots__])
+
+        # Bitmex timestamps are the end of the candle
+        self.assertEqual(candle_factory("bitmex")(bucket, "5m").timestamp,
+                         int(dateutil.parser.isoparse(bucket['timestamp']).timestamp() * 1000) - 5 * 60000)
+
+        contract = contract_factory("bitmex")(instrument)
+        self.assertEqual((contract.symbol, contract.price_decimals, contract.quantity_decimals, contract.multiplier,
+                          contract.exchange), ("XBTUSD", 1, 0, 1.0, "bitmex"))
+
+
+class TestBalanceCache(unittest.TestCase):
+    def setUp(self):
+        self.requests = 0
+
+    def _fetch(self):
+        self.requests += 1
+        return {"USDT": Balance({'initialMargin': "0", 'maintMargin': "0", 'marginBalance': "1000",
+                                 'walletBalance': str(1000 + self.requests), 'unrealizedProfit': "0"},
+                                "binance_futures")}
+
+    def test_cached_until_stale(self):
+        cache = BalanceCache(self._fetch, ttl=0.2, refresh_interval=60)
+        self.assertEqual(self.requests, 1)
+
+        self.assertEqual(cache.get("USDT").wallet_balance, 1001)
+        self.assertEqual(self.requests, 1)
+        self.assertFalse(cache.is_stale("USDT"))
+
+        time.sleep(0.25)
+        self.assertTrue(cache.is_stale("USDT"))
+        self.assertEqual(cache.get("USDT").wallet_balance, 1002)  # Forced refresh
+        self.assertEqual(self.requests, 2)
+        self.assertEqual(cache.last_source, "rest")
+
+        time.sleep(0.25)
+        self.assertTrue(cache.update("USDT", wallet_balance=950.0))  # Account event
+        self.assertFalse(cache.update("BNB", wallet_balance=1.0))
+        self.assertEqual(cache.get("USDT").wallet_balance, 950.0)
+        self.assertEqual(self.requests, 2)
+        self.assertEqual(cache.last_source, "push")
+        cache.stop()
+
+    def test_background_refresh(self):
+        cache = BalanceCache(self._fetch, ttl=60, refresh_interval=0.05)
+        self.assertTrue(_wait_for(lambda: self.requests >= 3))
+        cache.stop()
+        self.assertLess(cache.age(), 1)
+
+
+class _FakeRestServer:
+    # Local HTTP server answering {(method, path): json response, or function of the query parameters}.
+    # A function returns (status code, json response) to answer with an error.
+
+    def __init__(self, routes):
+        self.requests = []
+        self.headers = []
+        self.queries = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                path, _, query = self.path.partition("?")
+                server.requests.append((self.command, path))
+                server.headers.append(dict(self.headers))
+                server.queries.append(query)
+                answer = routes.get((self.command, path), {})
+                status = 200 if (self.command, path) in routes else 404
+                if callable(answer):
+                    answer = answer(dict(parse_qsl(query)))
+                    if isinstance(answer, tuple):
+                        status, answer = answer
+                body = json.dumps(answer).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%s" % self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _FakeWebsocketServer:
+    # Local websocket server that pushes text frames to the connections opened on a path
+
+    def __init__(self):
+        self.connections = []
+
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = "ws://127.0.0.1:%s" % self.sock.getsockname()[1]
+
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+
+            request = b""
+            while b"\r\n\r\n" not in request:
+                request += conn.recv(1024)
+
+            lines = request.decode().split("\r\n")
+            key = [line.split(":", 1)[1].strip() for line in lines if line.lower().startswith("sec-websocket-key")][0]
+            accept = base64.b64encode(hashlib.sha1((key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest())
+
+            conn.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                         b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+            self.connections.append((lines[0].split(" ")[1], conn))
+
+    def paths(self):
+        return [path for path, _ in self.connections]
+
+    def send(self, path, message):
+        data = json.dumps(message).encode()
+        header = bytes([0x81, len(data)]) if len(data) < 126 else bytes([0x81, 126]) + struct.pack(">H", len(data))
+
+        for conn_path, conn in self.connections:
+            if conn_path == path:
+                conn.sendall(header + data)
+
+    def close(self):
+        self.sock.close()
+        for _, conn in self.connections:
+            conn.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    end = time.time() + timeout
+    while not condition():
+        if time.time() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _close_client(client):
+    # Stops the websockets and the background threads of a BinanceClient / BitmexClient
+    client.reconnect = False
+    for name in ("web_s", "user_ws", "ws"):
+        if getattr(client, name, None) is not None:
+            getattr(client, name).close()
+    client.order_tracker.stop()
+    client.balance_cache.stop()
+
+
+class TestBinanceUserDataStream(unittest.TestCase):
+    def setUp(self):
+        symbol_info = {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 2,
+                       'quantityPrecision': 3}
+        usdt_info = {'asset': "USDT", 'initialMargin': "0", 'maintMargin': "0", 'marginBalance': "1000",
+                     'walletBalance': "1000", 'unrealizedProfit': "0"}
+
+        self.rest = _FakeRestServer({("GET", "/fapi/v1/exchangeInfo"): {'symbols': [symbol_info]},
+                                     ("GET", "/fapi/v1/account"): {'assets': [usdt_info]},
+                                     ("POST", "/fapi/v1/listenKey"): {'listenKey': "key1"},
+                                     ("PUT", "/fapi/v1/listenKey"): {}})
+        self.ws = _FakeWebsocketServer()
+
+        self.client = BinanceClient("public", "secret", True, True, base_url=self.rest.url, wss_url=self.ws.url)
+
+    def tearDown(self):
+        self.client.reconnect = False
+        self.client.order_tracker.stop()
+        self.ws.close()
+        self.rest.close()
+
+    def test_pushed_fill_and_balance(self):
+        self.assertTrue(_wait_for(lambda: self.client.user_stream_connection))
+        self.assertIn("/ws/key1", self.ws.paths())
+
+        future = self.client.order_tracker.track(self.client.contracts["BTCUSDT"], 42)
+        self.ws.send("/ws/key1", {"e": "ORDER_TRADE_UPDATE", "E": 1, "T": 1,
+                                  "o": {"s": "BTCUSDT", "i": 42, "X": "FILLED", "ap": "30100.5", "z": "0.010"}})
+
+        order_status = future.result(timeout=5)
+        self.assertEqual(order_status.average_price, 30100.5)
+        self.assertEqual(order_status.executed_qty, 0.01)
+
+        self.ws.send("/ws/key1", {"e": "ACCOUNT_UPDATE", "E": 2, "T": 2,
+                                  "a": {"m": "ORDER", "B": [{"a": "USDT", "wb": "990.5", "cw": "990.5"}], "P": []}})
+        self.assertTrue(_wait_for(lambda: self.client.balances["USDT"].wallet_balance == 990.5))
+
+        # Polling is only the fallback while the stream is connected
+        self.assertNotIn(("GET", "/fapi/v1/order"), self.rest.requests)
+
+
+class TestBitmexPrivateTables(unittest.TestCase):
+    def setUp(self):
+        instrument = {'symbol': "XBTUSD", 'rootSymbol': "XBT", 'quoteCurrency': "USD", 'tickSize': 0.5, 'lotSize': 100,
+                      'isQuanto': False, 'isInverse': True, 'multiplier': -100000000}
+        margin = {'currency': "XBt", 'initMargin': 0, 'maintMargin': 0, 'marginBalance': 100000000,
+                  'walletBalance': 100000000, 'unrealisedPnl': 0}
+
+        self.rest = _FakeRestServer({("GET", "/api/v1/instrument/active"): [instrument],
+                                     ("GET", "/api/v1/user/margin"): [margin]})
+        self.ws = _FakeWebsocketServer()
+
+        self.client = BitmexClient("public", "secret", True, base_url=self.rest.url, wss_url=self.ws.url)
+
+    def tearDown(self):
+        self.client.reconnect = False
+        self.client.order_tracker.stop()
+        self.ws.close()
+        self.rest.close()
+
+    def test_pushed_fill_and_margin(self):
+        self.assertTrue(_wait_for(lambda: "/" in self.ws.paths()))
+        self.assertEqual(self.client.balances["XBt"].wallet_balance, 1.0)
+
+        self.ws.send("/", {"success": True, "subscribe": "order", "request": {"op": "subscribe", "args": ["order"]}})
+        self.assertTrue(_wait_for(lambda: self.client.private_connection))
+
+        future = self.client.order_tracker.track(self.client.contracts["XBTUSD"], "abc")
+
+        self.ws.send("/", {"table": "order", "action": "insert",
+                           "data": [{"orderID": "abc", "symbol": "XBTUSD", "ordStatus": "New", "avgPx": None,
+                                     "cumQty": 0}]})
+        self.assertTrue(_wait_for(lambda: "abc" in self.client._orders))
+        self.assertFalse(future.done())
+
+        self.ws.send("/", {"table": "execution", "action": "insert",
+                           "data": [{"execID": "e1", "orderID": "abc", "symbol": "XBTUSD", "execType": "Trade",
+                                     "ordStatus": "Filled", "avgPx": 30000.5, "cumQty": 100, "lastQty": 100}]})
+
+        order_status = future.result(timeout=5)
+        self.assertEqual((order_status.status, order_status.average_price, order_status.executed_qty),
+                         ("filled", 30000.5, 100))
+
+        self.ws.send("/", {"table": "margin", "action": "update",
+                           "data": [{"account": 1, "currency": "XBt", "walletBalance": 150000000}]})
+        self.assertTrue(_wait_for(lambda: self.client.balances["XBt"].wallet_balance == 1.5))
+
+    def test_signed_requests_and_trade_price(self):
+
+        # The REST requests carry the signed headers (the baseline sent an undefined self._headers instead)
+        index = self.rest.requests.index(("GET", "/api/v1/user/margin"))
+        headers, query = self.rest.headers[index], self.rest.queries[index]
+        message = "GET/api/v1/user/margin" + ("?" + query if query else "") + headers['api-expires']
+        self.assertEqual(headers['api-key'], "public")
+        self.assertEqual(headers['api-signature'], hmac.new(b"secret", message.encode(), hashlib.sha256).hexdigest())
+
+        # The trades are read from their price field (the baseline read a 'crypto_price' that Bitmex never sends)
+        history = _random_walk_candles(10)
+        symbol_feeds = MultiTimeframeFeed("Bitmex", self.client.contracts["XBTUSD"], lambda contract, tf: history,
+                                          clock=lambda: 1650000541.0)
+        feed = symbol_feeds.get_feed("1m")
+        self.client._symbol_feeds = {"XBTUSD": symbol_feeds}
+
+        self.client._on_reponse(None, json.dumps({"table": "trade", "action": "insert", "data": [
+            {"timestamp": "2022-04-15T05:29:01.000Z", "symbol": "XBTUSD", "side": "Buy", "size": 100,
+             "price": 30123.5}]}))
+        self.assertEqual((feed.candles[-1].timestamp, feed.candles[-1].close), (history[-1].timestamp, 30123.5))
+
+        self.assertNotIn(("GET", "/api/v1/order"), self.rest.requests)
+
+    def test_pushed_cancel_without_fill(self):
+        self.assertTrue(_wait_for(lambda: "/" in self.ws.paths()))
+        future = self.client.order_tracker.track(self.client.contracts["XBTUSD"], "def")
+
+        self.ws.send("/", {"table": "order", "action": "insert",
+                           "data": [{"orderID": "def", "symbol": "XBTUSD", "ordStatus": "New", "avgPx": None}]})
+        self.ws.send("/", {"table": "order", "action": "update",
+                           "data": [{"orderID": "def", "ordStatus": "Canceled", "avgPx": None}]})
+
+        order_status = future.result(timeout=5)
+        self.assertEqual((order_status.status, order_status.average_price, order_status.executed_qty),
+                         ("canceled", 0, 0))
+        self.assertNotIn("def", self.client._orders)
+
+
+class TestTickRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_segments(self):
+        recorder = TickRecorder(self.tmp.name, "binance", segment_bytes=20000)
+        frames = ['{"e":"aggTrade","s":"BTCUSDT","p":"%s","q":"0.01","T":%s}' % (30000 + i % 50, i)
+                  for i in range(2000)]
+
+        for i, frame in enumerate(frames):
+            recorder.record(frame, receive_time=10 ** 18 + i * 10 ** 6)
+        recorder.stop()
+
+        paths = segment_paths(self.tmp.name, "binance")
+        self.assertEqual(paths, recorder.segments)
+        self.assertGreater(len(paths), 2)
+        self.assertEqual(list(read_ticks(paths)), [(10 ** 18 + i * 10 ** 6, f) for i, f in enumerate(frames)])
+
+        # A few bytes per message once compressed
+        self.assertLess(sum(os.path.getsize(p) for p in paths) / len(frames), 20)
+
+    def test_client_frames(self):
+        symbol_info = {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 2,
+                       'quantityPrecision': 3}
+        rest = _FakeRestServer({("GET", "/fapi/v1/exchangeInfo"): {'symbols': [symbol_info]},
+                                ("GET", "/fapi/v1/account"): {'balances': []}})
+        ws = _FakeWebsocketServer()
+        recorder = TickRecorder(self.tmp.name, "binance")
+
+        client = BinanceClient("public", "secret", True, False, base_url=rest.url, wss_url=ws.url, recorder=recorder)
+
+        try:
+            self.assertTrue(_wait_for(lambda: client.websocket_connection))
+            frame = {"e": "bookTicker", "s": "BTCUSDT", "b": "30000.5", "a": "30001.0"}
+            ws.send(ws.paths()[0], frame)
+            self.assertTrue(_wait_for(lambda: "BTCUSDT" in client.crypto_prices))
+        finally:
+            client.reconnect = False
+            client.order_tracker.stop()
+            ws.close()
+            rest.close()
+
+        recorder.stop()
+
+        ticks = list(read_ticks(segment_paths(self.tmp.name, "binance")))
+        self.assertEqual([json.loads(f) for _, f in ticks], [frame])
+        self.assertLess(abs(ticks[0][0] / 1e9 - time.time()), 60)
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.start = 1651363200 * 10 ** 9  # Receive time of the first frame, on a minute boundary
+        self.contracts = {"BTCUSDT": contract_factory("binance_futures")(
+            {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 2,
+             'quantityPrecision': 3})}
+
+        # Quiet history, then a breakout above 101 with volume and a rally to the take profit
+        recorder = TickRecorder(self.tmp.name, "binance")
+        prices = [100.5] * 20 + [102] * 20 + [104] * 20
+
+        for i, price in enumerate(prices):
+            receive_time = self.start + i * 10 ** 7
+            trade_time = receive_time // 10 ** 6 - 5
+            recorder.record('{"e":"bookTicker","s":"BTCUSDT","b":"%s","a":"%s"}' % (price - 0.5, price + 0.5),
+                            receive_time)
+            recorder.record('{"e":"aggTrade","s":"BTCUSDT","p":"%s","q":"1","T":%s}' % (price, trade_time),
+                            receive_time)
+        recorder.stop()
+
+        self.paths = recorder.segments
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _history(self, contract, timeframe, end_time):
+        self.history_end = end_time
+        return [candle_factory("parse_trade")({'ts': end_time - (10 - i) * 60000, 'open': 100, 'high': 101,
+                                               'low': 99, 'close': 100, 'volume': 1}, timeframe) for i in range(10)]
+
+    def _replay(self, speed=None):
+        client = ReplayBinanceClient(self.contracts, self._history)
+        replay = Replay(client, self.paths)
+        strategy = client.start_strategy(0, "Breakout", "BTCUSDT", "1m", 10, 1, 1, {'min_volume': 10})
+
+        try:
+            stats = replay.run(speed)
+        finally:
+            client.close()
+
+        return client, strategy, stats
+
+    def test_strategy_fills(self):
+        client, strategy, stats = self._replay()
+
+        self.assertEqual(self.history_end, self.start // 10 ** 6)
+        self.assertEqual(stats["frames"], 120)
+
+        # Long entry at the ask of the breakout, sized from the simulated balance, the take profit exit at the bid,
+        # then a new entry as the candle is still above the previous high
+        self.assertEqual([(f['side'], f['quantity'], f['price']) for f in client.fills],
+                         [("buy", 9.804, 102.5), ("sell", 9.804, 103.5), ("buy", 9.615, 104.5)])
+        self.assertEqual(client.fills[0]['time'], self.start // 10 ** 6 + 200)
+        self.assertEqual(strategy.trades[0].time, client.fills[0]['time'])
+        self.assertEqual(strategy.trades[0].status, "closed")
+
+        # The same frames give the same fills
+        self.assertEqual(self._replay()[0].fills, client.fills)
+
+    def test_speed(self):
+        stats = self._replay(speed=2)[2]
+
+        # The frames span 0.59 s of receive time
+        self.assertGreaterEqual(stats["elapsed"], 0.29)
+        self.assertLess(stats["elapsed"], 2)
+
+    def test_limit_orders(self):
+        client = ReplayBinanceClient(self.contracts, self._history)
+        replay = Replay(client, self.paths)
+        contract = self.contracts["BTCUSDT"]
+        resolved = []
+
+        try:
+            replay.run(max_frames=2)
+            order = client.create_crypto_trade_order(contract, "LIMIT", 1, "SELL", price=103, tif="GTC")
+            self.assertEqual(order.status, "new")
+            client.order_tracker.track(contract, order.order_id, resolved.append)
+
+            canceled = client.create_crypto_trade_order(contract, "LIMIT", 1, "BUY", price=99, tif="GTC")
+            self.assertEqual(client.cancel_order(contract, canceled.order_id).status, "canceled")
+
+            replay.run()
+        finally:
+            client.close()
+
+        # Filled on the first quote above the limit price
+        self.assertEqual([(s.order_id, s.status, s.average_price) for s in resolved], [(order.order_id, "filled", 103)])
+        self.assertEqual(client.fills[0]['time'], self.start // 10 ** 6 + 400)
+        self.assertEqual(len(client.fills), 1)
+
+    def test_latency(self):
+        client = self._replay()[0]
+        latency = client.latency
+
+        # The trades are received 5 ms after their exchange time, on the replay clock
+        self.assertEqual(latency.percentiles("receive", "BTCUSDT"), {50.0: 5.0, 90.0: 5.0, 99.0: 5.0, 99.9: 5.0})
+        self.assertEqual(latency.histogram("parsed", "BTCUSDT", "Breakout 1m").count, 60)
+
+        # Two entries and the take profit exit, no REST request in a replay
+        self.assertEqual(latency.histogram("signal", "BTCUSDT", "Breakout 1m").count, 3)
+        self.assertIsNone(latency.histogram("order_sent", "BTCUSDT", "Breakout 1m"))
+        self.assertEqual(set(s for s, _, _ in latency.summary()), {"receive", "parsed", "signal"})
+
+
+class TestStrategyIndex(unittest.TestCase):
+    # add_strategy() / remove_strategy() and the price handlers of the threaded clients, through the replay clients
+
+    def _check_index(self, client, contracts, frame):
+        strategies = [BreakoutStrategy(client, contracts[i % 2], client.platform, "1m", 10.0, 2.0, 1.0,
+                                       {'min_volume': 1.0}) for i in range(3)]
+
+        try:
+            for b_index, strategy in enumerate(strategies):
+                client.add_strategy(b_index, strategy)
+                trade = Trade({"time": 0, "entry_price": 100.0, "contract": strategy.contract, "strategy": "Breakout",
+                               "side": "long", "status": "open", "profitloss": 0, "quantity": 1, "entry_id": b_index})
+                strategy.trades.append(trade)
+                strategy._register_trade(trade)
+
+            first, second = contracts[0].symbol, contracts[1].symbol
+            self.assertEqual(client._strategies_by_symbol, {first: (strategies[0], strategies[2]),
+                                                            second: (strategies[1],)})
+
+            # Prices of the first symbol only update the PnL of its strategies
+            client._on_reponse(None, frame)
+            self.assertEqual([s.trades[0].profitloss != 0 for s in strategies], [True, False, True])
+
+            client.remove_strategy(0)
+            client.remove_strategy(1)
+            self.assertEqual(client._strategies_by_symbol, {first: (strategies[2],)})
+            self.assertEqual(len(strategies[0].feed.subscribers), 0)
+        finally:
+            client.close()
+
+    def test_binance(self):
+        contracts = [_binance_contract(), _binance_contract("ETHUSDT")]
+        client = ReplayBinanceClient({c.symbol: c for c in contracts})
+
+        self._check_index(client, contracts, '{"e":"bookTicker","s":"BTCUSDT","b":"101.0","a":"101.5"}')
+
+    def test_bitmex(self):
+        contracts = [contract_factory("bitmex")({'symbol': symbol, 'rootSymbol': "XBT", 'quoteCurrency': "USD",
+                                                 'tickSize': 0.5, 'lotSize': 100, 'isQuanto': False,
+                                                 'isInverse': False, 'multiplier': 1})
+                     for symbol in ("XBTUSDT", "ETHUSDT")]
+        client = ReplayBitmexClient({c.symbol: c for c in contracts})
+
+        self._check_index(client, contracts, '{"table":"instrument","action":"update",'
+                                             '"data":[{"symbol":"XBTUSDT","bidPrice":101.0,"askPrice":101.5}]}')
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            histogram.record(value)
+
+        self.assertEqual((histogram.count, histogram.min, histogram.max), (100000, 1, 100000))
+        for p, value in histogram.percentiles((1, 50, 99, 99.9, 100)).items():
+            self.assertLessEqual(abs(value - p * 1000) / (p * 1000), 1 / 32)
+
+        self.assertEqual(histogram.percentile(0.01), 10)  # Exact below 64
+
+    def test_stages(self):
+        tracker = LatencyTracker("binance_futures", clock=lambda: 1000.25, dump_interval=None)
+
+        mark_stage("parsed", "Breakout 1m")  # No trade being processed
+        self.assertEqual(tracker.summary(), dict())
+
+        tracker.begin("BTCUSDT", 1000000, time.perf_counter_ns())
+        mark_stage("parsed", "Breakout 1m")
+        mark_stage("signal", "Breakout 1m")
+        mark_stage("order_sent")
+        tracker.end()
+        mark_stage("response")
+
+        self.assertEqual(tracker.percentiles("receive", "BTCUSDT", percentiles=(50,)), {50: 250.0})
+        self.assertEqual(tracker.histogram("order_sent", "BTCUSDT", "Breakout 1m").count, 1)
+        self.assertEqual([key for key in tracker.summary()],
+                         [("receive", "BTCUSDT", ""), ("parsed", "BTCUSDT", "Breakout 1m"),
+                          ("signal", "BTCUSDT", "Breakout 1m"), ("order_sent", "BTCUSDT", "Breakout 1m")])
+
+
+class _FeedCounter:
+    def __init__(self):
+        self.updates = 0
+
+    def on_feed_update(self, tick_type):
+        self.updates += 1
+
+
+class TestMockExchange(unittest.TestCase):
+    def setUp(self):
+        self.mock = MockExchange(trade_rate=500, quote_rate=500).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_binance_client(self):
+        client = BinanceClient("public", "secret", True, True, base_url=self.mock.url,
+                               wss_url=self.mock.binance_wss_url)
+
+        try:
+            contract = client.contracts["BTCUSDT"]
+            feed = client.get_candle_feed(contract, "5m")
+            self.assertEqual(len(feed.candles), 1000 // 5)
+
+            counter = _FeedCounter()
+            feed.subscribe(counter)
+            client.subscribe_channel([contract], "aggTrade")
+            self.assertTrue(_wait_for(lambda: counter.updates > 10 and "BTCUSDT" in client.crypto_prices))
+            self.assertTrue(_wait_for(lambda: client.user_stream_connection))
+
+            self.assertEqual(client.get_trade_size(contract, 20000, 10), 0.05)
+
+            order = client.create_crypto_trade_order(contract, "MARKET", 0.01, "BUY")
+            self.assertEqual((order.status, order.executed_qty), ("filled", 0.01))
+
+            # Pushed by the user data stream once the price reaches it
+            price = round(client.crypto_prices["BTCUSDT"]['ask'] * 1.1, 1)  # Out of reach of the random walk
+            order = client.create_crypto_trade_order(contract, "LIMIT", 0.01, "SELL", price=price, tif="GTC")
+            self.assertEqual(order.status, "new")
+            self.mock.markets["binance"]["BTCUSDT"].price = price * 1.01
+            self.assertEqual(client.order_tracker.track(contract, order.order_id).result(10).status, "filled")
+
+            order = client.create_crypto_trade_order(contract, "LIMIT", 0.01, "BUY", price=1000, tif="GTC")
+            self.assertEqual(client.cancel_order(contract, order.order_id).status, "canceled")
+        finally:
+            _close_client(client)
+
+    def test_bitmex_client(self):
+        client = BitmexClient("public", "secret", True, base_url=self.mock.url, wss_url=self.mock.bitmex_wss_url)
+
+        try:
+            contract = client.contracts["XBTUSD"]
+            feed = client.get_candle_feed(contract, "1h")
+            self.assertEqual(len(feed.candles), 500)
+            self.assertEqual(feed.candles.timestamps[-1] % 3600000, 0)
+
+            counter = _FeedCounter()
+            feed.subscribe(counter)
+            self.assertTrue(_wait_for(lambda: counter.updates > 10 and client.private_connection))
+
+            self.assertEqual(client.balances['XBt'].wallet_balance, 1.0)
+
+            order = client.create_crypto_trade_order(contract, "MARKET", 100, "Buy")
+            self.assertEqual((order.status, order.executed_qty), ("filled", 100))
+            self.assertEqual(client.get_order_status(contract, order.order_id).status, "filled")
+        finally:
+            _close_client(client)
+
+    def test_rate(self):
+        self.mock.trade_rate = 5000
+        ws = websocket.create_connection(self.mock.binance_wss_url)
+
+        try:
+            ws.send(json.dumps({"method": "SUBSCRIBE", "params": ["btcusdt@aggTrade", "ethusdt@aggTrade"], "id": 1}))
+            self.assertEqual(json.loads(ws.recv()), {'result': None, 'id': 1})
+
+            received = 0
+            start = time.time()
+            while time.time() - start < 1:
+                received += json.loads(ws.recv())['e'] == "aggTrade"
+        finally:
+            ws.close()
+
+        self.assertGreater(received, 4000)
+        self.assertLess(received, 6000)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_scrape(self):
+        mock = MockExchange(trade_rate=500, quote_rate=500).start()
+        client = BinanceClient("public", "secret", True, True, base_url=mock.url, wss_url=mock.binance_wss_url)
+        gui = types.SimpleNamespace(gui_update_seconds=0.02, gui_update_total_seconds=1.5, gui_updates=75)
+        server = MetricsServer([client], gui).start()
+
+        try:
+            contract = client.contracts["BTCUSDT"]
+            strategy = BreakoutStrategy(client, contract, "Binance", "1m", 10.0, 2.0, 1.0, {'min_volume': 1e12})
+            strategy.attach_feed(client.get_candle_feed(contract, "1m"))
+            strategy.trades.append(Trade({"time": 1, "entry_price": 30000.0, "contract": contract,
+                                          "strategy": "Breakout", "side": "long", "status": "open",
+                                          "profitloss": 12.5, "quantity": 0.01, "entry_id": 1}))
+            client.add_strategy(3, strategy)
+
+            client.subscribe_channel([contract], "aggTrade")
+            self.assertTrue(_wait_for(lambda: client.message_counts["aggTrade"] > 10))
+
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                lines = response.read().decode().splitlines()
+
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(server.url.replace("/metrics", "/other"), timeout=5)
+        finally:
+            server.stop()
+            client.reconnect = False
+            client.web_s.close()
+            client.order_tracker.stop()
+            client.balance_cache.stop()
+            mock.stop()
+
+        values = {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in lines if not line.startswith("#")}
+        strategy_labels = 'exchange="binance_futures",strategy_id="3",strategy="Breakout 1m",symbol="BTCUSDT"'
+
+        self.assertIn("# TYPE tradeking_websocket_messages_total counter", lines)
+        self.assertGreater(values['tradeking_websocket_messages_total{exchange="binance_futures",channel="aggTrade"}'],
+                           10)
+        self.assertEqual(values['tradeking_websocket_reconnects_total{exchange="binance_futures"}'], 0)
+        self.assertEqual(values['tradeking_rest_errors_total{exchange="binance_futures",method="GET",'
+                                'endpoint="/fapi/v1/exchangeInfo"}'], 0)
+        self.assertEqual(values["tradeking_open_trades{%s}" % strategy_labels], 1)
+        self.assertEqual(values["tradeking_strategy_pnl{%s}" % strategy_labels], 12.5)
+        self.assertEqual(values['tradeking_candles{exchange="binance_futures",symbol="BTCUSDT",timeframe="1m"}'],
+                         1000)
+        self.assertGreater(values['tradeking_tick_latency_count{exchange="binance_futures",symbol="BTCUSDT",'
+                                  'strategy="Breakout 1m",stage="parsed"}'], 0)
+        self.assertEqual(values["tradeking_gui_updates_total"], 75)
+
+    def test_disabled(self):
+        os.environ.pop("TRADEKING_METRICS_PORT", None)
+        self.assertIsNone(start_metrics_server([]))
+
+
+class _SlowBreakoutStrategy(BreakoutStrategy):
+    # Signals on every update, each entry order takes as long as a slow order request
+
+    def _signal(self, tick_type: str) -> int:
+        self.updates.append(tick_type)
+        return 1
+
+    def _open_position(self, signal_result, price=None):
+        time.sleep(0.2)
+
+
+class _SizingStrategy(BreakoutStrategy):
+    # Sizes a trade on every update, like a strategy opening positions
+
+    def _signal(self, tick_type: str) -> int:
+        return 1
+
+    def _open_position(self, signal_result, price=None):
+        self.sizes.append(self.client.get_trade_size(self.contract, 100, 10))
+
+
+class _ExitRecordingStrategy(_SlowBreakoutStrategy):
+    # Busy with its first entry order, records the exits instead of placing their orders
+
+    def _signal(self, tick_type: str) -> int:
+        return 0 if self.ongoing_position else 1
+
+    def _open_position(self, signal_result, price=None):
+        self.ongoing_position = True
+        time.sleep(0.3)
+
+    def _close_trade(self, trade, stop_loss_triggered, current_price):
+        self.exits.append((stop_loss_triggered, current_price))
+        trade.status = "closed"
+
+
+class TestAsyncClient(unittest.TestCase):
+    def setUp(self):
+        self.minute = int(time.time() // 60 * 60000)
+
+        symbol_info = {'symbol': "BTCUSDT", 'baseAsset': "BTC", 'quoteAsset': "USDT", 'pricePrecision': 2,
+                       'quantityPrecision': 3}
+        usdt_info = {'asset': "USDT", 'initialMargin': "0", 'maintMargin': "0", 'marginBalance': "1000",
+                     'walletBalance': "1000", 'unrealizedProfit': "0"}
+        klines = [[self.minute - (4 - i) * 60000, "100", "101", "99", "100", "10"] for i in range(5)]
+
+        self.rest = _FakeRestServer({("GET", "/fapi/v1/exchangeInfo"): {'symbols': [symbol_info]},
+                                     ("GET", "/fapi/v1/account"): {'assets': [usdt_info]},
+                                     ("GET", "/fapi/v1/klines"): klines})
+        self.ws = _FakeWebsocketServer()
+
+        self.client = SyncClient(AsyncBinanceClient("public", "secret", True, True, base_url=self.rest.url,
+                                                    wss_url=self.ws.url))
+
+    def tearDown(self):
+        self.client.close()
+        self.ws.close()
+        self.rest.close()
+
+    def test_slow_strategy_does_not_block_market_data(self):
+        contract = self.client.contracts["BTCUSDT"]
+        self.assertEqual(self.client.balances["USDT"].wallet_balance, 1000)
+
+        strategy = _SlowBreakoutStrategy(self.client, contract, "Binance", "1m", 10.0, 2.0, 1.0, {'min_volume': 1})
+        strategy.updates = []
+
+        feed = self.client.get_candle_feed(contract, "1m")
+        self.assertEqual(len(feed.candles), 5)
+
+        strategy.attach_feed(feed)
+        self.client.add_strategy(1, strategy)
+        self.assertTrue(_wait_for(lambda: self.client.websocket_connection))
+
+        start = time.time()
+        for i in range(50):
+            self.ws.send("/", {"e": "aggTrade", "s": "BTCUSDT", "p": "100.5", "q": "1", "T": self.minute + 1000 + i})
+
+        # All the trades are in the candles long before the strategy could have handled each of them
+        self.assertTrue(_wait_for(lambda: feed.candles.volumes[-1] == 60))
+        self.assertLess(time.time() - start, 2.0)
+
+        self.assertTrue(_wait_for(lambda: len(strategy.updates) > 0))
+        self.assertLess(len(strategy.updates), 50)
+
+        self.client.remove_strategy(1)
+        self.assertEqual(feed.subscribers, ())
+
+    def test_strategies_signal_at_once(self):
+        client = SyncClient(AsyncBinanceClient("public", "secret", True, True, base_url=self.rest.url,
+                                               wss_url=self.ws.url, strategy_workers=2))
+
+        try:
+            contract = client.contracts["BTCUSDT"]
+            feed = client.get_candle_feed(contract, "1m")
+            strategies = [_SizingStrategy(client, contract, "Binance", "1m", 10.0, 2.0, 1.0, {'min_volume': 1})
+                          for _ in range(2)]
+
+            for b_index, strategy in enumerate(strategies):
+                strategy.sizes = []
+                strategy.attach_feed(feed)
+                client.add_strategy(b_index, strategy)
+
+            # As many strategies as workers size a trade at the same time, each holding a worker
+            self.assertTrue(_wait_for(lambda: client.websocket_connection))
+            self.ws.send("/", {"e": "aggTrade", "s": "BTCUSDT", "p": "100.5", "q": "1", "T": self.minute + 1000})
+
+            self.assertTrue(_wait_for(lambda: all(s.sizes == [1.0] for s in strategies)))
+        finally:
+            client.close()
+
+    def test_take_profit_between_updates(self):
+        contract = self.client.contracts["BTCUSDT"]
+        feed = self.client.get_candle_feed(contract, "1m")
+
+        strategy = _ExitRecordingStrategy(self.client, contract, "Binance", "1m", 10.0, 2.0, 1.0, {'min_volume': 1})
+        strategy.exits = []
+        trade = Trade({"time": 0, "entry_price": 100.0, "contract": contract, "strategy": "Breakout", "side": "long",
+                       "status": "open", "profitloss": 0, "quantity": 1, "entry_id": 1})
+        strategy.trades.append(trade)
+        strategy._register_trade(trade)
+        strategy.attach_feed(feed)
+        self.client.add_strategy(1, strategy)
+        self.assertTrue(_wait_for(lambda: self.client.websocket_connection))
+
+        # The take profit at 102 is touched and left while the strategy is busy with an entry order
+        for i, price in enumerate(["100.5", "103", "100.5"]):
+            self.ws.send("/", {"e": "aggTrade", "s": "BTCUSDT", "p": price, "q": "1", "T": self.minute + 1000 + i})
+            if i == 0:
+                self.assertTrue(_wait_for(lambda: strategy.ongoing_position))
+
+        self.assertTrue(_wait_for(lambda: len(strategy.exits) > 0))
+        self.assertEqual(strategy.exits, [(False, 103.0)])
+        self.assertEqual(len(strategy.trigger_book), 0)
+
+
 class TestGuiTitle(unittest.TestCase):
 
     async def _start_app(self):
@@ -0,0 +1,94 @@
+import collections
+import threading
+import time
+import typing
+
+import numpy as np
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connections kept open to an exchange, more than the threads that can send requests at the same time
+# (strategies, order tracker, balance cache, GUI)
+DEFAULT_POOL_SIZE = 10
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# GET requests are retried on connection errors and 5xx responses, orders are never sent twice
+DEFAULT_RETRIES = 3
+
+# Latencies kept per endpoint for the percentiles
+LATENCY_SAMPLES = 1000
+
+
+class Transport:
+    def __init__(self, base_url: str, headers: typing.Optional[typing.Dict[str, str]] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES):
+
+        # REST requests of one exchange sent through a requests.Session: the TCP/TLS connections are kept alive and
+        # reused by the next requests instead of being opened for every order, cancel or status request.
+
+        self.base_url = base_url
+        self.timeout = timeout
+
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=0.2,
+                      status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(["GET"]),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        if headers is not None:
+            self.session.headers.update(headers)
+
+        self._latencies: typing.Dict[str, typing.Deque[float]] = dict()
+        self._counts: typing.Dict[str, int] = collections.Counter()
+        self._errors: typing.Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def request(self, method: str, endpoint: str, params: typing.Optional[typing.Dict] = None,
+                headers: typing.Optional[typing.Dict[str, str]] = None) -> requests.Response:
+
+        # Raises the requests exceptions like the requests.get/post/delete functions
+
+        start = time.perf_counter()
+        error = True  # Not 200, like in the _send_trade_request() of the clients, or no response
+
+        try:
+            response = self.session.request(method, self.base_url + endpoint, params=params, headers=headers,
+                                            timeout=self.timeout)
+            error = response.status_code != 200
+            return response
+        finally:
+            self._record(method + " " + endpoint, time.perf_counter() - start, error)
+
+    def _record(self, key: str, latency: float, error: bool):
+        with self._lock:
+            if key not in self._latencies:
+                self._latencies[key] = collections.deque(maxlen=LATENCY_SAMPLES)
+            self._latencies[key].append(latency)
+            self._counts[key] += 1
+            if error:
+                self._errors[key] += 1
+
+    def latency_stats(self) -> typing.Dict[str, typing.Dict[str, float]]:
+
+        # Per endpoint ("GET /fapi/v1/order"): number of requests, of errors and latency in milliseconds of the
+        # recent ones
+
+        with self._lock:
+            samples = {key: np.array(latencies) * 1000 for key, latencies in self._latencies.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+
+        return {key: {"count": counts[key], "errors": errors.get(key, 0), "mean_ms": float(values.mean()),
+                      "p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95)),
+                      "max_ms": float(values.max())}
+                for key, values in samples.items()}
+
+    def close(self):
+        self.session.close()
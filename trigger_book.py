@@ -0,0 +1,80 @@
+import bisect
+import itertools
+import threading
+import typing
+
+from models import Trade
+
+
+class TriggerBook:
+    def __init__(self):
+
+        # Take profit / Stop loss prices of the filled open trades of a strategy, kept in two sorted lists:
+        # upper triggers fire when the price goes up to them (long take profit, short stop loss),
+        # lower triggers fire when the price goes down to them (long stop loss, short take profit).
+        # Each tick only compares the price with the nearest trigger of each list, closed trades are removed.
+
+        self._upper: typing.List[typing.Tuple[float, int, Trade, str]] = []
+        self._lower: typing.List[typing.Tuple[float, int, Trade, str]] = []
+
+        self._sequence = itertools.count()  # Tie breaker so that two triggers at the same price never compare trades
+        self._lock = threading.Lock()
+
+        # Filled open trades, replaced and never modified in place so that the websocket thread can loop over it
+        self.trades: typing.Tuple[Trade, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    def add(self, trade: Trade, take_profit_price: typing.Optional[float], stop_loss_price: typing.Optional[float]):
+        with self._lock:
+            if trade.side == "long":
+                upper = (take_profit_price, "take_profit")
+                lower = (stop_loss_price, "stop_loss")
+            else:
+                upper = (stop_loss_price, "stop_loss")
+                lower = (take_profit_price, "take_profit")
+
+            if upper[0] is not None:
+                bisect.insort(self._upper, (upper[0], next(self._sequence), trade, upper[1]))
+            if lower[0] is not None:
+                bisect.insort(self._lower, (lower[0], next(self._sequence), trade, lower[1]))
+
+            self.trades = self.trades + (trade,)
+
+    def remove(self, trade: Trade):
+        with self._lock:
+            self._upper = [t for t in self._upper if t[2] is not trade]
+            self._lower = [t for t in self._lower if t[2] is not trade]
+            self.trades = tuple(t for t in self.trades if t is not trade)
+
+    def check(self, price: float) -> typing.List[typing.Tuple[Trade, str]]:
+
+        # Trades whose take profit or stop loss is reached at this price, with "take_profit" or "stop_loss".
+        # The triggers stay in the book until remove() is called, once the exit order is placed.
+
+        upper = self._upper
+        lower = self._lower
+
+        if (len(upper) == 0 or price < upper[0][0]) and (len(lower) == 0 or price > lower[-1][0]):
+            return []
+
+        triggered = []
+        seen = set()
+
+        with self._lock:
+            for trigger_price, _, trade, trigger in self._upper:
+                if price < trigger_price:
+                    break
+                if id(trade) not in seen:
+                    seen.add(id(trade))
+                    triggered.append((trade, trigger))
+
+            for trigger_price, _, trade, trigger in reversed(self._lower):
+                if price > trigger_price:
+                    break
+                if id(trade) not in seen:
+                    seen.add(id(trade))
+                    triggered.append((trade, trigger))
+
+        return triggered